@@ -0,0 +1,146 @@
+# src/artifacts.py
+# Skriver dashboard-artefakter: minifisert JSON + forhåndskomprimerte
+# .gz/.br-søsken, valgfritt kolonneformat, og ingen skriving i det hele tatt
+# når innholdet er uendret (mindre disk-IO, git-churn og overføring).
+
+from __future__ import annotations
+import gzip, hashlib, json, os, tempfile
+from typing import Dict, Iterable, List
+
+try:
+    import brotli  # i requirements.txt (CI); lokalt uten den skrives bare .gz
+except ImportError:
+    brotli = None
+
+def dumps(payload, minify: bool = True) -> bytes:
+    if minify:
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+
+def to_columnar(rows: Iterable[dict], fields: List[str] | None = None) -> dict:
+    """[{a:1,b:2},...] → {"fields":["a","b"],"rows":[[1,2],...]}: feltnavn lagres én gang."""
+    rows = list(rows)
+    if fields is None:
+        fields = []
+        seen = set()
+        for r in rows:
+            for k in r:
+                if k not in seen:
+                    seen.add(k); fields.append(k)
+    return {"fields": fields, "rows": [[r.get(f) for f in fields] for r in rows]}
+
+def _digest(payload, volatile) -> str:
+    if volatile and isinstance(payload, dict):
+        payload = {k: v for k, v in payload.items() if k not in volatile}
+    return hashlib.sha256(dumps(payload)).hexdigest()
+
+def _existing_digest(path: str, volatile) -> str | None:
+    try:
+        with open(path, "rb") as f:
+            return _digest(json.loads(f.read()), volatile)
+    except (OSError, ValueError):
+        return None
+
+def _write_bytes(path: str, data: bytes):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def write_artifact(path: str, payload, *, minify: bool = True, compress: bool = True,
+                   volatile: Iterable[str] = ()) -> bool:
+    """Skriver `path` (+ .gz/.br) hvis innholdet har endret seg. Nøkler i
+    `volatile` (f.eks. generated_at) teller ikke som endring.
+    Returnerer True hvis filen ble skrevet."""
+    volatile = tuple(volatile)
+    if os.path.exists(path) and _existing_digest(path, volatile) == _digest(payload, volatile):
+        return False
+    body = dumps(payload, minify)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    _write_bytes(path, body)
+    if compress:
+        # mtime=0 gir byte-identisk .gz for likt innhold
+        _write_bytes(path + ".gz", gzip.compress(body, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write_bytes(path + ".br", brotli.compress(body))
+    return True
+
+class Spool:
+    """NDJSON-mellomlager på disk: rader skrives etter hvert som de kommer og
+    leses tilbake som strøm, så en lang liste aldri ligger i minnet."""
+
+    def __init__(self):
+        self.f = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self.n = 0
+
+    def add(self, row):
+        self.f.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.n += 1
+
+    def __iter__(self):
+        self.f.flush()
+        self.f.seek(0)
+        for line in self.f:
+            yield json.loads(line)
+
+    def close(self):
+        self.f.close()
+
+def write_artifact_stream(path: str, fields: Dict[str, object], *, minify: bool = True, compress: bool = True,
+                          volatile: Iterable[str] = ()) -> bool:
+    """Som write_artifact for et JSON-objekt, men felt som er iteratorer (ikke
+    list/dict) skrives element for element, med .gz/.br i samme pass. Samme
+    endringssjekk som write_artifact (og samme bytes når minify er på);
+    uendret innhold utenom `volatile` skrives ikke. Returnerer True hvis filen
+    ble skrevet."""
+    volatile = tuple(volatile)
+    old = _existing_digest(path, volatile) if os.path.exists(path) else None
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmps = {path + ".tmp": None}
+    outs = [open(path + ".tmp", "wb")]
+    if compress:
+        tmps[path + ".gz.tmp"] = None
+        outs.append(gzip.GzipFile(path + ".gz.tmp", "wb", compresslevel=9, mtime=0))
+    br = brotli.Compressor() if compress and brotli is not None else None
+    if br is not None:
+        tmps[path + ".br.tmp"] = None
+        br_out = open(path + ".br.tmp", "wb")
+    digest = hashlib.sha256()    # som _digest: minifisert, uten volatile felt
+
+    def emit(chunk: bytes, hashed: bytes | None = None):
+        for f in outs:
+            f.write(chunk)
+        if br is not None:
+            br_out.write(br.process(chunk))
+        if hashed is not None:
+            digest.update(hashed)
+
+    colon, comma = (b":", b",") if minify else (b": ", b", ")
+    emit(b"{", b"{")
+    n_hashed = 0
+    for i, (key, value) in enumerate(fields.items()):
+        k = json.dumps(key, ensure_ascii=False).encode("utf-8")
+        hashed = key not in volatile
+        emit((comma if i else b"") + k + colon, ((b"," if n_hashed else b"") + k + b":") if hashed else None)
+        n_hashed += hashed
+        if isinstance(value, (list, dict, str, int, float, bool, type(None))):
+            emit(dumps(value, minify), dumps(value) if hashed else None)
+            continue
+        emit(b"[", b"[" if hashed else None)
+        for j, row in enumerate(value):
+            emit((comma if j else b"") + dumps(row, minify),
+                 ((b"," if j else b"") + dumps(row)) if hashed else None)
+        emit(b"]", b"]" if hashed else None)
+    emit(b"}", b"}")
+    for f in outs:
+        f.close()
+    if br is not None:
+        br_out.write(br.finish())
+        br_out.close()
+    if old == digest.hexdigest():
+        for t in tmps:
+            os.remove(t)
+        return False
+    for t in tmps:
+        os.replace(t, t[:-len(".tmp")])
+    return True
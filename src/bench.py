@@ -0,0 +1,192 @@
+# src/bench.py
+# Benchmark av pipeline-stegene på syntetiske data, helt uten nett:
+#
+#   python -m src.bench [--scales 10,1000,10000] [--items 100000] [--json FIL] [--no-memory]
+#
+# Per skala (antall tickers): fetch_prices mot en lokal Stooq-stub,
+# build_trend_blocks (kald og varm indikator-tilstand), score_matrix (kjernen
+# i compute_trend_all) og skriving av data.json. Per item-mengde: dedup,
+# score_items og signal-lageret med shards. Rapporterer tid, gjennomstrømning
+# og topp-minne (tracemalloc; tidene inkluderer overheaden, se --no-memory).
+
+from __future__ import annotations
+import argparse, json, os, random, tempfile, time, tracemalloc, zlib
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from src.artifacts import write_artifact
+from src.replay import StubServer, scratch_dir
+from src.config import COMPANIES, TICKERS
+
+BARS = 260
+
+# ---------- syntetiske data ----------
+
+def synthetic_tickers(n: int):
+    return [f"T{i:05d}" for i in range(n)]
+
+def _walk(seed: int, n: int):
+    rng = np.random.default_rng(seed)
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = close * (1 + rng.normal(0, 0.01, n))
+    vol = rng.integers(100_000, 5_000_000, n).astype(float)
+    return open_, close, vol
+
+class SyntheticStooq:
+    """Svarer på Stooq-URL-er (quote + dagshistorikk) med deterministiske
+    data per symbol; brukes som fixtures for replay.StubServer."""
+
+    def __init__(self, bars: int = BARS):
+        end = datetime.now(timezone.utc).date()
+        days, d = [], end
+        while len(days) < bars:
+            if d.weekday() < 5:
+                days.append(d)
+            d -= timedelta(days=1)
+        self.days = [x.isoformat() for x in reversed(days)]
+
+    def get(self, method: str, url: str):
+        p = urlsplit(url)
+        sym = parse_qs(p.query).get("s", [""])[0]
+        open_, close, vol = _walk(zlib.crc32(sym.encode()), len(self.days))
+        if p.path.startswith("/q/l/"):
+            body = json.dumps({"symbols": [{"symbol": sym.upper(), "close": round(close[-1], 4),
+                                            "previousClose": round(close[-2], 4)}]}).encode()
+            return 200, {"Content-Type": "application/json"}, body
+        rows = ["Date,Open,High,Low,Close,Volume"]
+        for d, o, c, v in zip(self.days, open_, close, vol):
+            rows.append(f"{d},{o:.4f},{max(o, c):.4f},{min(o, c):.4f},{c:.4f},{v:.0f}")
+        return 200, {"Content-Type": "text/csv"}, "\n".join(rows).encode()
+
+WORDS = ("quantum", "qubit", "processor", "contract", "roadmap", "record", "fidelity", "logical",
+         "system", "cloud", "error", "correction", "photonic", "ion", "trapped", "neutral", "atom")
+SYLLABLES = ("ka", "ron", "tel", "mi", "sor", "va", "dex", "lu", "bri", "on", "gar", "pe", "nis",
+             "to", "quil", "ar", "fen", "do", "zy", "mar", "el", "us", "tra", "vin", "ko", "ste")
+GOOD = ("wins", "partnership", "milestone", "award", "funding", "beats")
+BAD = ("delay", "lawsuit", "downgrade", "misses", "probe")
+
+def synthetic_items(n: int, seed: int = 7):
+    """n items fordelt på news/sec/patents/arxiv med realistiske felt."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    news, sec, patents, arxiv = [], [], [], []
+    names = list(COMPANIES) + TICKERS
+    for i in range(n):
+        ts = now - timedelta(minutes=rng.randrange(0, 14 * 24 * 60))
+        # et par vokabularord + "egennavn" fra stavelser, så titlene ikke er
+        # urealistisk like (ellers blir dedup målt på et patologisk tilfelle)
+        words = " ".join(rng.choice(WORDS) if rng.random() < 0.4 else
+                         "".join(rng.choice(SYLLABLES) for _ in range(rng.randrange(2, 4)))
+                         for _ in range(rng.randrange(5, 11)))
+        title = f"{rng.choice(names)} {rng.choice(GOOD + BAD)} {words} {i}"
+        kind = i % 10
+        if kind < 5:
+            news.append({"source": "GDELT", "title": title, "url": f"https://news.example/{i}",
+                         "seendate": ts.strftime("%Y%m%dT%H%M%SZ"), "keyword": rng.choice(names)})
+        elif kind < 7:
+            sec.append({"source": "SEC", "ticker": rng.choice(TICKERS), "accession": f"0000-{i}",
+                        "form": rng.choice(("8-K", "10-Q", "4", "S-1", "424B5")),
+                        "filed": ts.strftime("%Y-%m-%d"), "primaryDoc": ""})
+        elif kind < 8:
+            patents.append({"source": "PatentsView", "title": title, "number": str(10_000_000 + i),
+                            "date": ts.strftime("%Y-%m-%d"), "keyword": "quantum computing"})
+        else:
+            arxiv.append({"source": "arXiv", "title": title, "link": f"http://arxiv.org/abs/{i}",
+                          "published": ts.strftime("%Y-%m-%dT%H:%M:%SZ"), "summary": words * 3})
+    return news, sec, patents, arxiv
+
+# ---------- måling ----------
+
+class Bench:
+    def __init__(self, memory: bool = True):
+        self.memory = memory
+        self.rows = []
+
+    def run(self, name: str, n: int, fn, unit: str = "items"):
+        if self.memory:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        out = fn()
+        secs = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1] if self.memory else 0
+        if self.memory:
+            tracemalloc.stop()
+        row = {"bench": name, "n": n, "unit": unit, "secs": round(secs, 4),
+               "per_sec": round(n / secs, 1) if secs > 0 else None,
+               "peak_mb": round(peak / 1e6, 2) if self.memory else None}
+        self.rows.append(row)
+        mem = f"{row['peak_mb']:>9.1f} MB" if self.memory else ""
+        print(f"{name:<26} {n:>8} {unit:<8} {secs:>9.3f}s {row['per_sec'] or 0:>12,.0f}/s {mem}")
+        return out
+
+def bench_tickers(b: Bench, n: int):
+    from src import main as radar
+    from src.logic.trend import score_matrix
+    from src.logic.indicators import align
+    from src.sources.prices import fetch_prices
+
+    tickers = synthetic_tickers(n)
+    with StubServer(SyntheticStooq()):
+        payload = b.run(f"fetch_prices[{n}]", n, lambda: fetch_prices(tickers), "tickers")
+    states = {}
+    trend = b.run(f"trend kald[{n}]", n, lambda: radar.build_trend_blocks(payload, states), "tickers")
+    b.run(f"trend varm[{n}]", n, lambda: radar.build_trend_blocks(payload, states), "tickers")
+
+    store = radar.lazy_import("src.sources.prices").STORE
+    def matrix():
+        bars = [store.tail(t, 60) for t in tickers]
+        mats = [align([x[c] for x in bars]) for c in ("close", "open", "volume")]
+        return score_matrix(tickers, *mats)
+    b.run(f"score_matrix[{n}]", n, matrix, "tickers")
+
+    def write():
+        return write_artifact(os.path.join("docs", f"data-{n}.json"),
+                              {"prices": radar.price_outputs(payload), "trend": trend})
+    b.run(f"write data.json[{n}]", n, write, "tickers")
+
+def bench_items(b: Bench, n: int):
+    from src import main as radar
+    from src.logic.rules import score_items
+    news, sec, patents, arxiv = synthetic_items(n)
+    results = {"news": news, "sec": sec, "patents": patents, "arxiv": arxiv, "prices": []}
+    deduped = b.run(f"dedup[{len(news) + len(arxiv)}]", len(news) + len(arxiv),
+                    lambda: radar.drop_near_dups(results))
+    scored = b.run(f"score_items[{n}]", n, lambda: score_items(news, sec, patents, arxiv, []))
+    b.run(f"score_items dedup[{n}]", sum(len(v) for v in deduped.values()),
+          lambda: radar.score_results(deduped))
+    b.run(f"signal-lager[{len(scored)}]", len(scored), lambda: radar.publish_signals(scored), "signals")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m src.bench", description="Benchmark av radar-pipeline på syntetiske data.")
+    ap.add_argument("--scales", default="10,1000,10000", help="antall tickers per runde (kommaseparert)")
+    ap.add_argument("--items", type=int, default=100_000, help="antall syntetiske items")
+    ap.add_argument("--json", default="", help="skriv resultatene til denne filen")
+    ap.add_argument("--no-memory", action="store_true", help="ikke mål minne (tracemalloc gjør alt tregere)")
+    args = ap.parse_args(argv)
+    scales = [int(x) for x in args.scales.split(",") if x.strip()]
+    out_path = os.path.abspath(args.json) if args.json else ""
+
+    b = Bench(memory=not args.no_memory)
+    print(f"{'bench':<26} {'n':>8} {'':<8} {'tid':>10} {'gjennomstrømning':>14} {'topp-minne' if b.memory else ''}")
+    old = os.getcwd()
+    # relative stier (data/, docs/) havner i en tom katalog per kjøring
+    with tempfile.TemporaryDirectory(prefix="radar-bench-") as tmp:
+        try:
+            for n in scales:
+                scratch_dir(os.path.join(tmp, f"s{n}"))
+                bench_tickers(b, n)
+            if args.items:
+                scratch_dir(os.path.join(tmp, "items"))
+                bench_items(b, args.items)
+        finally:
+            os.chdir(old)
+    if out_path:
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump({"generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                       "results": b.rows}, f, indent=1)
+        print(f"[bench] skrev {out_path}")
+
+if __name__ == "__main__":
+    main()
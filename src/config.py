@@ -8,3 +8,71 @@ CIK = {"RGTI":"0001839550","IONQ":"0001824920","QBTS":"0001819913","QUBT":"00015
 DISCORD_WEBHOOK = os.getenv("DISCORD_WEBHOOK","")
 SEC_USER_AGENT = os.getenv("SEC_USER_AGENT","email@example.com")
 DATA_JSON = "docs/data.json"; SIGNALS_JSON="docs/signals.json"; STATE_JSON="data/state.json"
+# Frist per kilde (sekunder) når kildene hentes parallelt
+SOURCE_DEADLINES = {"prices": 60, "news": 90, "sec": 90, "patents": 90, "arxiv": 120}
+# Strømmende kjøring: maks items i kø mellom kildene og resten, rader per
+# skrivebatch til SQLite, og antall signaler som listes i varselet
+STREAM_QUEUE = 1000; STREAM_BATCH = 500; ALERT_TOP = 10
+# Rate limit per host for den delte HTTP-klienten: (forespørsler per sekund, burst)
+HOST_RATES = {
+    "data.sec.gov": (10, 10),             # SEC: maks 10 req/s
+    "www.sec.gov": (10, 10),
+    "export.arxiv.org": (1/3, 1),         # arXiv: ett kall per 3 s
+    "api.gdeltproject.org": (2.5, 1),
+    "api.patentsview.org": (2, 1),
+    "stooq.com": (5, 5),
+    "discord.com": (2.5, 5),              # webhooks: 5 per 2 s
+}
+# Conditional-GET-cache for kildene (ETag/Last-Modified)
+HTTP_CACHE_DIR = "data/http_cache"; HTTP_CACHE_TTL = 7*24*3600; HTTP_CACHE_MAX_BYTES = 200*1024*1024
+# Append-only kurslager (én binærfil per ticker)
+PRICE_STORE_DIR = "data/prices"
+# Online indikator-tilstand per ticker (EMA, Wilder RSI, volumvindu)
+INDICATORS_JSON = "data/indicators.json"
+# Batch-trend (yfinance): tickers per multi-symbol-kall og lokal cache av rårammer
+TREND_CHUNK = 50; TREND_CACHE_DIR = "data/trend_cache"; TREND_CACHE_TTL = 3600
+# SQLite-database for varslede signal-ID-er (og senere signalhistorikk)
+RADAR_DB = "data/radar.db"; SEEN_TTL_DAYS = 90
+# Sekunder en forbindelse venter på skrivelåsen i radar.db
+DB_TIMEOUT = 30
+# Signalhistorikk: per-dag-shards for dashboardet + siste N i signals.json
+SIGNALS_DIR = "docs/signals"; SIGNALS_LATEST = 200
+# Signaler eldre enn dette slettes fra radar.db (shard-filene i docs/ blir liggende)
+SIGNALS_TTL_DAYS = 365
+# Dashboard-artefakter: minifisert JSON, .gz/.br-søsken, kolonneformat for lister
+ARTIFACT_MINIFY = True; ARTIFACT_COMPRESS = True; ARTIFACT_COLUMNAR = True
+# Delta-feed for dashboardet: snapshot hver N-te generasjon, deltaer beholdes for de siste M
+FEED_DIR = "docs/feed"; FEED_SNAPSHOT_EVERY = 24; FEED_KEEP = 48
+# Aliaser per ticker for entitetsoppslag i titler/sammendrag
+ALIASES = {
+    "RGTI": ["Rigetti", "Rigetti Computing"],
+    "IONQ": ["IonQ"],
+    "QBTS": ["D-Wave", "D-Wave Quantum", "DWave"],
+    "QUBT": ["Quantum Computing Inc", "Quantum Computing Inc.", "QCi"],
+}
+# Klynger for nær-duplikater (MinHash/LSH) lever så lenge de får nye treff
+NEARDUP_TTL_DAYS = 14
+# Spørreplanlegger for arXiv/GDELT: sidestørrelse og maks sider per OR-spørring
+ARXIV_PAGE_SIZE = 100; ARXIV_MAX_PAGES = 5; NEWS_MAX_RECORDS = 250; NEWS_MAX_PAGES = 4
+# SEC: bulk ticker→CIK-kart, tilbakefylling første gang en CIK sees, parallelle kall
+SEC_TICKERS_JSON = "data/company_tickers.json"; SEC_BACKFILL_DAYS = 30; SEC_WORKERS = 8
+# Notifier: persistent outbox og cachede DM-kanaler
+NOTIFIER_JSON = "data/notifier.json"
+# Daemon (python -m src.daemon): intervall per kilde i sekunder; priser kun i åpningstid
+SCHEDULES = {
+    "prices":  {"every": 60, "market_hours": True},
+    "news":    {"every": 300},
+    "sec":     {"every": 600},
+    "patents": {"every": 86400},
+    "arxiv":   {"every": 3600},
+}
+MARKET_TZ = "America/New_York"; MARKET_OPEN = (9, 30); MARKET_CLOSE = (16, 0)
+# Daemonen husker scorede items og kryss-boost-masker (samme ticker, samme uke) så mange dager
+DAEMON_WINDOW_DAYS = 8
+# Instrumentering: spans/tellere per kjøring med rullerende historikk (+ valgfri Prometheus-fil)
+METRICS_JSON = "docs/metrics.json"; METRICS_HISTORY = 168
+METRICS_PROM = os.getenv("RADAR_METRICS_PROM", "")
+# Record/replay-fixtures for kjøring uten nett (python -m src.replay)
+REPLAY_DIR = "data/fixtures"
+# Ticker-univers fra fil (CSV/JSON; config-listene over brukes alltid i tillegg) og shard-resultater
+UNIVERSE_FILE = os.getenv("RADAR_UNIVERSE", "data/universe.csv"); SHARDS_DIR = "data/shards"
@@ -0,0 +1,152 @@
+# src/daemon.py
+# Langtkjørende modus (python -m src.daemon): hver kilde hentes i sin egen
+# takt (SCHEDULES), mens HTTP-session, cacher, importerte kilder og
+# indikator-tilstand og kryss-boost-masker lever i minnet. Bare items som
+# ikke er scoret før scores; en kilde som ikke leverte noe nytt trigger
+# verken scoring eller publisering.
+
+from __future__ import annotations
+import argparse, hashlib, json, signal, threading, time, traceback
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from src import main as radar
+from src.logic.rules import StreamScorer
+from src.config import (
+    SCHEDULES, MARKET_TZ, MARKET_OPEN, MARKET_CLOSE, DAEMON_WINDOW_DAYS,
+    DATA_JSON, STATE_JSON, INDICATORS_JSON
+)
+
+TICK = 5.0      # sekunder mellom hver sjekk av timeplanen
+
+def market_open(now: float | None = None) -> bool:
+    t = datetime.fromtimestamp(now or time.time(), ZoneInfo(MARKET_TZ))
+    return t.weekday() < 5 and MARKET_OPEN <= (t.hour, t.minute) < MARKET_CLOSE
+
+def _digest(items) -> str:
+    raw = json.dumps(items, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+class Daemon:
+    def __init__(self, sources):
+        self.sources = list(sources)
+        self.next_run = {name: 0.0 for name in self.sources}    # alle kjøres ved oppstart
+        self.digests = {}                                        # kilde → digest av siste leveranse
+        # Digest → tidspunkt for items som er scoret de siste dagene, per kilde;
+        # kryss-boost (samme ticker, samme uke) husker scoreren som masker.
+        self.scored = {name: {} for name in radar.STREAMS if name != "prices"}
+        self.scorer = StreamScorer()
+        prev = radar.read_json(DATA_JSON, {})
+        self.prices_out, self.trend = prev.get("prices", []), prev.get("trend", [])
+        self.timings = prev.get("timings", {})
+        self.ind_states = radar.load_indicator_states(INDICATORS_JSON) if "prices" in self.sources else None
+        self.state = radar.read_json(STATE_JSON, {"last_run": None})
+        self.stopped = threading.Event()
+
+    def due(self, now: float):
+        out = []
+        for name in self.sources:
+            spec = SCHEDULES[name]
+            if now < self.next_run[name]:
+                continue
+            # utenfor åpningstid hentes priser bare én gang (ved oppstart)
+            if spec.get("market_hours") and name in self.digests and not market_open(now):
+                continue
+            self.next_run[name] = now + spec["every"]
+            out.append(name)
+        return out
+
+    def _changed(self, name: str, items) -> bool:
+        d = _digest(items)
+        if self.digests.get(name) == d:
+            return False
+        self.digests[name] = d
+        return bool(items)
+
+    def _fresh(self, name: str, items, now: float):
+        """Items fra kilden som ikke er scoret før."""
+        seen = self.scored[name]
+        out = []
+        for it in items:
+            d = _digest(it)
+            if d not in seen:
+                seen[d] = now
+                out.append(it)
+        cutoff = now - DAEMON_WINDOW_DAYS * 86400
+        for k in [k for k, added in seen.items() if added < cutoff]:
+            del seen[k]
+        return out
+
+    def tick(self, now: float | None = None) -> bool:
+        """Én runde: hent kildene som står for tur, og scor/publiser bare hvis
+        noe er nytt. True hvis noe ble publisert."""
+        now = now or time.time()
+        due = self.due(now)
+        if not due:
+            return False
+        results, timings = radar.fetch_sources(due)
+        self.timings.update(timings)
+        changed = [name for name in due if self._changed(name, results.get(name) or [])]
+        if not changed:
+            print(f"[daemon] {', '.join(due)}: ingenting nytt")
+            radar.write_metrics()
+            return False
+        results = radar.drop_near_dups({name: results.get(name) or [] for name in changed})
+        fresh = {name: self._fresh(name, results[name], now) for name in changed if name != "prices"}
+
+        if "prices" in changed:
+            fresh["prices"] = results["prices"]
+            self.trend = radar.build_trend_blocks(results["prices"], self.ind_states)
+            self.prices_out = radar.price_outputs(results["prices"])
+            radar.save_indicator_states(INDICATORS_JSON, self.ind_states)
+        elif not any(fresh.values()):
+            print(f"[daemon] {', '.join(changed)}: ingenting nytt etter dedup")
+            radar.write_metrics()
+            return False
+
+        self.scorer.advance(now, DAEMON_WINDOW_DAYS * 86400)
+        scored = radar.score_results(fresh, self.scorer)
+        new_for_alert = radar.new_alerts(scored, self.state)
+        radar.send_alerts(new_for_alert)         # notifier-tråden leverer mens vi fortsetter
+        touched = radar.publish_signals(scored, self.scorer.boost_ranges())
+        counts = {"signals_today": len(new_for_alert), "signals_total": len(scored)}
+        if "prices" in changed or new_for_alert:
+            radar.publish_data(self.prices_out, self.trend, counts, self.timings)
+        if "prices" in changed or touched:
+            radar.publish_feed(self.prices_out, self.trend, counts, touched)
+        radar.mark_run(self.state)
+        print(f"[daemon] {', '.join(changed)} • {len(scored)} signaler • {len(new_for_alert)} nye")
+        radar.write_metrics()
+        return True
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"[WARN] daemon-runde feilet: {e}")
+                traceback.print_exc()
+            self.stopped.wait(TICK)
+        if not radar.flush_notifier():
+            print("[notifier] usendte meldinger ligger i outbox til neste start")
+
+    def stop(self, *_):
+        self.stopped.set()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m src.daemon", description="Quantum radar som daemon med egen takt per kilde.")
+    ap.add_argument("--sources", default=",".join(SCHEDULES),
+                    help=f"kommaseparerte kilder (standard: alle) – {', '.join(SCHEDULES)}")
+    args = ap.parse_args(argv)
+    sources = [x.strip() for x in args.sources.split(",") if x.strip()]
+    unknown = [x for x in sources if x not in SCHEDULES or x not in radar.SOURCES]
+    if unknown:
+        ap.error(f"ukjente kilder: {', '.join(unknown)}")
+    d = Daemon(sources)
+    signal.signal(signal.SIGTERM, d.stop)
+    signal.signal(signal.SIGINT, d.stop)
+    print("[daemon] startet • " + " • ".join(f"{n} {SCHEDULES[n]['every']}s" for n in sources))
+    d.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# src/feed.py
+# Versjonert delta-feed for dashboardet (docs/feed/):
+#
+#   manifest.json          seq, siste snapshot og deltaene etter den, med sha256
+#   delta-<seq>.json       det som er nytt/endret siden forrige generasjon:
+#                          signaler, pris-/trendrader per ticker og meta
+#   snapshot-<seq>.json    komprimert full tilstand (priser, trend, siste signaler)
+#
+# Klienten husker seq og henter bare deltaene den ikke har sett; er den for
+# langt bak (deltaene er ryddet bort) starter den fra siste snapshot. Hva som
+# er endret avgjøres av en hash per rad i radar.db, så en generasjon koster
+# det som faktisk endret seg, ikke hele historikken.
+
+from __future__ import annotations
+import hashlib, json, os, re, time
+from datetime import datetime, timezone
+from typing import Dict, Iterable
+
+from src.artifacts import dumps, to_columnar, write_artifact, write_artifact_stream
+from src.store.db import connect
+
+VERSION = 1
+_FILE_RE = re.compile(r"^(delta|snapshot)-(\d+)\.json(\.gz|\.br)?$")
+
+def _hash(row) -> str:
+    return hashlib.blake2b(dumps(row), digest_size=12).hexdigest()
+
+def _file_sha(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+class Feed:
+    def __init__(self, root: str, db: str, snapshot_every: int = 24, keep: int = 48,
+                 signals_limit: int = 200, columnar: bool = False):
+        self.root = root
+        self.snapshot_every = snapshot_every
+        self.keep = keep
+        self.signals_limit = signals_limit
+        self.columnar = columnar
+        self.conn = connect(db)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS feed_rows (
+                kind TEXT NOT NULL, key TEXT NOT NULL, hash TEXT NOT NULL, ts INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (kind, key)) WITHOUT ROWID;
+        """)
+        if "ts" not in {r[1] for r in self.conn.execute("PRAGMA table_info(feed_rows)")}:
+            self.conn.execute("ALTER TABLE feed_rows ADD COLUMN ts INTEGER NOT NULL DEFAULT 0")
+
+    def manifest(self) -> dict | None:
+        try:
+            with open(os.path.join(self.root, "manifest.json"), "r", encoding="utf-8") as f:
+                m = json.load(f)
+            return m if m.get("version") == VERSION else None
+        except (OSError, ValueError):
+            return None
+
+    def _known(self, kind: str) -> Dict[str, str]:
+        return dict(self.conn.execute("SELECT key, hash FROM feed_rows WHERE kind = ?", (kind,)))
+
+    def _changed(self, kind: str, rows: Iterable[dict], key: str, complete: bool):
+        """(endrede rader, fjernede nøkler) mot forrige generasjon; oppdaterer hashene."""
+        known = self._known(kind) if complete else None
+        changed, seen, now = [], set(), int(time.time())
+        for row in rows:
+            k = str(row.get(key))
+            h = _hash(row)
+            seen.add(k)
+            old = known.get(k) if known is not None else next(iter(self.conn.execute(
+                "SELECT hash FROM feed_rows WHERE kind = ? AND key = ?", (kind, k))), (None,))[0]
+            if old != h:
+                changed.append(row)
+                self.conn.execute("INSERT OR REPLACE INTO feed_rows (kind, key, hash, ts) VALUES (?, ?, ?, ?)",
+                                  (kind, k, h, now))
+        removed = sorted(set(known) - seen) if complete else []
+        self.conn.executemany("DELETE FROM feed_rows WHERE kind = ? AND key = ?", [(kind, k) for k in removed])
+        return changed, removed
+
+    def _entry(self, name: str, seq: int) -> dict:
+        path = os.path.join(self.root, name)
+        return {"seq": seq, "file": name, "sha256": _file_sha(path), "bytes": os.path.getsize(path)}
+
+    def publish(self, meta: dict, prices: Iterable[dict], trend: Iterable[dict],
+                signals: Iterable[dict], latest_signals) -> int | None:
+        """Ny generasjon hvis noe er endret. `prices`/`trend` er de komplette
+        listene (kan itereres to ganger, f.eks. en Spool), `signals` er
+        kandidater (f.eks. signalene for dagene som ble berørt), og
+        `latest_signals()` gir de siste signalene til et snapshot.
+        Returnerer ny seq, eller None når ingenting er endret."""
+        # hashene committes først når filene er skrevet: feiler skrivingen,
+        # kommer endringene med i neste delta i stedet
+        try:
+            seq = self._publish(meta, prices, trend, signals, latest_signals)
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
+        return seq
+
+    def _publish(self, meta, prices, trend, signals, latest_signals) -> int | None:
+        m = self.manifest()
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        if m is None:
+            self.conn.execute("DELETE FROM feed_rows")    # uten feed på disk: start på nytt
+        delta = {"prices": [], "trend": [], "signals": [], "removed": {}, "meta": {}}
+        for k, v in meta.items():
+            if self._changed("meta", [{"k": k, "v": v}], "k", False)[0]:
+                delta["meta"][k] = v
+        for kind, rows in (("prices", prices), ("trend", trend)):
+            delta[kind], removed = self._changed(kind, rows, "ticker", True)
+            if removed:
+                delta["removed"][kind] = removed
+        delta["signals"], _ = self._changed("signals", signals, "id", False)
+        if m is not None and not any(delta.values()):
+            return None
+
+        seq = (m["seq"] if m else 0) + 1
+        os.makedirs(self.root, exist_ok=True)
+        deltas = list(m["deltas"]) if m else []
+        if m is not None:
+            name = f"delta-{seq}.json"
+            if self.columnar:
+                delta["signals"] = to_columnar(delta["signals"])
+            write_artifact(os.path.join(self.root, name), {"seq": seq, "generated_at": now, **delta})
+            deltas.append(self._entry(name, seq))
+        snapshot = m["snapshot"] if m else None
+        if snapshot is None or seq - snapshot["seq"] >= self.snapshot_every:
+            name = f"snapshot-{seq}.json"
+            latest = latest_signals()
+            write_artifact_stream(os.path.join(self.root, name), {
+                "seq": seq, "generated_at": now, "meta": meta,
+                "prices": iter(prices), "trend": iter(trend),
+                "signals": to_columnar(latest) if self.columnar else latest,
+            })
+            snapshot = self._entry(name, seq)
+        # deltaene etter snapshotet må finnes; eldre beholdes for klienter som er litt bak
+        deltas = [d for d in deltas if d["seq"] > snapshot["seq"] or d["seq"] > seq - self.keep]
+        write_artifact(os.path.join(self.root, "manifest.json"), {
+            "version": VERSION, "seq": seq, "generated_at": now, "signals_limit": self.signals_limit,
+            "snapshot": snapshot, "deltas": deltas,
+        }, compress=False)
+        self._prune({d["seq"] for d in deltas})
+        return seq
+
+    def _prune(self, delta_seqs: set):
+        """Sletter deltaer som ikke står i manifestet og alle snapshots utenom
+        de to siste (en klient kan ha lest forrige manifest)."""
+        files = [(m.group(1), int(m.group(2)), name) for name in os.listdir(self.root)
+                 if (m := _FILE_RE.match(name))]
+        snapshots = sorted({seq for kind, seq, _ in files if kind == "snapshot"})[-2:]
+        for kind, seq, name in files:
+            if seq not in (snapshots if kind == "snapshot" else delta_seqs):
+                os.remove(os.path.join(self.root, name))
+
+    def evict(self, max_age: float, now: int | None = None) -> int:
+        """Glemmer hashene for signaler som ikke er endret på max_age sekunder
+        (kommer et slikt signal igjen, sendes det bare på nytt)."""
+        cutoff = int((now or time.time()) - max_age)
+        with self.conn:
+            return self.conn.execute("DELETE FROM feed_rows WHERE kind = 'signals' AND ts < ?", (cutoff,)).rowcount
+
+    def close(self):
+        self.conn.close()
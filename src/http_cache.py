@@ -0,0 +1,104 @@
+# src/http_cache.py
+# Disk-cache for HTTP-responser, nøkkel = URL. Lagrer ETag/Last-Modified slik at
+# neste kall kan sendes som conditional GET; uendrede data koster da en 304 og
+# en lokal lesing i stedet for full nedlasting.
+
+from __future__ import annotations
+import hashlib, json, os, time
+
+class ResponseCache:
+    def __init__(self, root: str, ttl: float, max_bytes: int):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+    def _paths(self, url: str):
+        h = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        d = os.path.join(self.root, h[:2])
+        return os.path.join(d, h + ".json"), os.path.join(d, h + ".body")
+
+    def lookup(self, url: str) -> dict | None:
+        meta_p, body_p = self._paths(url)
+        try:
+            with open(meta_p, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url or not os.path.exists(body_p):
+            return None
+        if time.time() - meta.get("stored", 0) > self.ttl:
+            return None
+        return meta
+
+    def validators(self, meta: dict) -> dict:
+        h = {}
+        if meta.get("etag"):
+            h["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            h["If-Modified-Since"] = meta["last_modified"]
+        return h
+
+    def body(self, url: str) -> bytes:
+        with open(self._paths(url)[1], "rb") as f:
+            return f.read()
+
+    def store(self, url: str, headers, body: bytes) -> bool:
+        etag, lm = headers.get("ETag"), headers.get("Last-Modified")
+        if not etag and not lm:
+            return False  # ingenting å revalidere mot
+        meta_p, body_p = self._paths(url)
+        os.makedirs(os.path.dirname(meta_p), exist_ok=True)
+        meta = {
+            "url": url, "etag": etag, "last_modified": lm, "stored": time.time(),
+            "content_type": headers.get("Content-Type"), "size": len(body),
+        }
+        for path, data in ((body_p, body), (meta_p, json.dumps(meta).encode("utf-8"))):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return True
+
+    def touch(self, url: str):
+        """Oppdaterer lagringstidspunktet etter en 304 (data er bekreftet ferske)."""
+        meta = self.lookup(url)
+        if meta is None:
+            return
+        meta["stored"] = time.time()
+        meta_p = self._paths(url)[0]
+        tmp = f"{meta_p}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, meta_p)
+
+    def prune(self) -> int:
+        """Sletter utløpte oppføringer, deretter eldste til vi er under størrelsestaket.
+        Returnerer antall slettede oppføringer."""
+        entries, total, now = [], 0, time.time()
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                meta_p = os.path.join(dirpath, name)
+                body_p = meta_p[:-5] + ".body"
+                try:
+                    with open(meta_p, "r", encoding="utf-8") as f:
+                        stored = json.load(f).get("stored", 0)
+                    size = os.path.getsize(body_p)
+                except (OSError, ValueError):
+                    stored, size = 0, 0
+                entries.append((stored, size, meta_p, body_p))
+                total += size
+        entries.sort()
+        removed = 0
+        for stored, size, meta_p, body_p in entries:
+            if now - stored <= self.ttl and total <= self.max_bytes:
+                break
+            for p in (meta_p, body_p):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,172 @@
+# src/http_client.py
+# Felles HTTP-klient for alle kilder og notifier:
+#  - én requests.Session med keep-alive connection pool (varme TCP/TLS-koblinger)
+#  - gzip/deflate (requests pakker ut automatisk)
+#  - token bucket per host (f.eks. SEC 10 req/s, arXiv ett kall per 3 s)
+#  - retry med jittered eksponentiell backoff, respekterer Retry-After
+#  - valgfri conditional-GET-cache på disk (ETag/Last-Modified, se http_cache.py)
+
+from __future__ import annotations
+import random, threading, time
+from typing import TYPE_CHECKING, Callable
+from urllib.parse import urlsplit
+
+from src.config import HOST_RATES, HTTP_CACHE_DIR, HTTP_CACHE_TTL, HTTP_CACHE_MAX_BYTES
+from src import metrics
+from src.http_cache import ResponseCache
+from src.runner import deadline_left
+
+if TYPE_CHECKING:                 # requests importeres først ved første kall (rask oppstart)
+    import requests
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 20.0
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0", "Accept-Encoding": "gzip, deflate"}
+
+class TokenBucket:
+    """Enkel trådsikker token bucket: `rate` tokens per sekund, maks `burst`."""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Reserverer et token under lås og sover etterpå, så ventende tråder
+        # får hver sin plass i køen uten å holde låsen.
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.tokens -= 1.0
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+_lock = threading.Lock()
+_session: requests.Session | None = None
+_buckets: dict[str, TokenBucket | None] = {}
+_cache: ResponseCache | None = None
+# record/replay (se replay.py): omskriving av URL før kallet og tap av svaret etter
+_redirect: Callable[[str], str] | None = None
+_tap: Callable[[str, str, "requests.Response"], None] | None = None
+
+def set_replay(redirect: Callable[[str], str] | None = None,
+               tap: Callable[[str, str, "requests.Response"], None] | None = None):
+    global _redirect, _tap
+    _redirect, _tap = redirect, tap
+
+def session() -> requests.Session:
+    global _session
+    with _lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=0)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            s.headers.update(DEFAULT_HEADERS)
+            _session = s
+        return _session
+
+def cache() -> ResponseCache:
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = ResponseCache(HTTP_CACHE_DIR, HTTP_CACHE_TTL, HTTP_CACHE_MAX_BYTES)
+        return _cache
+
+def _bucket(host: str) -> TokenBucket | None:
+    with _lock:
+        if host not in _buckets:
+            spec = HOST_RATES.get(host)
+            _buckets[host] = TokenBucket(*spec) if spec else None
+        return _buckets[host]
+
+def _retry_after(r: requests.Response) -> float | None:
+    v = r.headers.get("Retry-After")
+    try:
+        return max(0.0, float(v)) if v is not None else None
+    except ValueError:
+        return None
+
+def _backoff(attempt: int) -> float:
+    # "full jitter": tilfeldig mellom 0 og eksponentielt tak
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+def _can_wait(secs: float) -> bool:
+    left = deadline_left()
+    return left is None or left > secs
+
+def request(method: str, url: str, *, retries: int = 3, timeout: float = 30, **kw) -> requests.Response:
+    """Som requests.request, men via delt session, rate limit per host og retry.
+    Returnerer siste respons (også ved feilstatus); kaster kun ved nettverksfeil."""
+    from requests import ConnectionError, Timeout
+    orig = url
+    if _redirect:
+        url = _redirect(url)
+    host = urlsplit(url).hostname or ""
+    bucket = _bucket(host)
+    attempt = 0
+    while True:
+        if bucket:
+            bucket.acquire()
+        metrics.inc("http_requests", host)
+        try:
+            r = session().request(method, url, timeout=timeout, **kw)
+        except (ConnectionError, Timeout):
+            metrics.inc("http_errors", host)
+            wait = _backoff(attempt)
+            if attempt >= retries or not _can_wait(wait):
+                raise
+        else:
+            metrics.inc("http_bytes", host, len(r.content))
+            if r.status_code not in RETRY_STATUS:
+                if _tap:
+                    _tap(method, orig, r)
+                return r
+            wait = _retry_after(r)
+            wait = _backoff(attempt) if wait is None else wait
+            if attempt >= retries or not _can_wait(wait):
+                metrics.inc("http_errors", host)
+                return r
+        metrics.inc("http_retries", host)
+        attempt += 1
+        time.sleep(wait)
+
+def _from_cache(url: str, meta: dict) -> requests.Response:
+    from requests import Response
+    r = Response()
+    r.status_code = 200
+    r.url = url
+    r._content = cache().body(url)
+    r.headers["Content-Type"] = meta.get("content_type") or ""
+    r.from_cache = True
+    return r
+
+def get(url: str, *, cached: bool = False, headers: dict | None = None, **kw) -> requests.Response:
+    """GET. Med cached=True sendes If-None-Match/If-Modified-Since fra disk-cachen,
+    og en 304 besvares med den lagrede kroppen (r.from_cache = True)."""
+    if not cached:
+        return request("GET", url, headers=headers, **kw)
+    c = cache()
+    meta = c.lookup(url)
+    hdrs = dict(headers or {})
+    if meta:
+        hdrs.update(c.validators(meta))
+    r = request("GET", url, headers=hdrs, **kw)
+    if r.status_code == 304 and meta:
+        metrics.inc("http_cache_hits", urlsplit(url).hostname or "")
+        c.touch(url)
+        return _from_cache(url, meta)
+    r.from_cache = False
+    if r.status_code == 200:
+        c.store(url, r.headers, r.content)
+    return r
+
+def post(url: str, **kw) -> requests.Response:
+    return request("POST", url, **kw)
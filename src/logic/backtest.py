@@ -0,0 +1,258 @@
+# src/logic/backtest.py
+# Vektorisert backtest av trendreglene (score_matrix: UP/WATCH/DOWN) og
+# pris-signalene (PRICE_SPIKE/DIP) over hele kurslageret på én gang.
+# Indikatorene regnes for alle tickers × alle dager som matriser – løkkene
+# går bare over bars i et vindu (25), aldri over dager eller tickers.
+#
+#   python -m src.logic.backtest [--tickers A,B] [--start 20200101] [--horizons 1,5,20]
+#                               [--sweep up=1,2,3 --sweep spike=10,15] [--workers 4] [--json FIL]
+
+from __future__ import annotations
+import argparse, itertools, json, os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict, replace
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.config import PRICE_STORE_DIR, TICKERS
+from src.logic.indicators import ema, rsi, rsi_trailing, bearish_divergence
+from src.store.prices import PriceStore
+
+STATUS = {1: "UP", 0: "WATCH", -1: "DOWN"}
+
+@dataclass(frozen=True)
+class Params:
+    """Standardverdiene er reglene slik de kjører i score_matrix/_score_price."""
+    ema_fast: int = 5
+    ema_slow: int = 20
+    rsi_period: int = 14
+    window: int = 25            # bars per vurdering (score_matrix bruker siste 25)
+    up: int = 2                 # score ≥ up → UP
+    down: int = -2              # score ≤ down → DOWN
+    rsi_hot: float = 80
+    rsi_high: float = 70
+    rsi_ok: float = 50
+    vol_mult: float = 1.5       # rød dag med volum > vol_mult × snitt20 → distribusjon
+    spike: float = 15.0         # dagsendring i % for PRICE_SPIKE
+    dip: float = -15.0          # og for PRICE_DIP
+
+@dataclass
+class Panel:
+    tickers: List[str]
+    dates: np.ndarray           # T datoer (YYYYMMDD), union over tickers
+    close: np.ndarray           # tickers × T, NaN der tickeren mangler bar
+    open: np.ndarray
+    volume: np.ndarray
+
+def load_panel(store: PriceStore, tickers: Sequence[str], start: int | None = None,
+               end: int | None = None) -> Panel:
+    """Leser kurslageret (memmap) inn i tickers × dager-matriser på felles datoakse."""
+    bars = {t: store.bars(t) for t in tickers}
+    bars = {t: b[(b["date"] >= (start or 0)) & (b["date"] <= (end or 99999999))] for t, b in bars.items()}
+    names = [t for t in tickers if len(bars[t])]
+    dates = np.unique(np.concatenate([bars[t]["date"] for t in names])) if names else np.zeros(0, dtype=np.int32)
+    mats = {c: np.full((len(names), len(dates)), np.nan) for c in ("close", "open", "volume")}
+    for i, t in enumerate(names):
+        idx = np.searchsorted(dates, bars[t]["date"])
+        for c in mats:
+            mats[c][i, idx] = bars[t][c]
+    return Panel(names, dates, mats["close"], mats["open"], mats["volume"])
+
+# ---------- indikatorer per dag ----------
+
+def _rolling_last(fn, x: np.ndarray, w: int, block: int = 512) -> np.ndarray:
+    """fn(vindu)[..., -1] for vinduet på w bars som slutter i hver bar (NaN
+    før første fulle vindu). Vinduene er views; blokker holder minnet nede."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] < w:
+        return out
+    win = sliding_window_view(x, w, axis=-1)          # tickers × (T-w+1) × w
+    for s in range(0, win.shape[1], block):
+        chunk = win[:, s:s + block]
+        out[:, w - 1 + s:w - 1 + s + chunk.shape[1]] = fn(chunk)[..., -1]
+    return out
+
+def features(panel: Panel, p: Params = Params()) -> Dict[str, np.ndarray]:
+    """Alle mellomledd i score_matrix, for hver ticker og hver dag. Avhenger
+    bare av spenn/periode/vindu, så et parametersveip over tersklene gjenbruker dem."""
+    c, w = panel.close, p.window
+    ema_f = _rolling_last(lambda v: ema(v, p.ema_fast), c, w)
+    ema_s = _rolling_last(lambda v: ema(v, p.ema_slow), c, w)
+    rsi_w = _rolling_last(lambda v: rsi(v, p.rsi_period), c, w)
+    prev = _rolling_last(lambda v: ema(v, p.ema_fast), c, p.ema_fast + 1)
+    ema_f_prev = np.full(c.shape, np.nan)
+    ema_f_prev[:, 1:] = prev[:, :-1]
+    vwin = sliding_window_view(panel.volume, 20, axis=-1) if c.shape[-1] >= 20 else None
+    vol_avg = np.full(c.shape, np.nan)
+    if vwin is not None:
+        cnt = np.sum(~np.isnan(vwin), axis=-1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            vol_avg[:, 19:] = np.where(cnt > 0, np.nansum(vwin, axis=-1) / cnt, np.nan)
+    return {
+        "ema_fast": ema_f, "ema_slow": ema_s, "ema_fast_prev": ema_f_prev, "rsi": rsi_w,
+        "vol_avg": vol_avg,
+        "divergence": bearish_divergence(c, rsi_trailing(c, p.rsi_period, w)),
+        "bars": np.cumsum(~np.isnan(c), axis=-1),
+    }
+
+def classify(panel: Panel, feat: Dict[str, np.ndarray], p: Params = Params()):
+    """(score, status, gyldig) per ticker × dag; status 1/0/-1 = UP/WATCH/DOWN."""
+    r = feat["rsi"]
+    with np.errstate(invalid="ignore"):
+        score = np.where(feat["ema_fast"] > feat["ema_slow"], 2, -2)
+        score += np.where(feat["ema_fast"] > feat["ema_fast_prev"], 1, -1)
+        score += np.select([r >= p.rsi_hot, r >= p.rsi_high, r >= p.rsi_ok], [-2, -1, 1], 0)
+        avg = feat["vol_avg"]
+        red = (panel.close < panel.open) & (panel.volume > p.vol_mult * np.where(avg > 0, avg, 1))
+    score -= 2 * red + 2 * feat["divergence"]
+    status = np.where(score >= p.up, 1, np.where(score <= p.down, -1, 0)).astype(np.int8)
+    valid = (feat["bars"] >= p.window) & ~np.isnan(panel.close)
+    return score.astype(np.int16), status, valid
+
+def price_signals(panel: Panel, p: Params = Params()):
+    """(spike, dip)-masker fra dagsendring i % (close mot forrige close)."""
+    c = panel.close
+    change = np.full(c.shape, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        change[:, 1:] = (c[:, 1:] - c[:, :-1]) / c[:, :-1] * 100.0
+        return change >= p.spike, change <= p.dip
+
+def forward_returns(close: np.ndarray, h: int) -> np.ndarray:
+    """Avkastning fra close i dag til close om h bars (NaN mot slutten)."""
+    out = np.full(close.shape, np.nan)
+    if close.shape[-1] > h:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[:, :-h] = close[:, h:] / close[:, :-h] - 1.0
+    return out
+
+def _stats(mask: np.ndarray, fwd: Dict[int, np.ndarray]) -> dict:
+    out = {"n": int(mask.sum()), "fwd": {}}
+    for h, f in fwd.items():
+        x = f[mask & ~np.isnan(f)]
+        out["fwd"][str(h)] = {"n": int(x.size),
+                              "mean": round(float(x.mean()), 5) if x.size else None,
+                              "hit": round(float((x > 0).mean()), 4) if x.size else None}
+    return out
+
+def evaluate(panel: Panel, p: Params = Params(), horizons: Iterable[int] = (1, 5, 20),
+             feat: Dict[str, np.ndarray] | None = None) -> dict:
+    feat = feat if feat is not None else features(panel, p)
+    fwd = {h: forward_returns(panel.close, h) for h in horizons}
+    _, status, valid = classify(panel, feat, p)
+    spike, dip = price_signals(panel, p)
+    return {
+        "params": asdict(p),
+        "tickers": len(panel.tickers),
+        "days": int(panel.dates.size),
+        "baseline": _stats(valid, fwd),
+        "classes": {name: _stats(valid & (status == v), fwd) for v, name in STATUS.items()},
+        "signals": {"PRICE_SPIKE": _stats(spike, fwd), "PRICE_DIP": _stats(dip, fwd)},
+    }
+
+def spread(report: dict, horizon: int) -> float:
+    """UP-snitt minus DOWN-snitt for horisonten: grovt mål på om reglene skiller."""
+    up = report["classes"]["UP"]["fwd"][str(horizon)]["mean"]
+    down = report["classes"]["DOWN"]["fwd"][str(horizon)]["mean"]
+    return (up - down) if up is not None and down is not None else float("-inf")
+
+# ---------- parametersveip over en prosesspool ----------
+
+_W: dict = {}       # per arbeiderprosess: panel, horisonter og features per (spenn, periode, vindu)
+
+def _init_worker(root: str, tickers: List[str], start, end, horizons):
+    _W.clear()
+    _W.update(panel=load_panel(PriceStore(root), tickers, start, end), horizons=tuple(horizons), feats={})
+
+def _feature_key(p: Params):
+    return (p.ema_fast, p.ema_slow, p.rsi_period, p.window)
+
+def _run_one(p: Params) -> dict:
+    key = _feature_key(p)
+    if key not in _W["feats"]:
+        _W["feats"][key] = features(_W["panel"], p)
+    return evaluate(_W["panel"], p, _W["horizons"], _W["feats"][key])
+
+def grid(base: Params = Params(), **values: Sequence) -> List[Params]:
+    """Kartesisk produkt: grid(up=[1,2], spike=[10,15]) → 4 Params."""
+    keys = list(values)
+    return [replace(base, **dict(zip(keys, combo))) for combo in itertools.product(*(values[k] for k in keys))]
+
+def sweep(params: List[Params], tickers: Sequence[str] = TICKERS, root: str = PRICE_STORE_DIR,
+          start: int | None = None, end: int | None = None, horizons: Iterable[int] = (1, 5, 20),
+          workers: int | None = None) -> List[dict]:
+    """Evaluerer alle parametersettene parallelt. Hver prosess leser kurslageret
+    selv (memmap) og gjenbruker features mellom sett med samme spenn."""
+    # sett med samme spenn samles, så hver prosess sjelden regner features på nytt
+    params = sorted(params, key=_feature_key)
+    workers = workers or min(len(params), os.cpu_count() or 1)
+    initargs = (root, list(tickers), start, end, tuple(horizons))
+    if workers <= 1:
+        _init_worker(*initargs)
+        return [_run_one(p) for p in params]
+    chunk = max(1, len(params) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+        return list(pool.map(_run_one, params, chunksize=chunk))
+
+# ---------- CLI ----------
+
+def _parse_sweep(specs: List[str]) -> Dict[str, list]:
+    fields = Params.__dataclass_fields__
+    out = {}
+    for spec in specs:
+        k, _, vals = spec.partition("=")
+        if k not in fields:
+            raise SystemExit(f"ukjent parameter: {k} (gyldige: {', '.join(fields)})")
+        cast = int if fields[k].type in ("int", int) else float
+        out[k] = [cast(v) for v in vals.split(",") if v]
+    return out
+
+def _print_report(r: dict, horizons):
+    hs = " ".join(f"{'+' + str(h) + 'd':>16}" for h in horizons)
+    print(f"{'':<12} {'n':>8} {hs}")
+    rows = [("alle", r["baseline"])] + list(r["classes"].items()) + list(r["signals"].items())
+    for name, s in rows:
+        cells = []
+        for h in horizons:
+            f = s["fwd"][str(h)]
+            cells.append(f"{f['mean'] * 100:>+7.2f}% {f['hit'] * 100:>5.1f}%" if f["mean"] is not None else f"{'–':>16}")
+        print(f"{name:<12} {s['n']:>8} " + " ".join(f"{c:>16}" for c in cells))
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m src.logic.backtest",
+                                 description="Backtest av trend- og prisreglene over kurslageret.")
+    ap.add_argument("--tickers", default=",".join(TICKERS))
+    ap.add_argument("--store", default=PRICE_STORE_DIR)
+    ap.add_argument("--start", type=int, default=None, help="YYYYMMDD")
+    ap.add_argument("--end", type=int, default=None, help="YYYYMMDD")
+    ap.add_argument("--horizons", default="1,5,20")
+    ap.add_argument("--sweep", action="append", default=[], metavar="PARAM=V1,V2",
+                    help="parameter å sveipe (kan gjentas)")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--json", default="", help="skriv alle rapportene hit")
+    args = ap.parse_args(argv)
+    tickers = [t.strip().upper() for t in args.tickers.split(",") if t.strip()]
+    horizons = [int(h) for h in args.horizons.split(",") if h]
+
+    params = grid(**_parse_sweep(args.sweep)) if args.sweep else [Params()]
+    reports = sweep(params, tickers, args.store, args.start, args.end, horizons, args.workers)
+    if not reports or not reports[0]["days"]:
+        print(f"[backtest] ingen bars i {args.store} for {', '.join(tickers)}")
+        return
+    rank_h = 5 if 5 in horizons else horizons[-1]
+    reports.sort(key=lambda r: -spread(r, rank_h))
+    print(f"[backtest] {reports[0]['tickers']} tickers × {reports[0]['days']} dager • {len(reports)} parametersett")
+    default = asdict(Params())
+    for r in reports[:5 if len(reports) > 1 else 1]:
+        changed = {k: v for k, v in r["params"].items() if v != default[k]}
+        print(f"\n[{', '.join(f'{k}={v}' for k, v in changed.items()) or 'standard'}] "
+              f"spredning UP–DOWN +{rank_h}d: {spread(r, rank_h) * 100:+.2f}%  (snitt, treffrate)")
+        _print_report(r, horizons)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=1)
+        print(f"\n[backtest] skrev {args.json}")
+
+if __name__ == "__main__":
+    main()
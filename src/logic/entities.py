@@ -0,0 +1,60 @@
+# src/logic/entities.py
+# Entitetsindeks: slår opp selskapsnavn, aliaser og ticker-symboler i titler og
+# sammendrag og gir tilhørende tickers, slik at nyheter, patenter og arXiv kan
+# aggregeres per ticker sammen med SEC og priser.
+
+from __future__ import annotations
+import hashlib
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+from src.logic.matcher import Matcher
+
+MEMO_MAX = 20000
+
+class EntityIndex:
+    """`extra` er flere kategorier (f.eks. sentiment og tema) som bygges inn i
+    samme automat, så scan() gir alle treffene for en tekst i ett pass."""
+    def __init__(self, tickers: Iterable[str], companies: Iterable[str],
+                 aliases: Mapping[str, Iterable[str]], cik: Mapping[str, str],
+                 extra: Mapping[str, Iterable[str]] | None = None):
+        ticker_terms: Dict[str, str] = {}
+        for t in tickers:
+            ticker_terms[t] = t
+        for t, names in aliases.items():
+            for name in names:
+                ticker_terms[name] = t
+        known = {n.lower() for n in ticker_terms}
+        # Selskaper uten børsnotering rapporteres som navn uten ticker
+        private = {c: c for c in companies if c.lower() not in known}
+        self.matcher = Matcher({**(extra or {}), "ticker": ticker_terms, "company": private})
+        self.by_cik = {str(c).lstrip("0"): t for t, c in cik.items()}
+        self._memo: Dict[bytes, Dict[str, Tuple[str, ...]]] = {}
+
+    def scan(self, text: str) -> Dict[str, Tuple[str, ...]]:
+        """Alle treff per kategori, memoisert på tekst-hash: scoreren og
+        ticker-oppslaget for samme tekst deler ett pass."""
+        key = hashlib.blake2b((text or "").encode("utf-8"), digest_size=16).digest()
+        hit = self._memo.get(key)
+        if hit is None:
+            hit = {c: tuple(v) for c, v in self.matcher.scan(text).items()}
+            if len(self._memo) >= MEMO_MAX:
+                self._memo.clear()
+            self._memo[key] = hit
+        return hit
+
+    def resolve(self, text: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """(tickers, unoterte selskaper) nevnt i teksten."""
+        hit = self.scan(text)
+        return hit["ticker"], hit["company"]
+
+    def tickers_for(self, item: dict) -> List[str]:
+        """Tickers for et item: eksplisitt ticker/CIK først, ellers fra tittel +
+        sammendrag, ellers fra nøkkelordet/spørringen treffet ble knyttet til."""
+        if item.get("ticker"):
+            return [item["ticker"]]
+        if item.get("cik") and str(item["cik"]).lstrip("0") in self.by_cik:
+            return [self.by_cik[str(item["cik"]).lstrip("0")]]
+        text = " ".join(filter(None, (item.get("title"), item.get("summary"))))
+        found = list(self.resolve(text)[0]) if text else []
+        term = item.get("keyword") or item.get("query")
+        return found or (list(self.resolve(term)[0]) if term else [])
@@ -0,0 +1,191 @@
+# src/logic/indicators.py
+# Felles indikatorer som NumPy-operasjoner på hele serier.
+# Alle funksjoner tar 1-D (bars) eller 2-D (tickers × bars) og regner langs
+# siste akse. Rader med kortere historikk venstrepaddes med NaN (se align),
+# så et helt univers beregnes i én batch.
+
+from __future__ import annotations
+from dataclasses import dataclass, field, asdict
+from typing import Sequence
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def align(series: Sequence[Sequence[float]], n: int | None = None) -> np.ndarray:
+    """Stabler serier til en tickers × n-matrise, høyrejustert og NaN-paddet."""
+    n = n or max((len(s) for s in series), default=0)
+    out = np.full((len(series), n), np.nan)
+    for i, s in enumerate(series):
+        s = np.asarray(s, dtype=float)[-n:]
+        if len(s):
+            out[i, n - len(s):] = s
+    return out
+
+def ema(x, span: int) -> np.ndarray:
+    """EMA seedet med første gyldige verdi. Løkka går over bars, men hvert steg
+    er vektorisert over alle tickers."""
+    x = np.asarray(x, dtype=float)
+    k = 2.0 / (span + 1.0)
+    out = np.empty_like(x)
+    e = np.full(x.shape[:-1], np.nan)
+    for t in range(x.shape[-1]):
+        v = x[..., t]
+        e = np.where(np.isnan(e), v, np.where(np.isnan(v), e, e + k * (v - e)))
+        out[..., t] = e
+    return out
+
+def rsi(x, period: int = 14) -> np.ndarray:
+    """Wilder RSI for hver bar (NaN til vi har `period` endringer)."""
+    x = np.asarray(x, dtype=float)
+    d = np.diff(x, axis=-1)
+    gain, loss = np.clip(d, 0, None), np.clip(-d, 0, None)
+    shape = x.shape[:-1]
+    out = np.full(x.shape, np.nan)
+    n = np.zeros(shape, dtype=int)              # antall gyldige endringer så langt
+    avg_g, avg_l = np.zeros(shape), np.zeros(shape)
+    for t in range(d.shape[-1]):
+        g, l = gain[..., t], loss[..., t]
+        ok = ~np.isnan(g)
+        n = n + ok
+        seeding = ok & (n <= period)
+        avg_g = np.where(seeding, avg_g + np.where(ok, g, 0) / period, avg_g)
+        avg_l = np.where(seeding, avg_l + np.where(ok, l, 0) / period, avg_l)
+        wilder = ok & (n > period)
+        avg_g = np.where(wilder, (avg_g * (period - 1) + np.where(ok, g, 0)) / period, avg_g)
+        avg_l = np.where(wilder, (avg_l * (period - 1) + np.where(ok, l, 0)) / period, avg_l)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.where(avg_l > 0, 100 - 100 / (1 + avg_g / avg_l), 100.0)
+        out[..., t + 1] = np.where(n >= period, r, np.nan)
+    return out
+
+def rsi_trailing(x, period: int = 14, lookback: int = 25, block: int = 512) -> np.ndarray:
+    """RSI for hver bar regnet over bare de siste `lookback` bars, seedet på
+    nytt i hvert vindu (slik divergens-sjekken alltid har gjort). Før første
+    fulle vindu er det hele historikken så langt. Vinduene er views og tas i
+    blokker, så minnet holdes nede også for lange serier."""
+    x = np.asarray(x, dtype=float)
+    if x.shape[-1] <= lookback:
+        return rsi(x, period)
+    out = np.full(x.shape, np.nan)
+    out[..., :lookback] = rsi(x[..., :lookback], period)
+    win = sliding_window_view(x, lookback, axis=-1)       # ... × (T-lookback+1) × lookback
+    for s in range(1, win.shape[-2], block):
+        chunk = win[..., s:s + block, :]
+        out[..., lookback - 1 + s:lookback - 1 + s + chunk.shape[-2]] = rsi(chunk, period)[..., -1]
+    return out
+
+def rolling_mean(x, n: int) -> np.ndarray:
+    """Glidende snitt over n bars via kumulativ sum (NaN før første fulle vindu)."""
+    x = np.asarray(x, dtype=float)
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] < n:
+        return out
+    c = np.cumsum(np.nan_to_num(x), axis=-1)
+    c = np.concatenate([np.zeros(x.shape[:-1] + (1,)), c], axis=-1)
+    valid = np.cumsum(~np.isnan(x), axis=-1)
+    valid = np.concatenate([np.zeros(x.shape[:-1] + (1,), dtype=int), valid], axis=-1)
+    full = (valid[..., n:] - valid[..., :-n]) == n
+    out[..., n - 1:] = np.where(full, (c[..., n:] - c[..., :-n]) / n, np.nan)
+    return out
+
+def last_mean(x, n: int) -> np.ndarray:
+    """Snitt av de siste (inntil) n gyldige verdiene per rad."""
+    x = np.asarray(x, dtype=float)[..., -n:]
+    cnt = np.sum(~np.isnan(x), axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(cnt > 0, np.nansum(x, axis=-1) / cnt, np.nan)
+
+def bearish_divergence(closes, rsis, window: int = 20) -> np.ndarray:
+    """Higher high i pris, lower high i RSI innen `window` bars, for hver bar.
+    Toppene er maks i første og andre halvdel av vinduet."""
+    c = np.asarray(closes, dtype=float)
+    r = np.asarray(rsis, dtype=float)
+    out = np.zeros(c.shape, dtype=bool)
+    if c.shape[-1] < window:
+        return out
+    half = window // 2
+    cw = sliding_window_view(np.where(np.isnan(c), -np.inf, c), window, axis=-1)
+    rw = sliding_window_view(r, window, axis=-1)
+    i1 = np.argmax(cw[..., :half], axis=-1)[..., None]
+    i2 = half + np.argmax(cw[..., half:], axis=-1)[..., None]
+    p1, p2 = np.take_along_axis(cw, i1, -1)[..., 0], np.take_along_axis(cw, i2, -1)[..., 0]
+    r1, r2 = np.take_along_axis(rw, i1, -1)[..., 0], np.take_along_axis(rw, i2, -1)[..., 0]
+    with np.errstate(invalid="ignore"):
+        div = (p2 > p1 * 0.995) & (r2 < r1 - 2) & np.isfinite(p1)
+    out[..., window - 1:] = div
+    return out
+
+# ---------- online (inkrementell) tilstand ----------
+# EMA og Wilder RSI er rekursive: med siste verdier lagret koster hver ny bar
+# O(1), uansett hvor lang historikken er. Siste bar holdes som "pending" og
+# legges først inn i tilstanden når en nyere bar kommer, fordi dagens bar kan
+# bli oppdatert senere samme dag.
+
+@dataclass
+class _Folded:
+    date: int = 0                 # siste bar lagt inn (YYYYMMDD)
+    bars: int = 0
+    close: float | None = None
+    ema5: float | None = None
+    ema20: float | None = None
+    changes: int = 0
+    avg_gain: float = 0.0
+    avg_loss: float = 0.0
+    vols: list = field(default_factory=list)
+
+    def step(self, date: int, close: float, volume: float, period: int = 14):
+        if self.close is not None:
+            d = close - self.close
+            g, l = max(d, 0.0), max(-d, 0.0)
+            self.changes += 1
+            if self.changes <= period:
+                self.avg_gain += g / period
+                self.avg_loss += l / period
+            else:
+                self.avg_gain = (self.avg_gain * (period - 1) + g) / period
+                self.avg_loss = (self.avg_loss * (period - 1) + l) / period
+        self.ema5 = close if self.ema5 is None else self.ema5 + (2 / 6) * (close - self.ema5)
+        self.ema20 = close if self.ema20 is None else self.ema20 + (2 / 21) * (close - self.ema20)
+        if volume == volume:  # hopp over NaN
+            self.vols = (self.vols + [volume])[-20:]
+        self.close, self.date, self.bars = close, date, self.bars + 1
+
+@dataclass
+class OnlineIndicators:
+    base: _Folded = field(default_factory=_Folded)
+    pending: list | None = None   # [date, close, volume] for siste bar
+
+    def update(self, dates, closes, volumes) -> int:
+        """Legger inn bars nyere enn det som allerede er sett. Returnerer antall brukt."""
+        used = 0
+        for d, c, v in zip(dates, closes, volumes):
+            d = int(d)
+            if d <= self.base.date or c != c:
+                continue
+            if self.pending and d > self.pending[0]:
+                self.base.step(*self.pending)
+            if not self.pending or d >= self.pending[0]:
+                self.pending = [d, float(c), float(v)]
+                used += 1
+        return used
+
+    @property
+    def last_date(self) -> int:
+        return self.pending[0] if self.pending else self.base.date
+
+    def values(self) -> dict:
+        s = _Folded(**{**asdict(self.base), "vols": list(self.base.vols)})
+        if self.pending:
+            s.step(*self.pending)
+        rsi14 = None
+        if s.changes >= 14:
+            rsi14 = 100 - 100 / (1 + s.avg_gain / s.avg_loss) if s.avg_loss > 0 else 100.0
+        vol_avg20 = sum(s.vols) / len(s.vols) if s.vols else None
+        return {"bars": s.bars, "close": s.close, "ema5": s.ema5, "ema20": s.ema20,
+                "rsi": rsi14, "vol_avg20": vol_avg20, "date": s.date}
+
+    def to_dict(self) -> dict:
+        return {"base": asdict(self.base), "pending": self.pending}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "OnlineIndicators":
+        return cls(base=_Folded(**(d.get("base") or {})), pending=d.get("pending"))
@@ -0,0 +1,79 @@
+# src/logic/matcher.py
+# Aho-Corasick-automat for mange nøkkelord samtidig. Bygges én gang, og hver
+# tekst skannes i ett pass uansett hvor mange termer leksikonet har.
+#
+# Termer matches som hele ord (ordgrense på begge sider). En term som slutter
+# på "*" er et prefiks: "superconduct*" treffer også "superconducting".
+
+from __future__ import annotations
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum()
+
+class Matcher:
+    def __init__(self, lexicon: Mapping[str, Iterable[str] | Mapping[str, str]]):
+        """lexicon: kategori → termer, eller kategori → {term: verdi}.
+        Verdien er det som rapporteres ved treff (default: termen selv)."""
+        self.categories = list(lexicon)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # per node: (kategori, verdi, lengde, prefiks?)
+        self._out: List[List[Tuple[str, str, int, bool]]] = [[]]
+        for cat, terms in lexicon.items():
+            items = terms.items() if isinstance(terms, Mapping) else ((t, t.rstrip("*")) for t in terms)
+            for term, value in items:
+                self._add(cat, term, value)
+        self._build()
+
+    def _add(self, cat: str, term: str, value: str):
+        prefix = term.endswith("*")
+        key = term.rstrip("*").lower()
+        if not key:
+            return
+        node = 0
+        for ch in key:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({}); self._fail.append(0); self._out.append([])
+            node = nxt
+        self._out[node].append((cat, value, len(key), prefix))
+
+    def _build(self):
+        q = deque(self._goto[0].values())
+        while q:
+            node = q.popleft()
+            for ch, nxt in self._goto[node].items():
+                q.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text: str) -> Dict[str, List[str]]:
+        """Alle treff per kategori (unike verdier, i rekkefølgen de dukket opp)."""
+        hits: Dict[str, List[str]] = {c: [] for c in self.categories}
+        t = (text or "").lower()
+        n = len(t)
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(t):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            for cat, value, length, prefix in out[node]:
+                start = i - length + 1
+                if start > 0 and _is_word(t[start - 1]):
+                    continue
+                if not prefix and i + 1 < n and _is_word(t[i + 1]):
+                    continue
+                if value not in hits[cat]:
+                    hits[cat].append(value)
+        return hits
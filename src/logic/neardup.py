@@ -0,0 +1,134 @@
+# src/logic/neardup.py
+# Nær-duplikater (samme sak fra mange domener, samme paper fra flere søk):
+# MinHash-signaturer av tegn-shingles + LSH-bånd i SQLite. Hvert item koster
+# et fast antall båndoppslag, så totalen er ~lineær i antall items, og
+# klyngene lever videre mellom kjøringene.
+
+from __future__ import annotations
+import hashlib, re, time, zlib
+from random import Random
+from typing import Dict, Iterable, List
+import numpy as np
+
+from src.store.db import connect
+
+NUM_PERM = 64
+BANDS, ROWS = 16, 4            # terskel ≈ (1/16)^(1/4) ≈ 0.5
+THRESHOLD = 0.6                # estimert Jaccard for å regnes som samme sak
+SHINGLE = 5
+_P = np.uint64(4294967311)     # primtall > 2^32
+_rng = Random(1337)            # faste frø: signaturer må være like mellom kjøringer
+_A = np.array([_rng.randrange(1, 2**31) for _ in range(NUM_PERM)], dtype=np.uint64)[:, None]
+_B = np.array([_rng.randrange(0, 2**31) for _ in range(NUM_PERM)], dtype=np.uint64)[:, None]
+
+_norm_re = re.compile(r"[^0-9a-z]+")
+
+def normalize(text: str) -> str:
+    return _norm_re.sub(" ", (text or "").lower()).strip()
+
+def signature(text: str) -> np.ndarray | None:
+    t = normalize(text)
+    if not t:
+        return None
+    grams = {t[i:i + SHINGLE] for i in range(max(1, len(t) - SHINGLE + 1))}
+    x = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+    return ((_A * x[None, :] + _B) % _P).min(axis=1)
+
+def _band_keys(sig: np.ndarray) -> List[bytes]:
+    return [hashlib.blake2b(sig[b * ROWS:(b + 1) * ROWS].tobytes(), digest_size=8).digest()
+            for b in range(BANDS)]
+
+class NearDupIndex:
+    def __init__(self, path: str, ttl: float, commit_every: int = 200):
+        self.ttl = ttl
+        self.commit_every = commit_every
+        self.pending = 0                 # keep()-kall siden siste commit
+        self.conn = connect(path)        # shards og kildene deler databasen
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS lsh_clusters (
+                id TEXT PRIMARY KEY, sig BLOB NOT NULL, ts INTEGER NOT NULL, hits INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS lsh_bands (
+                band INTEGER NOT NULL, key BLOB NOT NULL, cluster TEXT NOT NULL,
+                PRIMARY KEY (band, key, cluster)) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS lsh_clusters_ts ON lsh_clusters(ts);
+        """)
+
+    def _match(self, sig: np.ndarray, keys: List[bytes]) -> str | None:
+        cands = set()
+        for b, k in enumerate(keys):
+            cands.update(c for (c,) in self.conn.execute(
+                "SELECT cluster FROM lsh_bands WHERE band = ? AND key = ?", (b, k)))
+        best, best_j = None, THRESHOLD
+        for cid in cands:
+            row = self.conn.execute("SELECT sig FROM lsh_clusters WHERE id = ?", (cid,)).fetchone()
+            if row is None:
+                continue
+            j = float(np.mean(np.frombuffer(row[0], dtype=np.uint64) == sig))
+            if j >= best_j:
+                best, best_j = cid, j
+        return best
+
+    def assign(self, text: str, now: int | None = None) -> tuple[str | None, bool]:
+        """(klynge-ID, ny klynge?) for teksten. Tom tekst gir (None, True)."""
+        sig = signature(text)
+        if sig is None:
+            return None, True
+        now = int(now or time.time())
+        keys = _band_keys(sig)
+        cid = self._match(sig, keys)
+        if cid is not None:
+            self.conn.execute("UPDATE lsh_clusters SET ts = ?, hits = hits + 1 WHERE id = ?", (now, cid))
+            return cid, False
+        cid = hashlib.blake2b(normalize(text).encode("utf-8"), digest_size=8).hexdigest()
+        self.conn.execute("INSERT OR REPLACE INTO lsh_clusters (id, sig, ts, hits) VALUES (?, ?, ?, 1)",
+                          (cid, sig.tobytes(), now))
+        self.conn.executemany("INSERT OR IGNORE INTO lsh_bands (band, key, cluster) VALUES (?, ?, ?)",
+                              [(b, k, cid) for b, k in enumerate(keys)])
+        return cid, True
+
+    def keep(self, it: dict, text_key: str = "title", now: int | None = None) -> dict | None:
+        """Itemet (merket med 'cluster') hvis det er første i klyngen, ellers None.
+        For strømming: antall kopier telles bare i lsh_clusters.hits, og det
+        committes hver `commit_every` item, så skrivelåsen på radar.db aldri
+        holdes gjennom hele strømmen (kalleren kan også committe selv)."""
+        cid, new = self.assign(it.get(text_key, ""), now)
+        self.pending += 1
+        if self.pending >= self.commit_every:
+            self.commit()
+        if cid is None:
+            return it
+        return {**it, "cluster": cid, "dupes": 0} if new else None
+
+    def commit(self):
+        self.conn.commit()
+        self.pending = 0
+
+    def filter(self, items: Iterable[dict], text_key: str = "title") -> List[dict]:
+        """Beholder første item per klynge (merket med 'cluster' og 'dupes');
+        kopier i samme kjøring og saker sett i tidligere kjøringer droppes."""
+        kept: List[dict] = []
+        by_cluster: Dict[str, dict] = {}
+        now = int(time.time())
+        with self.conn:
+            for it in items:
+                cid, new = self.assign(it.get(text_key, ""), now)
+                if cid is None:
+                    kept.append(it)
+                elif new:
+                    it = {**it, "cluster": cid, "dupes": 0}
+                    by_cluster[cid] = it
+                    kept.append(it)
+                elif cid in by_cluster:
+                    by_cluster[cid]["dupes"] += 1
+        return kept
+
+    def evict(self, now: int | None = None) -> int:
+        cutoff = int((now or time.time()) - self.ttl)
+        with self.conn:
+            self.conn.execute("DELETE FROM lsh_bands WHERE cluster IN (SELECT id FROM lsh_clusters WHERE ts < ?)",
+                              (cutoff,))
+            return self.conn.execute("DELETE FROM lsh_clusters WHERE ts < ?", (cutoff,)).rowcount
+
+    def close(self):
+        self.commit()
+        self.conn.close()
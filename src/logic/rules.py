@@ -1,125 +1,292 @@
-from datetime import datetime, timedelta
-
-POS = ("beats","partnership","milestone","expands","award","win","funding","contract","approved","record")
-NEG = ("delay","lawsuit","probe","guidance cut","miss","downgrade","terminate","reject","halt")
-
-def _iso(dt):
-    if isinstance(dt, datetime): return dt.isoformat()+"Z"
-    try: return datetime.fromisoformat(str(dt)).isoformat()+"Z"
-    except Exception: return datetime.utcnow().isoformat()+"Z"
-
-def _sent(text: str) -> int:
-    t = (text or "").lower()
-    s = 0
-    s += sum(k in t for k in POS)
-    s -= sum(k in t for k in NEG)
-    return s
-
-def score_items(arxiv, sec, patents, news, prices):
-    signals = []
-    now = datetime.utcnow()
-    week_ago = now - timedelta(days=7)
-
-    # map for price lookup
-    price_map = {p["ticker"]: p for p in prices}
-
-    # ---- SEC (dedup by accession) ----
-    seen_acc = set()
-    for f in sec:
-        acc = f.get("accession") or f.get("accessionNumber")
-        if acc in seen_acc: 
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Tuple
+import time
+
+from src.config import TICKERS
+from src.universe import load_universe
+from src.logic.entities import EntityIndex
+from src.store.seen import signal_id
+
+# Leksikon for matcheren: hele ord, "*" = prefiks (se matcher.py)
+POS = ("beat*","partnership*","milestone*","expand*","award*","win","wins","winning","funding","funded",
+       "contract*","approved","approval","record*")
+NEG = ("delay*","lawsuit*","probe*","guidance cut*","miss","misses","missed","downgrade*","terminat*",
+       "reject*","halt*")
+ARXIV_TERMS = ("fault*","error*","superconduct*","ion","ions","trapped-ion","neutral atom*","photonic*")
+MAJOR_FORMS = frozenset({"10-K","10-Q","8-K","S-1","6-K"})
+
+DAY = 86400
+WEEK = 7 * DAY
+
+# Bitmasker for kryss-boost-indeksen
+_FILING, _SPIKE = 1, 2
+
+@lru_cache(maxsize=4096)
+def _epoch(s: str) -> int | None:
+    """Parser tidsstempel én gang til epoch-sekunder (UTC). Tåler
+    YYYY-MM-DD, ISO med Z/offset og GDELT sitt 20251010T174500Z."""
+    s = (s or "").strip()
+    if not s:
+        return None
+    try:
+        if len(s) == 16 and s[8] == "T" and s.endswith("Z"):
+            dt = datetime.strptime(s, "%Y%m%dT%H%M%SZ")
+        else:
+            dt = datetime.fromisoformat(s[:-1] if s.endswith("Z") else s)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+@lru_cache(maxsize=65536)
+def _iso(epoch: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(epoch))
+
+# Bygges én gang ved import. Selskapsnavn/aliaser/tickers → tickers for
+# kilder uten ticker-felt; sentiment og tema ligger i samme automat, så hver
+# tekst tagges i ett pass. Korte symboler (ON, ALL, A …) kolliderer med vanlige
+# ord i store univers; de tickerne finnes via navn/aliaser i stedet.
+_U = load_universe()
+ENTITIES = EntityIndex([t for t in _U.tickers if len(t) >= 4 or t in TICKERS],
+                       _U.companies, _U.aliases, _U.cik,
+                       extra={"pos": POS, "neg": NEG, "topic": ARXIV_TERMS})
+
+def tag(text: str) -> Dict[str, Tuple[str, ...]]:
+    """Sentiment-, tema-, ticker- og selskapstreff for en tekst (ett pass,
+    delt med ENTITIES.tickers_for for samme tekst)."""
+    return ENTITIES.scan(text)
+
+def _sent(text: str, hits: Dict[str, List[str]] | None = None) -> int:
+    hits = hits if hits is not None else tag(text)
+    return len(hits["pos"]) - len(hits["neg"])
+
+@dataclass(slots=True)
+class Signal:
+    id: str
+    type: str
+    score: int
+    ts: int                          # epoch-sekunder
+    ticker: str | None = None
+    extra: dict = field(default_factory=dict)   # type-spesifikke felt (title, form, ...)
+
+    def to_dict(self) -> dict:
+        d = {"id": self.id, "type": self.type}
+        if self.ticker is not None:
+            d["ticker"] = self.ticker
+        d.update(self.extra)
+        d["score"] = self.score
+        d["ts"] = _iso(self.ts)
+        return d
+
+class _Ctx:
+    __slots__ = ("now", "week_ago", "seen_acc")
+
+    def __init__(self, now: int):
+        self.now = now
+        self.week_ago = now - WEEK
+        self.seen_acc = set()
+
+# ---------- per-kilde scorere: item → Signal | None ----------
+
+def _score_sec(f: dict, c: _Ctx) -> Signal | None:
+    acc = f.get("accession") or f.get("accessionNumber")
+    if acc in c.seen_acc:      # dedup på accession
+        return None
+    c.seen_acc.add(acc)
+    form, filed = f.get("form",""), f.get("filed","")
+    ts = _epoch(filed)
+    base = 6 if form in MAJOR_FORMS else 4
+    # ekstra boost hvis fersk filing (innen 7 dager)
+    score = base + (1 if ts is not None and ts >= c.week_ago else 0)
+    sid = signal_id({"type": "SEC_FILING", "ticker": f.get("ticker"), "form": form, "filed": filed, "accession": acc})
+    return Signal(sid, "SEC_FILING", score,
+                  ts if ts is not None else c.now, f.get("ticker"),
+                  {"form": form, "filed": filed, "accession": acc})
+
+def _score_patent(p: dict, c: _Ctx) -> Signal | None:
+    d = p.get("date") or ""
+    ts = _epoch(d)
+    score = 5 + (1 if ts is not None and ts >= c.week_ago else 0)
+    title = p.get("title","")
+    return Signal(signal_id({"type": "PATENT", "title": title, "date": d}), "PATENT", score,
+                  ts if ts is not None else c.now, p.get("ticker"), {"title": title, "date": d})
+
+def _score_arxiv(a: dict, c: _Ctx) -> Signal | None:
+    title = a.get("title","")
+    score = 3 + (2 if tag(title)["topic"] else 0)
+    pub = a.get("published","")
+    ts = _epoch(pub)
+    return Signal(signal_id({"type": "ARXIV", "link": a.get("link"), "title": title}), "ARXIV", score,
+                  ts if ts is not None else c.now, a.get("ticker"),
+                  {"title": title, "published": pub, "link": a.get("link","")})
+
+def _score_news(n: dict, c: _Ctx) -> Signal | None:
+    title = n.get("title","")
+    s = 3 + max(min(_sent(title), 2), -2)  # clamp [-2,+2]
+    seen = n.get("seendate","")
+    ts = _epoch(seen)
+    return Signal(signal_id({"type": "NEWS", "url": n.get("url"), "title": title}), "NEWS", s,
+                  ts if ts is not None else c.now, n.get("ticker"),
+                  {"title": title, "url": n.get("url",""), "seen": seen})
+
+def _score_price(pr: dict, c: _Ctx) -> Signal | None:
+    ch = pr.get("change_pct", 0) or 0
+    if ch >= 15:
+        typ, score = "PRICE_SPIKE", 8
+    elif ch <= -15:
+        typ, score = "PRICE_DIP", 7
+    else:
+        return None
+    ts = _epoch(pr.get("ts") or "") or c.now
+    t = pr.get("ticker")
+    return Signal(signal_id({"type": typ, "ticker": t, "ts": _iso(ts)}), typ, score, ts, t, {"change_pct": ch})
+
+SCORERS: Dict[str, Callable[[dict, _Ctx], Signal | None]] = {
+    "SEC": _score_sec,
+    "PatentsView": _score_patent,
+    "arXiv": _score_arxiv,
+    "GDELT": _score_news,
+    "Stooq": _score_price,
+}
+
+def _scorer_for(item: dict):
+    fn = SCORERS.get(item.get("source"))
+    if fn is None and "change_pct" in item:   # prisobjekt uten source-felt
+        fn = _score_price
+    return fn
+
+def _score_one(item: dict, c: _Ctx) -> Tuple[Signal | None, List[str], int]:
+    """(signal, tickers, kryss-boost-flagg) for ett item."""
+    fn = _scorer_for(item)
+    sig = fn(item, c) if fn is not None else None
+    if sig is None:
+        return None, [], 0
+    tickers = ENTITIES.tickers_for(item) if sig.ticker is None else [sig.ticker]
+    if tickers and sig.ticker is None:
+        sig.ticker = tickers[0]
+        if len(tickers) > 1:
+            sig.extra["tickers"] = tickers
+    flag = _FILING if sig.type == "SEC_FILING" else _SPIKE if sig.type == "PRICE_SPIKE" else 0
+    return sig, tickers, flag
+
+def score_signals(items: Iterable[dict], now: int | None = None) -> List[Signal]:
+    """Én passering over en blandet strøm av items. Kryss-boost (filing + spike
+    for samme ticker samme uke → +1 på alle ukens signaler for tickeren) bruker
+    en ticker×uke-indeks bygget underveis."""
+    now = int(now or time.time())
+    c = _Ctx(now)
+    signals: List[Signal] = []
+    index: Dict[Tuple[str, int], list] = {}   # (ticker, uke bakover) → [maske, signal-indekser]
+    for item in items:
+        sig, tickers, flag = _score_one(item, c)
+        if sig is None:
             continue
-        seen_acc.add(acc)
-        form = f.get("form","")
-        filed = f.get("filed","")
-        base = 6 if form in {"10-K","10-Q","8-K","S-1","6-K"} else 4
-        # ekstra boost hvis fersk filing (innen 7 dager)
-        try:
-            is_recent = datetime.fromisoformat(filed) >= week_ago
-        except Exception:
-            is_recent = False
-        score = base + (1 if is_recent else 0)
-        signals.append({
-            "type": "SEC_FILING",
-            "ticker": f.get("ticker"),
-            "form": form,
-            "filed": filed,
-            "score": score,
-            "ts": _iso(filed or now),
-        })
-
-    # ---- Patents ----
-    for p in patents:
-        d = p.get("date") or ""
-        score = 5
-        try:
-            if datetime.fromisoformat(d) >= week_ago:
-                score += 1
-        except Exception:
-            pass
-        signals.append({
-            "type": "PATENT",
-            "title": p.get("title",""),
-            "date": d,
-            "score": score,
-            "ts": _iso(d or now),
-        })
-
-    # ---- arXiv ----
-    for a in arxiv:
-        title = a.get("title","")
-        score = 3
-        if any(k in title.lower() for k in ["fault","error","superconduct","ion","neutral atom","photonic"]):
-            score += 2
-        signals.append({
-            "type": "ARXIV",
-            "title": title,
-            "published": a.get("published",""),
-            "link": a.get("link",""),
-            "score": score,
-            "ts": _iso(a.get("published") or now),
-        })
-
-    # ---- News (med enkel sentiment) ----
-    for n in news:
-        title = n.get("title","")
-        s = 3 + max(min(_sent(title), 2), -2)  # clamp [-2,+2]
-        signals.append({
-            "type": "NEWS",
-            "title": title,
-            "url": n.get("url",""),
-            "seen": n.get("seendate",""),
-            "score": s,
-            "ts": _iso(n.get("seendate") or now),
-        })
-
-    # ---- Price spikes/dips ----
-    for pr in prices:
-        ch = pr.get("change_pct", 0) or 0
-        if ch >= 15:
-            signals.append({
-                "type":"PRICE_SPIKE","ticker":pr.get("ticker"),
-                "change_pct":ch,"score":8,"ts":_iso(pr.get("ts") or now)
-            })
-        elif ch <= -15:
-            signals.append({
-                "type":"PRICE_DIP","ticker":pr.get("ticker"),
-                "change_pct":ch,"score":7,"ts":_iso(pr.get("ts") or now)
-            })
+        wk = (now - sig.ts) // WEEK
+        for t in tickers:
+            entry = index.setdefault((t, wk), [0, []])
+            entry[0] |= flag
+            entry[1].append(len(signals))
+        signals.append(sig)
 
     # ---- Kryss-boost: filing + spike samme uke, gi +1 ----
-    recent = [s for s in signals if s.get("ts","") >= week_ago.isoformat()]
-    recent_by_ticker = {}
-    for s in recent:
-        t = s.get("ticker") or "?"
-        recent_by_ticker.setdefault(t, []).append(s)
-    for bucket in recent_by_ticker.values():
-        has_filing = any(s["type"]=="SEC_FILING" for s in bucket)
-        has_spike  = any(s["type"]=="PRICE_SPIKE" for s in bucket)
-        if has_filing and has_spike:
-            for s in bucket:
-                s["score"] += 1
+    boosted = set()
+    for mask, idxs in index.values():
+        if mask == _FILING | _SPIKE:
+            boosted.update(idxs)   # et signal med flere tickers boostes bare én gang
+    for i in boosted:
+        signals[i].score += 1
+        signals[i].extra["boost"] = 1
 
     # sortér nyest først, så score
-    signals.sort(key=lambda x: (x.get("ts",""), x.get("score",0)), reverse=True)
+    signals.sort(key=lambda s: (s.ts, s.score), reverse=True)
     return signals
+
+class StreamScorer:
+    """score_signals som strøm: hvert item gir signalet sitt med én gang
+    (usortert), og kryss-boost-indeksen holder bare en maske per (ticker, uke),
+    så minnet ikke vokser med antall items. Signaler som alt er sendt videre
+    kan ikke boostes her; boost_ranges() sier hvilke tickers/tidsrom som skal
+    ha +1, og lageret legger den på til slutt (SignalStore.boost)."""
+
+    def __init__(self, now: int | None = None):
+        self.now = int(now or time.time())
+        self.ctx = _Ctx(self.now)
+        self.masks: Dict[Tuple[str, int], int] = {}
+        self._boost: set | None = None      # boostede (ticker, uke); bygges på nytt når en maske blir komplett
+
+    def score(self, item: dict) -> dict | None:
+        sig, tickers, flag = _score_one(item, self.ctx)
+        if sig is None:
+            return None
+        wk = (self.now - sig.ts) // WEEK
+        for t in tickers:
+            old = self.masks.get((t, wk), 0)
+            if old | flag != old:
+                self.masks[(t, wk)] = old | flag
+                if old | flag == _FILING | _SPIKE:
+                    self._boost = None
+        return sig.to_dict()
+
+    def _boost_set(self) -> set:
+        if self._boost is None:
+            self._boost = {k for k, mask in self.masks.items() if mask == _FILING | _SPIKE}
+        return self._boost
+
+    def advance(self, now: int, keep: int) -> None:
+        """Ny runde for en scorer som lever lenge (daemon): klokken for
+        ferskhet flyttes og accession-dedup nullstilles, mens maskene beholdes
+        så kryss-boost virker på tvers av runder. Ukene telles fortsatt fra
+        klokken scoreren startet med; masker for uker som endte før now - keep
+        glemmes."""
+        self.ctx = _Ctx(int(now))
+        cutoff = int(now) - keep
+        for k in [k for k in self.masks if self.now - k[1] * WEEK < cutoff]:
+            del self.masks[k]
+            self._boost = None
+
+    def boost_keys(self) -> List[Tuple[str, int]]:
+        return sorted(self._boost_set())
+
+    def boost_ranges(self) -> List[Tuple[str, int, int]]:
+        """(ticker, fra, til] i epoch-sekunder for ukene som skal boostes."""
+        return [(t, self.now - (wk + 1) * WEEK, self.now - wk * WEEK) for t, wk in self.boost_keys()]
+
+    def boosted(self, s: dict) -> bool:
+        """Om et signal-dict fra score() hører til en boostet ticker-uke."""
+        keys = self._boost_set()
+        wk = (self.now - (_epoch(s.get("ts") or "") or self.now)) // WEEK
+        return any((t, wk) in keys for t in s.get("tickers") or ([s["ticker"]] if s.get("ticker") else []))
+
+def cross_boost(signals: List[dict], now: int | None = None) -> int:
+    """Kryss-boost over signal-dicts som er scoret hver for seg (f.eks. i
+    hver sin shard): samme regel som i score_signals, men signaler som
+    allerede er boostet ('boost') får ikke +1 igjen. Returnerer antall boostet."""
+    now = int(now or time.time())
+    index: Dict[Tuple[str, int], list] = {}
+    for i, s in enumerate(signals):
+        typ = s.get("type")
+        flag = _FILING if typ == "SEC_FILING" else _SPIKE if typ == "PRICE_SPIKE" else 0
+        wk = (now - (_epoch(s.get("ts") or "") or now)) // WEEK
+        for t in s.get("tickers") or ([s["ticker"]] if s.get("ticker") else []):
+            entry = index.setdefault((t, wk), [0, []])
+            entry[0] |= flag
+            entry[1].append(i)
+    boosted = set()
+    for mask, idxs in index.values():
+        if mask == _FILING | _SPIKE:
+            boosted.update(i for i in idxs if not signals[i].get("boost"))
+    for i in boosted:
+        signals[i]["score"] += 1
+        signals[i]["boost"] = 1
+    return len(boosted)
+
+def score_items(*streams: Iterable[dict], now: int | None = None) -> List[dict]:
+    """Scorer alle items (én eller flere strømmer, f.eks. nyheter + SEC + priser)
+    og returnerer signal-dicts nyest først. Kilden avgjøres av item['source']."""
+    now = int(now or time.time())
+    return [s.to_dict() for s in score_signals(chain.from_iterable(streams), now)]
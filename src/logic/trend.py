@@ -4,11 +4,17 @@
 
 from __future__ import annotations
 from dataclasses import dataclass, asdict
-from typing import List, Dict
-from statistics import mean
-from datetime import datetime, timedelta
-import yfinance as yf
-import math
+from typing import TYPE_CHECKING, List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import os, time
+import numpy as np
+
+if TYPE_CHECKING:                 # pandas/yfinance er trege å importere; lastes ved første nedlasting
+    import pandas as pd
+
+from src.config import TREND_CACHE_DIR, TREND_CACHE_TTL, TREND_CHUNK
+from src.logic.indicators import align, ema, rsi, rsi_trailing, last_mean, bearish_divergence
 
 @dataclass
 class TrendPoint:
@@ -25,69 +31,43 @@ class TrendPoint:
     notes: List[str]
     asof: str
 
-def _ema(values: List[float], n: int) -> float:
-    if not values: return float("nan")
-    k = 2 / (n + 1.0)
-    ema = values[0]
-    for v in values[1:]:
-        ema = v * k + ema * (1 - k)
-    return ema
-
-def _rsi(closes: List[float], period: int = 14) -> float:
-    if len(closes) < period + 1: return float("nan")
-    gains, losses = [], []
-    for i in range(1, period + 1):
-        ch = closes[i] - closes[i - 1]
-        gains.append(max(ch, 0.0))
-        losses.append(-min(ch, 0.0))
-    avg_gain = mean(gains)
-    avg_loss = mean(losses) or 1e-9
-    for i in range(period + 1, len(closes)):
-        ch = closes[i] - closes[i - 1]
-        gain = max(ch, 0.0); loss = -min(ch, 0.0)
-        avg_gain = (avg_gain * (period - 1) + gain) / period
-        avg_loss = (avg_loss * (period - 1) + loss) / period
-    rs = avg_gain / (avg_loss or 1e-9)
-    return 100 - (100 / (1 + rs))
-
-def _bearish_divergence(closes: List[float], rsis: List[float]) -> bool:
-    # Higher high i pris, lower high i RSI i siste ~15 bars
-    if len(closes) < 20 or len(rsis) != len(closes): return False
-    window = closes[-20:]
-    rwin   = rsis[-20:]
-    try:
-        hi1_idx = window.index(max(window[:10]))
-        hi2_idx = 10 + window[10:].index(max(window[10:]))
-        price_higher = window[hi2_idx] > window[hi1_idx] * 0.995
-        rsi_lower    = rwin[hi2_idx] < rwin[hi1_idx] - 2
-        return price_higher and rsi_lower
-    except Exception:
-        return False
-
 def compute_trend_for(ticker: str) -> TrendPoint | None:
     try:
+        import yfinance as yf
         df = yf.download(ticker, period="3mo", interval="1d", progress=False)
         if df is None or df.empty or len(df) < 25:
             return None
-        closes = [float(x) for x in df["Close"].tolist()]
-        opens  = [float(x) for x in df["Open"].tolist()]
-        vols   = [float(x) for x in df["Volume"].tolist()]
-        ema5   = _ema(closes[-25:], 5)
-        ema20  = _ema(closes[-25:], 20)
-        rsi14  = _rsi(closes[-25:], 14)
-        close  = closes[-1]
-        change_pct = (closes[-1] - closes[-2]) / closes[-2] * 100.0
-        vol_last = vols[-1]
-        vol_avg20 = mean(vols[-20:]) if len(vols) >= 20 else mean(vols)
-        red_day = closes[-1] < opens[-1]
-        high_red_vol = red_day and vol_last > 1.5 * (vol_avg20 or 1)
-
-        # grov RSI-serie til divergens-sjekk
-        rsiser = []
-        for i in range(len(closes)):
-            rsiser.append(_rsi(closes[: i + 1][-25:], 14))
-        div = _bearish_divergence(closes, rsiser)
+        cols = [np.asarray(df[c], dtype=float).reshape(1, -1) for c in ("Close", "Open", "Volume")]
+        return score_matrix([ticker], *cols)[0]
+    except Exception:
+        return None
 
+def score_matrix(tickers: List[str], closes: np.ndarray, opens: np.ndarray, vols: np.ndarray) -> List[TrendPoint | None]:
+    """Trendscore for et helt univers i én batch. closes/opens/vols er
+    tickers × bars, høyrejustert og NaN-paddet (se indicators.align).
+    Tickers med færre enn 25 bars gir None."""
+    w = closes[:, -25:]
+    ema5s  = ema(w, 5)[:, -1]
+    ema20s = ema(w, 20)[:, -1]
+    rsi14s = rsi(w, 14)[:, -1]
+    ema5_prevs = ema(closes[:, -7:-1], 5)[:, -1]
+    last, prev = closes[:, -1], closes[:, -2]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        changes = (last - prev) / prev * 100.0
+    vol_lasts = vols[:, -1]
+    vol_avgs = last_mean(vols, 20)
+    high_red_vols = (last < opens[:, -1]) & (vol_lasts > 1.5 * np.where(vol_avgs > 0, vol_avgs, 1))
+    # RSI-serie til divergens-sjekk: hver bar har RSI over sine siste 25 bars
+    divs = bearish_divergence(closes, rsi_trailing(closes, 14, 25))[:, -1]
+    nbars = np.sum(~np.isnan(closes), axis=1)
+    asof = datetime.utcnow().isoformat()+"Z"
+
+    out: List[TrendPoint | None] = []
+    for i, ticker in enumerate(tickers):
+        if nbars[i] < 25:
+            out.append(None)
+            continue
+        ema5, ema20, rsi14 = float(ema5s[i]), float(ema20s[i]), float(rsi14s[i])
         score = 0
         notes = []
 
@@ -96,10 +76,8 @@ def compute_trend_for(ticker: str) -> TrendPoint | None:
         else:            score -= 2; notes.append("EMA5<EMA20 (trend ned)")
 
         # Slope av EMA5 (enkel)
-        if len(closes) >= 7:
-            ema5_prev = _ema(closes[-7:-1], 5)
-            if ema5 > ema5_prev: score += 1; notes.append("EMA5 stiger")
-            else:                score -= 1; notes.append("EMA5 faller")
+        if ema5 > ema5_prevs[i]: score += 1; notes.append("EMA5 stiger")
+        else:                    score -= 1; notes.append("EMA5 faller")
 
         # RSI
         if rsi14 >= 80:  score -= 2; notes.append(f"RSI {rsi14:.0f} (overkjøpt)")
@@ -107,37 +85,96 @@ def compute_trend_for(ticker: str) -> TrendPoint | None:
         elif rsi14 >= 50: score += 1; notes.append(f"RSI {rsi14:.0f} (ok)")
 
         # Volum-distribusjon
-        if high_red_vol: score -= 2; notes.append("Rød dag med høyt volum (distribusjon)")
+        if high_red_vols[i]: score -= 2; notes.append("Rød dag med høyt volum (distribusjon)")
 
         # Bearish divergens
-        if div: score -= 2; notes.append("Bearish divergens (pris↑, RSI↓)")
+        if divs[i]: score -= 2; notes.append("Bearish divergens (pris↑, RSI↓)")
 
         # Klassifisering
         status = "UP" if score >= 2 else ("DOWN" if score <= -2 else "WATCH")
 
-        return TrendPoint(
+        out.append(TrendPoint(
             ticker=ticker,
             status=status,
             score=int(score),
-            rsi=float(rsi14),
-            ema5=float(ema5),
-            ema20=float(ema20),
-            close=float(close),
-            change_pct=float(change_pct),
-            vol=float(vol_last),
-            vol_avg20=float(vol_avg20),
+            rsi=rsi14,
+            ema5=ema5,
+            ema20=ema20,
+            close=float(last[i]),
+            change_pct=float(changes[i]),
+            vol=float(vol_lasts[i]),
+            vol_avg20=float(vol_avgs[i]),
             notes=notes,
-            asof=datetime.utcnow().isoformat()+"Z",
-        )
+            asof=asof,
+        ))
+    return out
+
+# ---------- batch: hele tickerlisten i få multi-symbol-kall ----------
+
+def _cache_path(ticker: str) -> str:
+    return os.path.join(TREND_CACHE_DIR, f"{ticker.upper()}.pkl")
+
+def _cached_frame(ticker: str) -> pd.DataFrame | None:
+    p = _cache_path(ticker)
+    try:
+        if time.time() - os.path.getmtime(p) > TREND_CACHE_TTL:
+            return None
+        import pandas as pd
+        return pd.read_pickle(p)
     except Exception:
         return None
 
-def compute_trend_all(tickers: List[str]) -> List[Dict]:
-    out = []
+def _download_chunk(chunk: List[str]) -> Dict[str, pd.DataFrame]:
+    import pandas as pd
+    import yfinance as yf
+    df = yf.download(chunk, period="3mo", interval="1d", group_by="ticker",
+                     threads=True, progress=False)
+    out = {}
+    if df is None or df.empty:
+        return out
+    for t in chunk:
+        try:
+            sub = df[t] if isinstance(df.columns, pd.MultiIndex) else df
+        except KeyError:
+            continue
+        sub = sub.dropna(how="all")
+        if not sub.empty:
+            out[t] = sub
+    return out
+
+def download_frames(tickers: List[str]) -> Dict[str, pd.DataFrame]:
+    """OHLCV for alle tickers. Ferske rammer leses fra lokal cache; resten
+    hentes i multi-symbol-chunks som kjøres parallelt."""
+    frames = {}
+    missing = []
     for t in tickers:
-        tp = compute_trend_for(t)
-        if tp:
-            out.append(asdict(tp))
+        f = _cached_frame(t)
+        if f is not None:
+            frames[t] = f
+        else:
+            missing.append(t)
+    chunks = [missing[i:i + TREND_CHUNK] for i in range(0, len(missing), TREND_CHUNK)]
+    if chunks:
+        os.makedirs(TREND_CACHE_DIR, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=min(4, len(chunks))) as pool:
+            for got in pool.map(_download_chunk, chunks):
+                for t, f in got.items():
+                    frames[t] = f
+                    try:
+                        f.to_pickle(_cache_path(t))
+                    except Exception:
+                        pass
+    return frames
+
+def compute_trend_all(tickers: List[str]) -> List[Dict]:
+    try:
+        frames = download_frames(tickers)
+    except Exception:
+        frames = {}
+    names = [t for t in tickers if t in frames]
+    mats = [align([np.asarray(frames[t][c], dtype=float).reshape(-1) for t in names])
+            for c in ("Close", "Open", "Volume")]
+    out = [asdict(tp) for tp in score_matrix(names, *mats) if tp] if names else []
     # sorter viktigst først: DOWN -> WATCH -> UP, deretter lav score
     order = {"DOWN": 0, "WATCH": 1, "UP": 2}
     out.sort(key=lambda x: (order.get(x["status"], 1), x["score"]))
@@ -1,83 +1,114 @@
 # src/main.py
-import os, json, time, traceback
+import argparse, heapq, importlib, os, json, sys, time, traceback
+_T0 = time.perf_counter()
 from datetime import datetime, timezone
 
-# Kilder
-from src.sources.prices import fetch_prices
-try:
-    from src.sources.news import fetch_news
-except Exception:
-    fetch_news = None
-try:
-    from src.sources.sec import fetch_filings
-except Exception:
-    fetch_filings = None
-try:
-    from src.sources.patents import fetch_patents
-except Exception:
-    fetch_patents = None
-try:
-    from src.sources.arxiv import fetch_arxiv
-except Exception:
-    fetch_arxiv = None
-
-from src.logic.rules import score_items
-from src.notifier import send_discord
+from src.logic.rules import score_items, cross_boost
+from src.notifier import send_discord, flush as flush_notifier
+from src.runner import Job, SourceStream, run_sources
+from src import metrics
+from src.artifacts import Spool, write_artifact, write_artifact_stream, to_columnar
+from src.store.seen import SeenStore, signal_id
+from src.store.signals import SignalStore, export_shards, to_epoch
+from src.universe import load_universe, parse_shard
 
 from src.config import (
-    TICKERS, COMPANIES, ARXIV_QUERIES,
-    NEWS_KEYWORDS, PATENT_KEYWORDS,
-    DATA_JSON, SIGNALS_JSON, STATE_JSON
+    ARXIV_QUERIES, NEWS_KEYWORDS, PATENT_KEYWORDS, SHARDS_DIR,
+    DATA_JSON, SIGNALS_JSON, SIGNALS_DIR, SIGNALS_LATEST, STATE_JSON, INDICATORS_JSON, RADAR_DB, SEEN_TTL_DAYS, NEARDUP_TTL_DAYS,
+    SIGNALS_TTL_DAYS,
+    SOURCE_DEADLINES, ARTIFACT_MINIFY, ARTIFACT_COMPRESS, ARTIFACT_COLUMNAR,
+    FEED_DIR, FEED_SNAPSHOT_EVERY, FEED_KEEP,
+    METRICS_JSON, METRICS_HISTORY, METRICS_PROM, STREAM_BATCH, ALERT_TOP
 )
 
+# Kilder registreres som (modul, funksjon) og importeres først når de skal
+# kjøres: en kjøring med bare priser slipper feedparser, og ingen kjøring
+# betaler for numpy/requests før de faktisk trengs.
+# Funksjonene er generatorer, så items kan gå videre mens kilden henter.
+SOURCES = {
+    "prices":  ("src.sources.prices",  "iter_prices"),
+    "news":    ("src.sources.news",    "iter_news"),
+    "sec":     ("src.sources.sec",     "iter_sec_filings"),
+    "patents": ("src.sources.patents", "iter_patents"),
+    "arxiv":   ("src.sources.arxiv",   "iter_arxiv"),
+}
+HEAVY = ("numpy", "requests", "feedparser", "pandas", "yfinance")
+IMPORT_TIMES = {}    # modul → sekunder brukt på første import (--profile-imports)
+
+def source_args(name, shard=None):
+    """Argumentene til kilden, for hele universet eller bare én shard."""
+    u = load_universe()
+    tickers = shard.tickers if shard else u.tickers
+    pick = shard.terms if shard else list
+    return {
+        "prices":  (tickers,),
+        "news":    (pick(NEWS_KEYWORDS), pick(u.companies)),
+        "sec":     (tickers,),
+        "patents": (pick(PATENT_KEYWORDS + u.companies),),
+        "arxiv":   (ARXIV_QUERIES if shard is None or shard.global_sources else [],),
+    }[name]
+
+def lazy_import(name):
+    if name in sys.modules:
+        return sys.modules[name]
+    t0 = time.perf_counter()
+    mod = importlib.import_module(name)
+    IMPORT_TIMES[name] = time.perf_counter() - t0
+    return mod
+
+def load_source(name):
+    mod, fn = SOURCES[name]
+    try:
+        return getattr(lazy_import(mod), fn)
+    except Exception as e:
+        print(f"[WARN] {name}: import feilet: {e}")
+        return None
+
+def print_import_profile():
+    print(f"[imports] src.main {IMPORT_TIMES.get('src.main', 0)*1000:7.1f} ms")
+    for name, secs in sorted(IMPORT_TIMES.items(), key=lambda kv: -kv[1]):
+        if name != "src.main":
+            print(f"[imports] {name:<22} {secs*1000:7.1f} ms")
+    loaded = [m for m in HEAVY if m in sys.modules]
+    print(f"[imports] tunge moduler lastet: {', '.join(loaded) or 'ingen'}")
+
 # ---------- helpers ----------
-def ema(vals, span):
-    if not vals: return None
-    k = 2 / (span + 1)
-    e = None
-    out = []
-    for v in vals:
-        e = v if e is None else (v * k + e * (1 - k))
-        out.append(e)
-    return out
+def trend_block(p, states):
+    # Online-tilstand per ticker: kun bars som er nye siden forrige kjøring
+    # legges inn, så kostnaden er konstant uansett historikklengde.
+    import numpy as np
+    from src.logic.indicators import OnlineIndicators
+    store = lazy_import("src.sources.prices").STORE
+    t = p["ticker"]
+    st = states.get(t) or OnlineIndicators()
+    bars = store.bars(t)
+    new = bars[np.searchsorted(bars["date"], st.last_date):]
+    st.update(new["date"], new["close"], new["volume"])
+    states[t] = st
+    v = st.values()
+    if v["bars"] < 5:
+        return {"ticker": t, "status": "WATCH"}
+    e20 = v["ema20"] if v["bars"] >= 20 else v["close"]
+    _rsi = v["rsi"] if v["rsi"] is not None else 50
+    status = "UP" if v["close"] > e20 else "DOWN"
+    return {
+        "ticker": t,
+        "ema5": round(v["ema5"], 4),
+        "ema20": round(e20, 4),
+        "rsi": round(_rsi, 1),
+        "status": status
+    }
 
-def rsi(vals, period=14):
-    if len(vals) <= period: return None
-    gains, losses = [], []
-    for i in range(1, len(vals)):
-        d = vals[i] - vals[i-1]
-        gains.append(max(d, 0)); losses.append(max(-d, 0))
-    avg_g = sum(gains[:period]) / period
-    avg_l = sum(losses[:period]) / period
-    rsis = [None]*period
-    for i in range(period, len(vals)-1):
-        avg_g = (avg_g*(period-1) + gains[i]) / period
-        avg_l = (avg_l*(period-1) + losses[i]) / period
-        rs = (avg_g / avg_l) if avg_l else 999
-        rsis.append(100 - (100/(1+rs)))
-    rsis.append(rsis[-1])
-    return rsis[-1]
-
-def build_trend_blocks(prices_payload):
-    trend = []
-    for p in prices_payload:
-        hist = p.get("history", []) or []
-        closes = [h["close"] for h in hist][-30:]
-        if len(closes) < 5:
-            trend.append({"ticker": p["ticker"], "status": "WATCH"})
-            continue
-        e5  = ema(closes, 5)[-1]
-        e20 = ema(closes, 20)[-1] if len(closes) >= 20 else closes[-1]
-        _rsi = rsi(closes, 14) or 50
-        status = "UP" if closes[-1] > e20 else "DOWN"
-        trend.append({
-            "ticker": p["ticker"],
-            "ema5": round(e5, 4),
-            "ema20": round(e20, 4),
-            "rsi": round(_rsi, 1),
-            "status": status
-        })
-    return trend
+def build_trend_blocks(prices_payload, states):
+    with metrics.span("trend"):
+        return [trend_block(p, states) for p in prices_payload]
+
+def load_indicator_states(path):
+    from src.logic.indicators import OnlineIndicators
+    return {t: OnlineIndicators.from_dict(d) for t, d in read_json(path, {}).items()}
+
+def save_indicator_states(path, states):
+    write_json(path, {t: st.to_dict() for t, st in states.items()})
 
 def read_json(path, default):
     try:
@@ -93,75 +124,521 @@ def write_json(path, payload):
         json.dump(payload, f, ensure_ascii=False, indent=2)
     os.replace(tmp, path)
 
-def safe_call(name, fn, *a, **k):
-    try:
-        if fn is None:
-            raise RuntimeError(f"{name} modul ikke tilgjengelig")
-        return fn(*a, **k) or []
-    except Exception as e:
-        print(f"[WARN] {name} feilet: {e}")
-        traceback.print_exc()
-        return []
+def publish(path, payload, volatile=()):
+    """Dashboard-artefakt: minifisert + .gz/.br, hoppes over hvis uendret."""
+    wrote = write_artifact(path, payload, minify=ARTIFACT_MINIFY, compress=ARTIFACT_COMPRESS, volatile=volatile)
+    if not wrote:
+        print(f"[publish] {path} uendret – ikke skrevet")
+    return wrote
 
-# ------------------------------- MAIN --------------------------------
+# ------------------------------- STEG --------------------------------
+# Stegene brukes av daemonen og shards; engangskjøringen (main) går som
+# strøm gjennom de samme byggeklossene (se STRØMMING).
 
-def main():
-    started = time.time()
+STREAMS = ("news", "sec", "patents", "arxiv", "prices")   # rekkefølgen score_items forventer
 
-    # 1) Priser (nå + 30 dagers historikk)
-    prices_payload = safe_call("prices", fetch_prices, TICKERS)
+def source_jobs(names, shard=None):
+    """Én Job per kilde. I en shard hoppes kilder uten noe å hente over
+    (f.eks. arXiv utenfor shard 0)."""
+    D = SOURCE_DEADLINES
+    args = {name: source_args(name, shard) for name in names}
+    return [Job(name, load_source(name), args[name], deadline=D[name])
+            for name in names if shard is None or any(args[name])]
 
-    # 2) Kilder (robust)
-    news_items   = safe_call("news",    fetch_news,    NEWS_KEYWORDS, COMPANIES)
-    sec_items    = safe_call("sec",     fetch_filings, COMPANIES)
-    patent_items = safe_call("patents", fetch_patents, PATENT_KEYWORDS + COMPANIES)
-    arxiv_items  = safe_call("arxiv",   fetch_arxiv,   ARXIV_QUERIES)
+def prune_http_cache(shard=None):
+    # cachen ryddes av hovedprosessen, ikke av shards som kjører samtidig
+    if shard is None and "src.http_client" in sys.modules:
+        sys.modules["src.http_client"].cache().prune()
 
-    # 3) Score
-    all_items = news_items + sec_items + patent_items + arxiv_items
-    scored = []
-    try:
-        scored = score_items(all_items) or []
-    except Exception as e:
-        print(f"[WARN] score_items feilet: {e}")
-        traceback.print_exc()
-        scored = []
-
-    signals_today = [x for x in scored if x.get("is_new")]
-
-    # 4) Trend-data
-    trend_blocks = build_trend_blocks(prices_payload)
-
-    # 5) State + nye varsler
-    state = read_json(STATE_JSON, {"last_run": None, "signals_seen": []})
-    seen = set(state.get("signals_seen") or [])
-    new_for_alert = []
-    for s in signals_today:
-        sig_id = s.get("id") or (s.get("type","") + "|" + s.get("title",""))[:256]
-        if sig_id not in seen:
-            new_for_alert.append(s); seen.add(sig_id)
-
-    # 6) Varsling
-    if new_for_alert:
-        lines = [f"**{len(new_for_alert)} nye signal(er)**"]
-        for s in sorted(new_for_alert, key=lambda x: -x.get("score", 0))[:10]:
-            t = s.get("ticker") or "—"
-            lines.append(f"- [{t}] {s.get('type','?')} • score {s.get('score',0)} • {s.get('title','')[:120]}")
-        send_discord("\n".join(lines))
-
-    # 7) Skriv ut filer
-    write_json(SIGNALS_JSON, scored)
+def fetch_sources(names, shard=None):
+    """Kjører valgte kilder parallelt. Returnerer (resultater, timings)."""
+    with metrics.span("fetch"):
+        results, timings = run_sources(source_jobs(names, shard))
+        prune_http_cache(shard)
+    return results, timings
+
+def drop_near_dups(results):
+    """Nær-duplikater (samme sak/paper fra flere domener/søk) ut før scoring."""
+    news_items, arxiv_items = results.get("news") or [], results.get("arxiv") or []
+    if not (news_items or arxiv_items):
+        return results
+    with metrics.span("dedup"):
+        neardup = lazy_import("src.logic.neardup").NearDupIndex(RADAR_DB, NEARDUP_TTL_DAYS * 86400)
+        raw_counts = (len(news_items), len(arxiv_items))
+        results = {**results, "news": neardup.filter(news_items), "arxiv": neardup.filter(arxiv_items)}
+        neardup.close()
+    print(f"[dedup] news {raw_counts[0]}→{len(results['news'])} • arxiv {raw_counts[1]}→{len(results['arxiv'])}")
+    return results
+
+def score_results(results, scorer=None):
+    """Signal-dicts for resultatene. Med `scorer` (en StreamScorer som lever
+    mellom rundene, se daemon) scores itemene mot kryss-boost-maskene den har
+    fra før, og signaler i en boostet ticker-uke får +1 her; eldre signaler i
+    lageret boostes av publish_signals."""
+    with metrics.span("score"):
+        try:
+            if scorer is None:
+                return score_items(*(results.get(name) or [] for name in STREAMS))
+            scored = [s for name in STREAMS for s in map(scorer.score, results.get(name) or []) if s is not None]
+            for s in scored:
+                if scorer.boosted(s):
+                    s["score"] += 1
+                    s["boost"] = 1
+            return scored
+        except Exception as e:
+            print(f"[WARN] score_items feilet: {e}")
+            traceback.print_exc()
+            metrics.inc("errors", "score")
+            return []
+
+def alert_candidates(signals, now=None):
+    """Signalene fra denne kjøringen som kan varsles. Om et signal er nytt
+    avgjør SeenStore, ikke tidsstempelet: SEC-datoer har ikke klokkeslett,
+    GDELT henger etter, og backfill eller en tapt kjøring gir eldre items som
+    aldri er varslet. Bare signaler eldre enn SEEN_TTL_DAYS holdes utenfor;
+    dem har lageret glemt, og en kilde som leverer dem igjen (patenter) ville
+    ellers varslet på nytt."""
+    cutoff = int(now or time.time()) - SEEN_TTL_DAYS * 86400
+    return [s for s in signals if to_epoch(s.get("ts")) >= cutoff]
+
+def new_alerts(scored, state):
+    """Nye signaler som ikke er varslet før (registreres som varslet)."""
+    signals_today = alert_candidates(scored)
+    with metrics.span("notify"):
+        seen = SeenStore(RADAR_DB)
+        migrated = seen.migrate_legacy(state)
+        if migrated:
+            print(f"[state] migrerte {migrated} gamle varsel-ID-er til {RADAR_DB}")
+        is_new = seen.add_signals(signals_today)
+        new_for_alert = [s for s, new in zip(signals_today, is_new) if new]
+        seen.close()
+    return new_for_alert
+
+def send_alerts(new_for_alert, total=None):
+    """Varsling (køes; sendes i bakgrunnen). Ved strømming er `new_for_alert`
+    bare toppen og `total` antallet nye signaler."""
+    total = len(new_for_alert) if total is None else total
+    if not total:
+        return
+    metrics.inc("alerts", "", total)
+    lines = [f"**{total} nye signal(er)**"]
+    for s in heapq.nlargest(ALERT_TOP, new_for_alert, key=lambda x: x.get("score", 0)):
+        t = s.get("ticker") or "—"
+        lines.append(f"- [{t}] {s.get('type','?')} • score {s.get('score',0)} • {s.get('title','')[:120]}")
+    send_discord("\n".join(lines))
+
+def publish_signals(scored, boost=()):
+    """Signalhistorikk i SQLite + shards for dagene som fikk nye rader.
+    `boost` er kryss-boost-intervaller (StreamScorer.boost_ranges) for
+    signaler som alt ligger i lageret. Returnerer de berørte dagene."""
+    with metrics.span("write"):
+        store = SignalStore(RADAR_DB)
+        touched = store.insert(scored)
+        if boost:
+            touched = sorted(set(touched) | set(store.boost(boost)))
+        export_signals(store, touched)
+        store.close()
+    return touched
+
+def export_signals(store, touched):
+    export_shards(store, SIGNALS_DIR, touched, columnar=ARTIFACT_COLUMNAR)
+    if touched or not os.path.exists(SIGNALS_JSON):
+        latest = store.query(limit=SIGNALS_LATEST)
+        publish(SIGNALS_JSON, to_columnar(latest) if ARTIFACT_COLUMNAR else latest)
+
+def price_output(p):
+    if ARTIFACT_COLUMNAR:
+        return {**p, "history": to_columnar(p.get("history") or [], ["date", "close"])}
+    return p
+
+def price_outputs(prices_payload):
+    return [price_output(p) for p in prices_payload]
+
+def publish_data(prices_out, trend_blocks, counts, timings):
+    """data.json. prices_out/trend_blocks kan være lister eller strømmer
+    (f.eks. en Spool); strømmer skrives rad for rad."""
     data = {
         "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
-        "tickers": TICKERS,
-        "prices": prices_payload,
+        "tickers": load_universe().tickers,
+        "prices": prices_out,
         "trend": trend_blocks,
-        "counts": { "signals_today": len(new_for_alert), "signals_total": len(scored) }
+        "counts": counts,
+        "timings": timings
     }
-    write_json(DATA_JSON, data)
-    write_json(STATE_JSON, {"last_run": datetime.utcnow().isoformat()+"Z", "signals_seen": list(seen)})
+    with metrics.span("write"):
+        if isinstance(prices_out, list) and isinstance(trend_blocks, list):
+            return publish(DATA_JSON, data, volatile=("generated_at", "timings"))
+        wrote = write_artifact_stream(DATA_JSON, {k: v if isinstance(v, (list, dict, str)) else iter(v)
+                                                  for k, v in data.items()},
+                                      minify=ARTIFACT_MINIFY, compress=ARTIFACT_COMPRESS,
+                                      volatile=("generated_at", "timings"))
+        if not wrote:
+            print(f"[publish] {DATA_JSON} uendret – ikke skrevet")
+        return wrote
+
+def publish_feed(prices_out, trend_blocks, counts, touched):
+    """Ny generasjon i docs/feed/ (se src/feed.py) med det som er endret
+    siden forrige: signalene fra de berørte dagene, pris-/trendrader og meta."""
+    from src.feed import Feed
+    def with_id(rows):
+        return [{**s, "id": signal_id(s)} for s in rows]
+    with metrics.span("write"):
+        store = SignalStore(RADAR_DB)
+        feed = Feed(FEED_DIR, RADAR_DB, FEED_SNAPSHOT_EVERY, FEED_KEEP, SIGNALS_LATEST, ARTIFACT_COLUMNAR)
+        try:
+            seq = feed.publish({"tickers": load_universe().tickers, "counts": counts},
+                               prices_out or [], trend_blocks or [],
+                               (s for day in touched for s in with_id(store.query(day=day, limit=None))),
+                               lambda: with_id(store.query(limit=SIGNALS_LATEST)))
+        finally:
+            feed.close()
+            store.close()
+    print(f"[feed] generasjon {seq}" if seq else "[feed] uendret – ingen ny delta")
+    return seq
+
+def write_metrics():
+    snap = metrics.write(METRICS_JSON, METRICS_HISTORY, METRICS_PROM)
+    print(f"[metrics] {metrics.summary(snap)}")
+
+def mark_run(state):
+    state["last_run"] = datetime.utcnow().isoformat()+"Z"
+    write_json(STATE_JSON, state)
+    evict_db()
+
+def evict_db(now=None):
+    """Aldersbasert rydding i radar.db: signaler, varslede ID-er, feed-hasher
+    og LSH-klynger. Databasen lever i actions/cache og skal ikke vokse uten
+    grense; vannmerkene er én rad per kilde/nøkkel og ryddes ikke."""
+    from src.feed import Feed
+    now = int(now or time.time())
+    with metrics.span("write"):
+        store = SignalStore(RADAR_DB)
+        if store.evict(SIGNALS_TTL_DAYS * 86400, now):
+            export_shards(store, SIGNALS_DIR, [], columnar=ARTIFACT_COLUMNAR)    # bare index.json
+        store.close()
+        seen = SeenStore(RADAR_DB)
+        seen.evict(SEEN_TTL_DAYS * 86400, now)
+        seen.close()
+        feed = Feed(FEED_DIR, RADAR_DB)
+        feed.evict(SIGNALS_TTL_DAYS * 86400, now)
+        feed.close()
+        neardup = lazy_import("src.logic.neardup").NearDupIndex(RADAR_DB, NEARDUP_TTL_DAYS * 86400)
+        neardup.evict(now)
+        neardup.close()
+
+# ---------------------------- STRØMMING ------------------------------
+# Engangskjøringen går som én strøm: items går fra kildene (generatorer bak
+# en begrenset kø) gjennom dedup, trend, scoring og signal-lageret mens de
+# tregeste kildene fortsatt henter. Ingenting samles i lister: signalene
+# skrives i batcher, pris- og trendrader går til NDJSON på disk, og varselet
+# bygges fra en topp-K-heap. Kryss-boost legges på i lageret til slutt.
+
+class TopK:
+    """De k signalene med høyest score (min-heap; ved lik score vinner det
+    første), pluss antall som er lagt inn."""
+
+    def __init__(self, k):
+        self.k, self.heap, self.n = k, [], 0
+
+    def push(self, s):
+        self.n += 1
+        entry = (s.get("score", 0), -self.n, s)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, entry)
+
+    def items(self):
+        return [s for *_, s in sorted(self.heap, key=lambda e: e[:2], reverse=True)]
+
+def stream_run(names, state, ind_states=None):
+    """Henter, dedupliserer, scorer, lagrer og varsler som strøm (se over).
+    Returnerer (prisrader, trendrader, counts, timings, berørte dager); radene
+    er Spools når prisene er med (ind_states), ellers None."""
+    from src.logic.rules import StreamScorer
+    scorer = StreamScorer()
+    store, seen = SignalStore(RADAR_DB), SeenStore(RADAR_DB)
+    migrated = seen.migrate_legacy(state)
+    if migrated:
+        print(f"[state] migrerte {migrated} gamle varsel-ID-er til {RADAR_DB}")
+    neardup = None
+    prices_out, trend_out = (Spool(), Spool()) if ind_states is not None else (None, None)
+    top, batch, touched = TopK(ALERT_TOP), [], set()
+    raw, kept = {"news": 0, "arxiv": 0}, {"news": 0, "arxiv": 0}
+    clock = dict.fromkeys(("dedup", "trend", "score", "write"), 0.0)   # stegene går om hverandre
+    total = 0
+
+    def flush():
+        # ingen skrivetransaksjon står åpen mens strømmen venter: kildene
+        # skriver vannmerker i samme database
+        t0 = time.perf_counter()
+        if neardup is not None:
+            neardup.commit()
+        if batch:
+            touched.update(store.insert(batch))
+            fresh = alert_candidates(batch)
+            for s, new in zip(fresh, seen.add_signals(fresh)):
+                if new:
+                    top.push(s)
+            batch.clear()
+        clock["write"] += time.perf_counter() - t0
+
+    stream = SourceStream(source_jobs(names), on_idle=flush)
+    with metrics.span("stream"):
+        for name, item in stream:
+            t0 = time.perf_counter()
+            if name in raw:
+                if neardup is None:
+                    neardup = lazy_import("src.logic.neardup").NearDupIndex(RADAR_DB, NEARDUP_TTL_DAYS * 86400)
+                raw[name] += 1
+                item = neardup.keep(item)
+                t1 = time.perf_counter()
+                clock["dedup"] += t1 - t0
+                t0 = t1
+                if item is None:
+                    continue
+                kept[name] += 1
+            elif name == "prices" and prices_out is not None:
+                trend_out.add(trend_block(item, ind_states))
+                prices_out.add(price_output(item))
+                t1 = time.perf_counter()
+                clock["trend"] += t1 - t0
+                t0 = t1
+            sig = scorer.score(item)
+            clock["score"] += time.perf_counter() - t0
+            if sig is not None:
+                batch.append(sig)
+                total += 1
+                if len(batch) >= STREAM_BATCH:
+                    flush()
+        flush()
+        if neardup is not None:
+            # ingen åpen transaksjon i radar.db utover lageret vi publiserer fra
+            neardup.close()
+            print(f"[dedup] news {raw['news']}→{kept['news']} • arxiv {raw['arxiv']}→{kept['arxiv']}")
+        seen.close()
+        prune_http_cache()
+
+        t0 = time.perf_counter()
+        touched.update(store.boost(scorer.boost_ranges()))
+        for s in top.items():
+            if scorer.boosted(s):
+                s["score"] += 1
+                s["boost"] = 1
+        export_signals(store, sorted(touched))
+        clock["write"] += time.perf_counter() - t0
+
+    store.close()
+    for stage, secs in clock.items():
+        metrics.record(stage, secs)
+    send_alerts(top.items(), top.n)
+    return (prices_out, trend_out, {"signals_today": top.n, "signals_total": total},
+            stream.timings, sorted(touched))
+
+# ------------------------------ SHARDS -------------------------------
+# Store univers deles i n shards (stabil hash på ticker, se src/universe.py).
+# Hver shard henter, scorer og beregner trend for sin del og skriver en
+# delfil; merge leser delfilene og gjør det som skal skje én gang:
+# varsling, signal-lager og publisering av data.json/signals.json.
+
+def shard_path(i, n, kind="part"):
+    return os.path.join(SHARDS_DIR, f"{kind}-{i}of{n}.json")
+
+def run_shard(i, n, sources):
+    """Kjører shard i av n og skriver delfilen. Publiserer og varsler ikke."""
+    shard = load_universe().shard(i, n)
+    started = time.time()
+    results, timings = fetch_sources(sources, shard)
+    results = drop_near_dups(results)
+    scored = score_results(results)
+    part = {"shard": i, "of": n, "tickers": shard.tickers, "signals": scored, "timings": timings}
+    if "prices" in sources:
+        # indikator-tilstanden følger shard-inndelingen; ny n gir kald start
+        states_path = shard_path(i, n, "indicators")
+        ind_states = load_indicator_states(states_path)
+        part["prices"] = results.get("prices") or []
+        part["trend"] = build_trend_blocks(part["prices"], ind_states)
+        save_indicator_states(states_path, ind_states)
+    part["generated_at"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    part["metrics"] = metrics.snapshot()
+    write_json(shard_path(i, n), part)
+    print(f"[shard {shard.name}] {len(shard.tickers)} tickers • {len(scored)} signaler • {round(time.time()-started,1)}s")
+    return part
+
+def _merge_timings(parts):
+    rank = {"ok": 0, "timeout": 1, "error": 2}
+    out = {}
+    for part in parts:
+        for name, t in part.get("timings", {}).items():
+            if name not in out:
+                out[name] = dict(t)
+                continue
+            m = out[name]
+            m["secs"] = max(m.get("secs", 0), t.get("secs", 0))
+            m["items"] = m.get("items", 0) + t.get("items", 0)
+            if rank.get(t.get("status"), 2) > rank.get(m.get("status"), 2):
+                m["status"] = t.get("status")
+    return out
+
+def _by_ticker(rows, prev, order):
+    """Én rad per ticker i universets rekkefølge; tickers uten ny rad
+    (shard som feilet/mangler) beholder raden fra forrige data.json."""
+    fresh = {r["ticker"]: r for r in rows}
+    old = {r["ticker"]: r for r in prev if isinstance(r, dict) and "ticker" in r}
+    return [fresh.get(t) or old[t] for t in order if t in fresh or t in old]
+
+def merge_shards(n):
+    """Slår sammen delfilene fra n shards deterministisk (samme delfiler gir
+    samme data.json/signals.json uansett rekkefølge) og publiserer."""
+    started = time.time()
+    parts = []
+    for i in range(n):
+        part = read_json(shard_path(i, n), None)
+        if part is None:
+            print(f"[merge] mangler {shard_path(i, n)} – bruker forrige data for disse tickerne")
+            continue
+        parts.append(part)
+        metrics.absorb(part.get("metrics") or {})
+    u = load_universe()
+
+    with metrics.span("merge"):
+        signals = {}
+        for part in parts:
+            for s in part.get("signals", []):
+                signals.setdefault(signal_id(s), s)
+        scored = list(signals.values())
+        cross_boost(scored)
+        scored.sort(key=lambda s: (s.get("ts") or "", s.get("score", 0), signal_id(s)), reverse=True)
+
+        prev = read_json(DATA_JSON, {})
+        with_prices = [p for p in parts if "prices" in p]
+        prices = [r for p in with_prices for r in p["prices"]]
+        trend = [r for p in with_prices for r in p["trend"]]
+        # priser lagres rå i delfilene; kolonneformatet avgjøres her
+        prices_out = _by_ticker(price_outputs(prices), prev.get("prices", []), u.tickers)
+        trend_blocks = _by_ticker(trend, prev.get("trend", []), u.tickers)
+        timings = {**prev.get("timings", {}), **_merge_timings(parts)}
+
+    state = read_json(STATE_JSON, {"last_run": None})
+    new_for_alert = new_alerts(scored, state)
+    send_alerts(new_for_alert)
+    touched = publish_signals(scored)
+    counts = {"signals_today": len(new_for_alert), "signals_total": len(scored)}
+    publish_data(prices_out, trend_blocks, counts, timings)
+    publish_feed(prices_out, trend_blocks, counts, touched)
+    mark_run(state)
+    with metrics.span("notify"):
+        if not flush_notifier():
+            print("[notifier] usendte meldinger ligger i outbox til neste kjøring")
+
+    print(f"Radar ferdig ({len(parts)}/{n} shards) • {round(time.time()-started,1)}s • {len(new_for_alert)} nye signaler")
+    write_metrics()
+
+def _shard_worker(i, n, sources):
+    run_shard(i, n, sources)
+    return i
+
+def run_shards_local(n, sources, workers=None):
+    """Alle n shards som egne prosesser på denne maskinen, deretter merge."""
+    from concurrent.futures import ProcessPoolExecutor
+    # gamle delfiler må ikke blandes inn hvis en shard dør
+    for i in range(n):
+        if os.path.exists(shard_path(i, n)):
+            os.remove(shard_path(i, n))
+    with ProcessPoolExecutor(max_workers=min(n, workers or os.cpu_count() or 1)) as pool:
+        futures = [pool.submit(_shard_worker, i, n, sources) for i in range(n)]
+        for f in futures:
+            try:
+                f.result()
+            except Exception as e:
+                print(f"[WARN] shard feilet: {e}")
+    merge_shards(n)
+
+# ------------------------------- MAIN --------------------------------
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m src.main", description="Quantum radar: hent, scor, publiser.")
+    ap.add_argument("--sources", default=",".join(SOURCES),
+                    help=f"kommaseparerte kilder (standard: alle) – {', '.join(SOURCES)}")
+    ap.add_argument("--alerts-only", action="store_true",
+                    help="send bare varsler som ligger i outbox, uten henting/publisering")
+    ap.add_argument("--profile-imports", action="store_true",
+                    help="skriv ut importtid per modul")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--shard", metavar="I/N",
+                      help="kjør bare shard I av N og skriv delfil i data/shards (for én node per shard)")
+    mode.add_argument("--merge", type=int, metavar="N",
+                      help="slå sammen delfilene fra N shards og publiser")
+    mode.add_argument("--shards", type=int, metavar="N",
+                      help="kjør N shards som egne prosesser lokalt og slå sammen")
+    ap.add_argument("--workers", type=int, help="maks antall prosesser for --shards")
+    args = ap.parse_args(argv)
+    if args.shard:
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as e:
+            ap.error(str(e))
+    for opt in ("merge", "shards"):
+        if getattr(args, opt) is not None and getattr(args, opt) < 1:
+            ap.error(f"--{opt} må være minst 1")
+    args.sources = [x.strip() for x in args.sources.split(",") if x.strip()]
+    unknown = [x for x in args.sources if x not in SOURCES]
+    if unknown:
+        ap.error(f"ukjente kilder: {', '.join(unknown)}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    started = time.time()
+
+    if args.alerts_only:
+        ok = flush_notifier()
+        print(f"Varsler ferdig • {round(time.time()-started,1)}s • {'alt sendt' if ok else 'usendte i outbox'}")
+        if args.profile_imports:
+            print_import_profile()
+        return
+    if args.shard or args.merge or args.shards:
+        if args.shard:
+            run_shard(*args.shard, args.sources)
+        elif args.merge:
+            merge_shards(args.merge)
+        else:
+            run_shards_local(args.shards, args.sources, args.workers)
+        if args.profile_imports:
+            print_import_profile()
+        return
+
+    # 1-6) Kilder → dedup → trend → score → signal-lager → varsler, som én
+    #      strøm (trend inkrementelt fra lagret indikator-tilstand)
+    state = read_json(STATE_JSON, {"last_run": None})
+    ind_states = load_indicator_states(INDICATORS_JSON) if "prices" in args.sources else None
+    prices_out, trend_blocks, counts, timings, touched = stream_run(args.sources, state, ind_states)
+
+    # 7) data.json og delta-feeden. Uten priser i denne kjøringen beholdes priser/trend fra
+    #    forrige data.json.
+    if ind_states is None:
+        prev = read_json(DATA_JSON, {})
+        prices_out, trend_blocks = prev.get("prices", []), prev.get("trend", [])
+        timings = {**prev.get("timings", {}), **timings}
+    publish_data(prices_out, trend_blocks, counts, timings)
+    publish_feed(prices_out, trend_blocks, counts, touched)
+    if ind_states is not None:
+        save_indicator_states(INDICATORS_JSON, ind_states)
+        prices_out.close()
+        trend_blocks.close()
+    mark_run(state)
+
+    # 8) Vent på varslene som ble sendt i bakgrunnen mens filene ble skrevet
+    with metrics.span("notify"):
+        if not flush_notifier():
+            print("[notifier] usendte meldinger ligger i outbox til neste kjøring")
+
+    print(f"Radar ferdig • {round(time.time()-started,1)}s • {counts['signals_today']} nye signaler")
+    write_metrics()
+    if args.profile_imports:
+        print_import_profile()
 
-    print(f"Radar ferdig • {round(time.time()-started,1)}s • {len(new_for_alert)} nye signaler")
+IMPORT_TIMES["src.main"] = time.perf_counter() - _T0
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,126 @@
+# src/metrics.py
+# Instrumentering: spans per steg/kilde og tellere (HTTP-kall, bytes,
+# cache-treff, retries, items, feil). Alt aggregeres i minnet (trådsikkert)
+# og skrives som én rad per kjøring i docs/metrics.json med rullerende
+# historikk, og valgfritt som Prometheus-tekstfil.
+
+from __future__ import annotations
+import json, os, threading, time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from src.artifacts import write_artifact
+
+_lock = threading.Lock()
+_spans: Dict[tuple, List[float]] = {}          # (steg, kilde) → [sekunder, kall, feil]
+_counters: Dict[str, Dict[str, float]] = {}    # navn → {nøkkel: verdi}
+_started = time.monotonic()
+
+def inc(name: str, key: str = "", n: float = 1):
+    with _lock:
+        c = _counters.setdefault(name, {})
+        c[key] = c.get(key, 0) + n
+
+def record(stage: str, secs: float, source: str = "", error: bool = False):
+    with _lock:
+        s = _spans.setdefault((stage, source), [0.0, 0, 0])
+        s[0] += secs; s[1] += 1; s[2] += int(error)
+
+@contextmanager
+def span(stage: str, source: str = ""):
+    """Måler tiden i blokken. Gjentatte spans med samme (steg, kilde) summeres."""
+    t0 = time.monotonic()
+    err = False
+    try:
+        yield
+    except BaseException:
+        err = True
+        raise
+    finally:
+        record(stage, time.monotonic() - t0, source, err)
+
+def snapshot() -> dict:
+    with _lock:
+        spans = {}
+        for (stage, source), (secs, calls, errors) in sorted(_spans.items()):
+            spans[f"{stage}/{source}" if source else stage] = {
+                "secs": round(secs, 3), "calls": calls, "errors": errors}
+        counters = {name: {k: (round(v, 3) if isinstance(v, float) else v) for k, v in sorted(c.items())}
+                    for name, c in sorted(_counters.items())}
+    return {
+        "ts": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "secs": round(time.monotonic() - _started, 2),
+        "spans": spans,
+        "counters": counters,
+    }
+
+def absorb(snap: dict):
+    """Legger et snapshot fra en annen prosess (f.eks. en shard) til tallene her."""
+    with _lock:
+        for key, v in snap.get("spans", {}).items():
+            stage, _, source = key.partition("/")
+            s = _spans.setdefault((stage, source), [0.0, 0, 0])
+            s[0] += v["secs"]; s[1] += v["calls"]; s[2] += v["errors"]
+        for name, c in snap.get("counters", {}).items():
+            mine = _counters.setdefault(name, {})
+            for k, n in c.items():
+                mine[k] = mine.get(k, 0) + n
+
+def reset():
+    global _started
+    with _lock:
+        _spans.clear(); _counters.clear()
+        _started = time.monotonic()
+
+def summary(snap: dict) -> str:
+    stages = [(k, v["secs"]) for k, v in snap["spans"].items() if "/" not in k]
+    parts = [f"{k} {secs:.1f}s" for k, secs in stages]
+    http = sum(snap["counters"].get("http_requests", {}).values())
+    hits = sum(snap["counters"].get("http_cache_hits", {}).values())
+    mb = sum(snap["counters"].get("http_bytes", {}).values()) / 1e6
+    errors = sum(snap["counters"].get("errors", {}).values())
+    parts.append(f"http {http} kall/{hits} cache/{mb:.1f} MB")
+    parts.append(f"{errors} feil")
+    return " • ".join(parts)
+
+def _label(v) -> str:
+    """Etikettverdi i Prometheus' tekstformat: \\, " og linjeskift escapes."""
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def to_prometheus(snap: dict, prefix: str = "radar") -> str:
+    lines = [f"# TYPE {prefix}_stage_seconds gauge"]
+    for key, v in snap["spans"].items():
+        stage, _, source = key.partition("/")
+        lines.append(f'{prefix}_stage_seconds{{stage="{_label(stage)}",source="{_label(source)}"}} {v["secs"]}')
+    lines.append(f"# TYPE {prefix}_stage_errors gauge")
+    for key, v in snap["spans"].items():
+        stage, _, source = key.partition("/")
+        lines.append(f'{prefix}_stage_errors{{stage="{_label(stage)}",source="{_label(source)}"}} {v["errors"]}')
+    for name, c in snap["counters"].items():
+        lines.append(f"# TYPE {prefix}_{name} gauge")
+        for k, v in c.items():
+            lines.append(f'{prefix}_{name}{{key="{_label(k)}"}} {v}')
+    lines.append(f"# TYPE {prefix}_run_seconds gauge")
+    lines.append(f"{prefix}_run_seconds {snap['secs']}")
+    return "\n".join(lines) + "\n"
+
+def write(path: str, history: int, prom_path: str = "") -> dict:
+    """Legger kjøringens snapshot til historikken i `path` (siste `history`
+    kjøringer beholdes), skriver evt. Prometheus-fil og nullstiller."""
+    snap = snapshot()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            runs = json.load(f).get("runs", [])
+    except Exception:
+        runs = []
+    runs = (runs + [snap])[-history:]
+    write_artifact(path, {"runs": runs}, compress=False)
+    if prom_path:
+        os.makedirs(os.path.dirname(prom_path) or ".", exist_ok=True)
+        tmp = prom_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(to_prometheus(snap))
+        os.replace(tmp, prom_path)
+    reset()
+    return snap
@@ -1,58 +1,185 @@
-import os
-import json
-import urllib.request
-
-def _post(url, payload, headers):
-    req = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"), headers=headers, method="POST")
-    try:
-        with urllib.request.urlopen(req, timeout=15) as r:
-            _ = r.read()
-            return True
-    except Exception as e:
-        print(f"[notifier] POST feilet: {e}")
+import os, json, hashlib, queue, threading, time, uuid
+from src import metrics
+from src.config import NOTIFIER_JSON
+from src.http_client import post
+
+DISCORD_API = "https://discord.com/api/v10"
+MAX_LEN = 2000          # Discords grense per melding
+MAX_ATTEMPTS = 5        # kjøringer en melding får prøve før den droppes fra outbox
+
+_q = queue.Queue()
+_lock = threading.Lock()
+_worker = None
+_state = None           # {"outbox": {id: msg}, "dm_channels": {user-hash: channel_id}}
+
+def chunk_message(message: str, limit: int = MAX_LEN):
+    """Deler en melding i biter ≤ limit tegn, helst på linjeskift."""
+    chunks, cur = [], ""
+    for line in message.split("\n"):
+        while len(line) > limit:                      # altfor lang linje: hard splitt
+            if cur:
+                chunks.append(cur); cur = ""
+            chunks.append(line[:limit]); line = line[limit:]
+        cand = line if not cur else cur + "\n" + line
+        if len(cand) > limit:
+            chunks.append(cur); cur = line
+        else:
+            cur = cand
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+# ---------- persistent tilstand (outbox + DM-kanaler) ----------
+
+def _load():
+    global _state
+    if _state is None:
+        try:
+            with open(NOTIFIER_JSON, "r", encoding="utf-8") as f:
+                _state = json.load(f)
+        except Exception:
+            _state = {}
+        _state.setdefault("outbox", {}); _state.setdefault("dm_channels", {})
+    return _state
+
+def _save():
+    with _lock:
+        st = _load()
+        os.makedirs(os.path.dirname(NOTIFIER_JSON), exist_ok=True)
+        tmp = NOTIFIER_JSON + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(st, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, NOTIFIER_JSON)
+
+def _user_key(user_id):
+    # bruker-ID er en secret; lagre kun hash
+    return hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:16]
+
+# ---------- levering ----------
+
+def _respect_bucket(r):
+    # Discord sier fra før vi treffer 429: tomt bucket → vent til reset
+    if r.headers.get("X-RateLimit-Remaining") == "0":
+        try:
+            time.sleep(min(float(r.headers.get("X-RateLimit-Reset-After", "0")), 60))
+        except ValueError:
+            pass
+
+def _dm_channel(token, user_id, auth):
+    st = _load()
+    key = _user_key(user_id)
+    ch = st["dm_channels"].get(key)
+    if ch:
+        return ch
+    r = post(f"{DISCORD_API}/users/@me/channels", json={"recipient_id": user_id}, headers=auth, timeout=15)
+    r.raise_for_status()
+    ch = r.json()["id"]
+    with _lock:
+        st["dm_channels"][key] = ch
+    _save()
+    return ch
+
+def _deliver(msg):
+    content = msg["content"]
+    if msg["target"] == "webhook":
+        webhook = os.getenv("DISCORD_WEBHOOK")
+        if not webhook:
+            return False
+        r = post(webhook, json={"content": content}, headers={"Content-Type":"application/json"}, timeout=15)
+        _respect_bucket(r)
+        return r.ok
+    token, user_id = os.getenv("DISCORD_BOT_TOKEN"), os.getenv("DISCORD_DM_USER_ID")
+    if not (token and user_id):
         return False
+    auth = {"Authorization": f"Bot {token}", "Content-Type":"application/json"}
+    for _ in range(2):
+        ch = _dm_channel(token, user_id, auth)
+        r = post(f"{DISCORD_API}/channels/{ch}/messages", json={"content": content}, headers=auth, timeout=15)
+        _respect_bucket(r)
+        if r.status_code in (403, 404):   # utdatert kanal: opprett på nytt
+            with _lock:
+                _load()["dm_channels"].pop(_user_key(user_id), None)
+            continue
+        return r.ok
+    return False
+
+def _run():
+    while True:
+        mid = _q.get()
+        try:
+            msg = _load()["outbox"].get(mid)
+            if msg is None:
+                continue
+            try:
+                ok = _deliver(msg)
+            except Exception as e:
+                print(f"[notifier] sending feilet: {e}")
+                ok = False
+            with _lock:
+                if ok:
+                    _load()["outbox"].pop(mid, None)
+                else:
+                    msg["attempts"] = msg.get("attempts", 0) + 1
+                    if msg["attempts"] >= MAX_ATTEMPTS:
+                        print(f"[notifier] gir opp melding etter {msg['attempts']} forsøk")
+                        _load()["outbox"].pop(mid, None)
+            metrics.inc("notify_sent" if ok else "notify_failed", msg["target"])
+            print(f"[notifier] {msg['target']} {'OK' if ok else 'FAIL'}")
+            _save()
+        finally:
+            _q.task_done()
+
+def _ensure_worker():
+    global _worker
+    with _lock:
+        if _worker is None:
+            st = _load()
+            _worker = threading.Thread(target=_run, name="notifier", daemon=True)
+            _worker.start()
+            # meldinger som ikke kom fram i forrige kjøring sendes først
+            for mid in sorted(st["outbox"], key=lambda m: st["outbox"][m].get("queued", 0)):
+                _q.put(mid)
 
 def send_discord(message: str):
-    """Sender melding til Discord.
+    """Legger melding i send-køen (sendes i bakgrunnen, se flush()).
        1) Hvis DISCORD_WEBHOOK finnes → bruk webhook
        2) Ellers hvis BOT-token + DM user id finnes → send DM
        3) Ellers: bare print (bygg feiler ikke)
+       Lange meldinger deles i biter under 2000 tegn.
     """
-    webhook = os.getenv("DISCORD_WEBHOOK")
-    token = os.getenv("DISCORD_BOT_TOKEN")
-    user_id = os.getenv("DISCORD_DM_USER_ID")
-
-    if webhook:
-        ok = _post(webhook, {"content": message}, {"Content-Type":"application/json"})
-        print("[notifier] webhook OK" if ok else "[notifier] webhook FAIL")
-        return ok
+    if os.getenv("DISCORD_WEBHOOK"):
+        target = "webhook"
+    elif os.getenv("DISCORD_BOT_TOKEN") and os.getenv("DISCORD_DM_USER_ID"):
+        target = "dm"
+    else:
+        print("[notifier] Ingen webhook/BOT secrets – printer melding:\n" + message)
+        return True
+    _ensure_worker()
+    now = time.time()
+    ids = []
+    with _lock:
+        for i, part in enumerate(chunk_message(message)):
+            mid = uuid.uuid4().hex
+            _load()["outbox"][mid] = {"target": target, "content": part, "queued": now + i * 1e-3, "attempts": 0}
+            ids.append(mid)
+    _save()                       # persistert før sending: overlever krasj
+    for mid in ids:
+        _q.put(mid)
+    return True
 
-    if token and user_id:
-        try:
-            # 1) Opprett (eller hent) DM kanal
-            req = urllib.request.Request(
-                "https://discord.com/api/v10/users/@me/channels",
-                data=json.dumps({"recipient_id": user_id}).encode("utf-8"),
-                headers={"Authorization": f"Bot {token}", "Content-Type":"application/json"},
-                method="POST"
-            )
-            with urllib.request.urlopen(req, timeout=15) as r:
-                dm = json.loads(r.read().decode("utf-8"))
-                ch_id = dm["id"]
-            # 2) Send melding
-            req2 = urllib.request.Request(
-                f"https://discord.com/api/v10/channels/{ch_id}/messages",
-                data=json.dumps({"content": message}).encode("utf-8"),
-                headers={"Authorization": f"Bot {token}", "Content-Type":"application/json"},
-                method="POST"
-            )
-            with urllib.request.urlopen(req2, timeout=15) as r2:
-                _ = r2.read()
-            print("[notifier] DM OK")
+def flush(timeout: float = 60.0) -> bool:
+    """Venter til køen er tom (eller timeout). True hvis alt ble sendt.
+    Meldinger igjen i outbox fra tidligere kjøringer sendes også."""
+    if _worker is None:
+        if not _load()["outbox"]:
             return True
-        except Exception as e:
-            print(f"[notifier] DM FAIL: {e}")
-            return False
-
-    print("[notifier] Ingen webhook/BOT secrets – printer melding:\n" + message)
-    return True
+        _ensure_worker()
+    end = time.monotonic() + timeout
+    with _q.all_tasks_done:
+        while _q.unfinished_tasks:
+            left = end - time.monotonic()
+            if left <= 0:
+                break
+            _q.all_tasks_done.wait(left)
+    _save()
+    return not _load()["outbox"]
@@ -0,0 +1,194 @@
+# src/replay.py
+# Record/replay av kildene, slik at pipeline kan kjøres og måles uten nett.
+#
+#   python -m src.replay record [--fixtures DIR] [-- --sources prices,news ...]
+#   python -m src.replay replay [--fixtures DIR] [-- --sources prices,news ...]
+#
+# record kjører src.main mot de ekte API-ene og lagrer hvert 200-svar som
+# fixture. replay starter en lokal stub-server som svarer fra fixturene, og
+# http_client sender alle kall dit. Begge kjører i en tom arbeidskatalog
+# (data/ og docs/ er relative stier), så vannmerker, kurslager og dashboard i
+# repoet ikke røres, og kildene gjør sin fulle første henting.
+
+from __future__ import annotations
+import argparse, hashlib, json, os, sys, tempfile, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src import http_client
+from src.config import REPLAY_DIR
+
+# Parametre som endrer seg fra kjøring til kjøring (datoer, vannmerker);
+# fixtures matches også uten dem.
+VOLATILE_PARAMS = {"d1", "d2", "startdatetime", "enddatetime"}
+KEEP_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+def _key(method: str, url: str) -> str:
+    return f"{method.upper()} {url}"
+
+def _loose_key(method: str, url: str) -> str:
+    p = urlsplit(url)
+    q = urlencode([(k, v) for k, v in parse_qsl(p.query, keep_blank_values=True) if k not in VOLATILE_PARAMS])
+    return _key(method, urlunsplit((p.scheme, p.netloc, p.path, q, "")))
+
+class Fixtures:
+    """Katalog med index.json (nøkkel → metadata) og én .body-fil per svar."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.lock = threading.Lock()
+        try:
+            with open(os.path.join(root, "index.json"), "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+        self.loose = {_loose_key(*k.split(" ", 1)): k for k in self.index}
+
+    def add(self, method: str, url: str, status: int, headers: dict, body: bytes):
+        key = _key(method, url)
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()[:24] + ".body"
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, name), "wb") as f:
+            f.write(body)
+        with self.lock:
+            self.index[key] = {"status": status, "file": name,
+                               "headers": {h: headers[h] for h in KEEP_HEADERS if h in headers}}
+            self.loose[_loose_key(method, url)] = key
+
+    def get(self, method: str, url: str):
+        """(status, headers, body) for kallet, eller None."""
+        key = _key(method, url)
+        meta = self.index.get(key) or self.index.get(self.loose.get(_loose_key(method, url), ""))
+        if meta is None:
+            return None
+        with open(os.path.join(self.root, meta["file"]), "rb") as f:
+            return meta["status"], meta["headers"], f.read()
+
+    def save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = os.path.join(self.root, "index.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, os.path.join(self.root, "index.json"))
+
+# ---------- stub-server ----------
+
+def _original_url(path: str) -> str:
+    # /https/stooq.com/q/l/?s=... → https://stooq.com/q/l/?s=...
+    scheme, _, rest = path.lstrip("/").partition("/")
+    return f"{scheme}://{rest}"
+
+class StubServer:
+    """Lokal HTTP-server som svarer fra fixtures; ukjente URL-er gir 404."""
+
+    def __init__(self, fixtures: Fixtures, host: str = "127.0.0.1", port: int = 0):
+        self.fixtures = fixtures
+        self.misses = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"      # keep-alive, som mot de ekte API-ene
+            disable_nagle_algorithm = True     # headers og body skrives hver for seg
+
+            def _serve(self):
+                n = int(self.headers.get("Content-Length") or 0)
+                if n:
+                    self.rfile.read(n)
+                url = _original_url(self.path)
+                hit = stub.fixtures.get(self.command, url)
+                if hit is None:
+                    stub.misses.append(url)
+                    self.send_response(404); self.send_header("Content-Length", "0"); self.end_headers()
+                    return
+                status, headers, body = hit
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            do_GET = do_POST = _serve
+
+            def log_message(self, *a):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.base = f"http://{host}:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="replay-stub", daemon=True)
+
+    def redirect(self, url: str) -> str:
+        p = urlsplit(url)
+        return f"{self.base}/{p.scheme}/{p.netloc}{p.path}" + (f"?{p.query}" if p.query else "")
+
+    def __enter__(self):
+        self.thread.start()
+        http_client.set_replay(redirect=self.redirect)
+        return self
+
+    def __exit__(self, *exc):
+        http_client.set_replay()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+# ---------- record ----------
+
+class Recorder:
+    def __init__(self, fixtures: Fixtures):
+        self.fixtures = fixtures
+        self.count = 0
+
+    def tap(self, method: str, url: str, r):
+        if r.status_code == 200:
+            self.fixtures.add(method, url, r.status_code, r.headers, r.content)
+            self.count += 1
+
+    def __enter__(self):
+        http_client.set_replay(tap=self.tap)
+        return self
+
+    def __exit__(self, *exc):
+        http_client.set_replay()
+        self.fixtures.save()
+
+# ---------- CLI ----------
+
+def scratch_dir(path: str):
+    """Gjør `path` til arbeidskatalog med tomme data/ og docs/."""
+    for d in ("data", "docs"):
+        os.makedirs(os.path.join(path, d), exist_ok=True)
+    os.chdir(path)
+
+def _in_scratch_dir(fn):
+    old = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="radar-replay-") as tmp:
+        scratch_dir(tmp)
+        try:
+            return fn()
+        finally:
+            os.chdir(old)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m src.replay", description="Record/replay av kildene for kjøring uten nett.")
+    ap.add_argument("mode", choices=("record", "replay"))
+    ap.add_argument("--fixtures", default=REPLAY_DIR, help=f"fixture-katalog (standard: {REPLAY_DIR})")
+    argv = list(sys.argv[1:] if argv is None else argv)
+    split = argv.index("--") if "--" in argv else len(argv)
+    args, main_args = ap.parse_args(argv[:split]), argv[split + 1:]   # etter -- : argumenter til src.main
+    fixtures = Fixtures(os.path.abspath(args.fixtures))
+
+    from src import main as radar
+    if args.mode == "record":
+        with Recorder(fixtures) as rec:
+            _in_scratch_dir(lambda: radar.main(main_args))
+        print(f"[replay] lagret {rec.count} svar i {fixtures.root}")
+    else:
+        if not fixtures.index:
+            ap.error(f"ingen fixtures i {fixtures.root} – kjør record først")
+        with StubServer(fixtures) as stub:
+            _in_scratch_dir(lambda: radar.main(main_args))
+        if stub.misses:
+            print(f"[replay] {len(stub.misses)} kall uten fixture, f.eks. {stub.misses[0]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# src/runner.py
+# Kjører alle kildene samtidig, hver med egen frist. En kilde som feiler eller
+# går over fristen degraderer til det den rakk å levere (ofte []).
+
+from __future__ import annotations
+import threading, time, traceback
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from src import metrics
+from src.config import STREAM_QUEUE
+
+# Ekstra tid vi venter etter fristen før kilden gis opp (kilden får sjansen
+# til å levere det den rakk å hente).
+GRACE = 5.0
+# Så lenge uten nye items regnes strømmen som ledig (se SourceStream.on_idle).
+IDLE_AFTER = 0.05
+
+_local = threading.local()
+
+def deadline_left() -> float | None:
+    """Sekunder igjen av fristen til kilden som kjører i denne tråden."""
+    d = getattr(_local, "deadline", None)
+    return None if d is None else d - time.monotonic()
+
+def expired() -> bool:
+    """True når kilden i denne tråden har brukt opp fristen sin.
+    Kildene sjekker dette mellom kall og returnerer det de har."""
+    left = deadline_left()
+    return left is not None and left <= 0
+
+def inherit_deadline(fn: Callable) -> Callable:
+    """Pakker fn slik at den får samme frist som tråden som pakker den
+    (for kilder som bruker egne trådpooler)."""
+    d = getattr(_local, "deadline", None)
+    def wrapped(*a, **k):
+        _local.deadline = d
+        try:
+            return fn(*a, **k)
+        finally:
+            _local.deadline = None
+    return wrapped
+
+@dataclass
+class Job:
+    name: str
+    fn: Callable | None
+    args: tuple = ()
+    kwargs: dict = field(default_factory=dict)
+    deadline: float = 60.0
+
+
+_DONE = object()
+
+class _Buffer:
+    """Begrenset buffer mellom kildetrådene og mottakeren. Mottakeren tar ut
+    alt som ligger der i én operasjon, og kildene vekker den bare når den
+    står og venter, så en rask kilde ikke betaler en trådbytte per item."""
+
+    def __init__(self, maxsize: int):
+        self.cond = threading.Condition()
+        self.items: list = []        # (kilde, item eller _DONE)
+        self.maxsize = max(1, maxsize)
+        self.waiting = False
+
+    def put(self, name: str, item, stop: threading.Event) -> bool:
+        """Blokkerer når bufferen er full; gir opp når kilden er stoppet."""
+        with self.cond:
+            while len(self.items) >= self.maxsize and not stop.is_set():
+                self.cond.wait(0.2)
+            if stop.is_set():
+                return False
+            self.items.append((name, item))
+            if self.waiting:
+                self.cond.notify_all()
+        return True
+
+    def take(self, timeout: float) -> list:
+        """Alt som ligger i bufferen; venter opptil `timeout` hvis den er tom."""
+        with self.cond:
+            if not self.items and timeout > 0:
+                self.waiting = True
+                self.cond.wait(timeout)
+                self.waiting = False
+            out, self.items = self.items, []
+            if out:
+                self.cond.notify_all()       # plass igjen for kildene
+            return out
+
+def _pump(job: Job, buf: _Buffer, stop: threading.Event, box: dict):
+    """Kjører kilden og legger item for item i bufferen. Kilden kan være en
+    generator (items går videre mens den henter) eller returnere en liste."""
+    _local.deadline = time.monotonic() + job.deadline
+    t0 = time.monotonic()
+    result = None
+    try:
+        if job.fn is None:
+            raise RuntimeError(f"{job.name} modul ikke tilgjengelig")
+        result = job.fn(*job.args, **job.kwargs) or []
+        for item in result:
+            if not buf.put(job.name, item, stop):
+                break
+            box["items"] += 1
+        else:
+            box["status"] = "ok"
+    except Exception as e:
+        print(f"[WARN] {job.name} feilet: {e}")
+        traceback.print_exc()
+    finally:
+        if hasattr(result, "close"):
+            result.close()      # generatoren rydder (vannmerker settes ikke for halve grupper)
+        box["secs"] = time.monotonic() - t0
+        _local.deadline = None
+        buf.put(job.name, _DONE, stop)
+
+class SourceStream:
+    """Alle kildene samtidig, som én strøm av (kilde, item) gjennom en
+    begrenset buffer: nedstrøms steg starter med én gang, og en treg mottaker
+    bremser kildene i stedet for at alt samles i minnet. En kilde som går
+    over fristen gis opp; det den rakk å levere er allerede sendt videre.
+    `on_idle` kalles før strømmen venter på kildene (f.eks. for å skrive ut
+    en halvfull batch). `timings` er klar når strømmen er lest ut."""
+
+    def __init__(self, jobs: List[Job], maxsize: int = STREAM_QUEUE, on_idle: Callable | None = None):
+        self.jobs = jobs
+        self.maxsize = maxsize
+        self.on_idle = on_idle
+        self.timings: Dict[str, dict] = {}
+
+    def __iter__(self) -> Iterator[Tuple[str, object]]:
+        started = time.monotonic()
+        buf = _Buffer(self.maxsize)
+        stops, boxes, pending = {}, {}, {}
+        for job in self.jobs:
+            stops[job.name] = threading.Event()
+            boxes[job.name] = {"status": "error", "items": 0}
+            pending[job.name] = started + job.deadline + GRACE
+            # daemon-tråder: en kilde som henger skal ikke holde prosessen i live
+            threading.Thread(target=_pump, args=(job, buf, stops[job.name], boxes[job.name]),
+                             name=f"src-{job.name}", daemon=True).start()
+        try:
+            while pending:
+                now = time.monotonic()
+                for name, limit in list(pending.items()):
+                    if now >= limit:
+                        job = next(j for j in self.jobs if j.name == name)
+                        print(f"[WARN] {name} over fristen ({job.deadline:g}s) – hopper over resten")
+                        stops[name].set()
+                        del pending[name]
+                        self.timings[name] = {"secs": round(now - started, 2),
+                                              "items": boxes[name]["items"], "status": "timeout"}
+                if not pending:
+                    break
+                batch = buf.take(min(IDLE_AFTER, min(pending.values()) - now))
+                if not batch:
+                    if self.on_idle is not None:
+                        self.on_idle()
+                    batch = buf.take(min(pending.values()) - time.monotonic())
+                for name, item in batch:
+                    if name not in pending:
+                        continue
+                    if item is _DONE:
+                        del pending[name]
+                        box = boxes[name]
+                        self.timings[name] = {"secs": round(box.get("secs", 0.0), 2),
+                                              "items": box["items"], "status": box["status"]}
+                        continue
+                    yield name, item
+        finally:
+            for stop in stops.values():
+                stop.set()
+            for name in pending:       # mottakeren stoppet før kilden var ferdig
+                self.timings[name] = {"secs": round(time.monotonic() - started, 2),
+                                      "items": boxes[name]["items"], "status": "error"}
+            self._report()
+
+    def _report(self):
+        for job in self.jobs:
+            t = self.timings.get(job.name)
+            if t is None:
+                continue
+            print(f"[fetch] {job.name:<8} {t['secs']:>6.1f}s • {t['items']} items • {t['status']}")
+            metrics.record("fetch", t["secs"], job.name, error=t["status"] != "ok")
+            metrics.inc("items", job.name, t["items"])
+            if t["status"] != "ok":
+                metrics.inc("errors", job.name)
+
+def run_sources(jobs: List[Job]) -> Tuple[Dict[str, list], Dict[str, dict]]:
+    """Starter alle jobbene i egne tråder og samler resultatene.
+    Returnerer (resultater per kilde, timing per kilde)."""
+    stream = SourceStream(jobs)
+    results = {job.name: [] for job in jobs}
+    for name, item in stream:
+        results[name].append(item)
+    return results, stream.timings
@@ -1,10 +1,54 @@
-import feedparser, time
-API="http://export.arxiv.org/api/query?search_query={q}&start=0&max_results=10&sortBy=submittedDate&sortOrder=descending"
-def fetch_arxiv(queries):
+from urllib.parse import quote
+from src.config import RADAR_DB, ARXIV_PAGE_SIZE, ARXIV_MAX_PAGES
+from src.http_client import get
+from src.runner import expired
+from src import metrics
+from src.sources.planner import merge_keywords, pack, attribute
+from src.store.watermarks import Watermarks
+API="http://export.arxiv.org/api/query?search_query={q}&start={start}&max_results={n}&sortBy=submittedDate&sortOrder=descending"
+MAX_QUERY=300
+def _term(q):
+    """Som baseline: ordene i spørringen AND-es, ikke som frase."""
+    w=q.split()
+    return f"all:{w[0]}" if len(w)==1 else "("+" AND ".join(f"all:{x}" for x in w)+")"
+def _minute(ts): return ts[:16].replace("-","").replace("T","").replace(":","")   # 2025-10-13T17:59:55Z → 202510131759
+def _fetch_group(group, since, before=None):
+    """Blar nyest-først til vi passerer vannmerket. Fortsetter vi en gjennomgang,
+    begrenses søket til submittedDate ned fra `before` (minuttet tas med; det
+    som alt er hentet derfra, fjernes av nær-duplikat-filteret).
+    Returnerer (items, komplett?)."""
+    import feedparser
+    q=" OR ".join(_term(t) for t in group)
+    if before:
+        q=f"({q}) AND submittedDate:[{_minute(since)} TO {_minute(before)}]"
+    q=quote(q, safe=':()')
     out=[]
-    for q in queries:
-        url=API.format(q=q.replace(" ","+")); feed=feedparser.parse(url)
-        for e in feed.entries[:10]:
-            out.append({"source":"arXiv","title":e.get("title",""),"link":e.get("link",""),"published":e.get("published",""),"summary":e.get("summary","")[:500],"query":q})
-        time.sleep(0.8)
-    return out
+    for page in range(ARXIV_MAX_PAGES if since else 1):
+        if expired(): return out, False
+        r=get(API.format(q=q, start=page*ARXIV_PAGE_SIZE, n=ARXIV_PAGE_SIZE), timeout=30, cached=True)
+        if r.status_code!=200: return out, False
+        with metrics.span("parse","arxiv"): entries=feedparser.parse(r.content).entries
+        for e in entries:
+            pub=e.get("published","")
+            if since and pub<=since: return out, True
+            out.append({"source":"arXiv","title":e.get("title",""),"link":e.get("link",""),"published":pub,"summary":e.get("summary","")[:500]})
+        if len(entries)<ARXIV_PAGE_SIZE: return out, True
+    return out, since is None
+def iter_arxiv(queries):
+    """Items gruppe for gruppe; vannmerket (eller markøren, når sidetaket nås)
+    settes først når gruppen er levert videre."""
+    wm=Watermarks(RADAR_DB)
+    try:
+        for group in pack(merge_keywords(queries, phrases=False), _term, MAX_QUERY):
+            key="arxiv|"+"|".join(sorted(t.lower() for t in group))
+            since, (before, _)=wm.get(key), wm.cursor(key)
+            try: items, complete=_fetch_group(group, since, before)
+            except Exception: continue
+            attribute(items, queries, lambda a: a["title"]+" "+a["summary"], "query", group, phrases=False)
+            yield from items
+            dates=[a["published"] for a in items if a["published"]]
+            wm.advance(key, max(dates, default=None), min(dates, default=None), complete)
+    finally:
+        wm.close()
+def fetch_arxiv(queries):
+    return list(iter_arxiv(queries))
@@ -1,14 +1,51 @@
-import requests, time
-GDELT="https://api.gdeltproject.org/api/v2/doc/doc?query={q}&mode=ArtList&maxrecords=10&format=json"
-def fetch_news(keywords):
-    out=[]
-    for kw in keywords:
-        url=GDELT.format(q=kw.replace(" ","+"))
-        try:
-            r=requests.get(url, timeout=30)
-            if r.status_code!=200: continue
-            for a in r.json().get("articles",[]):
-                out.append({"source":"GDELT","title":a.get("title",""),"url":a.get("url",""),"seendate":a.get("seendate",""),"domain":a.get("domain",""),"keyword":kw})
-        except Exception: pass
-        time.sleep(0.4)
-    return out
+from datetime import datetime, timedelta
+from urllib.parse import quote
+from src.config import RADAR_DB, NEWS_MAX_RECORDS, NEWS_MAX_PAGES
+from src.http_client import get
+from src.runner import expired
+from src import metrics
+from src.sources.planner import merge_keywords, pack, attribute
+from src.store.watermarks import Watermarks
+GDELT="https://api.gdeltproject.org/api/v2/doc/doc?query={q}&mode=ArtList&maxrecords={n}&sort=DateDesc&format=json"
+MAX_QUERY=240
+def _term(kw): return f'"{kw}"' if " " in kw or "-" in kw else kw
+def _stamp(seendate): return seendate.replace("T","").replace("Z","")   # 20251010T174500Z → 20251010174500
+def _before(seendate): return (datetime.strptime(_stamp(seendate),"%Y%m%d%H%M%S")-timedelta(seconds=1)).strftime("%Y%m%d%H%M%S")
+def _fetch_group(group, since, before=None):
+    """Henter nyest-først (eldre enn `before` når vi fortsetter en gjennomgang);
+    når en side er full, blar vi videre med enddatetime."""
+    terms=[_term(k) for k in group]
+    q=quote(terms[0] if len(terms)==1 else "("+" OR ".join(terms)+")")
+    out, end=[], _before(before) if before else None
+    for _ in range(NEWS_MAX_PAGES if since else 1):
+        if expired(): return out, False
+        url=GDELT.format(q=q, n=NEWS_MAX_RECORDS)
+        if since: url+=f"&startdatetime={_stamp(since)}"
+        if end: url+=f"&enddatetime={end}"
+        r=get(url, timeout=30, cached=not since)
+        if r.status_code!=200: return out, False
+        with metrics.span("parse","news"): arts=r.json().get("articles",[])
+        for a in arts:
+            out.append({"source":"GDELT","title":a.get("title",""),"url":a.get("url",""),"seendate":a.get("seendate",""),"domain":a.get("domain","")})
+        if len(arts)<NEWS_MAX_RECORDS: return out, True
+        end=_before(min(a.get("seendate","") for a in arts))
+    return out, since is None
+def iter_news(keywords, companies=()):
+    """Items gruppe for gruppe; vannmerket (eller markøren, når sidetaket nås)
+    settes først når gruppen er levert videre."""
+    wm=Watermarks(RADAR_DB)
+    all_kw=list(keywords)+list(companies)
+    try:
+        for group in pack(merge_keywords(all_kw, keep=companies), _term, MAX_QUERY):
+            key="news|"+"|".join(sorted(k.lower() for k in group))
+            since, (before, _)=wm.get(key), wm.cursor(key)
+            try: items, complete=_fetch_group(group, since, before)
+            except Exception: continue
+            attribute(items, all_kw, lambda a: a["title"], "keyword", group)
+            yield from items
+            dates=[a["seendate"] for a in items if a["seendate"]]
+            wm.advance(key, max(dates, default=None), min(dates, default=None), complete)
+    finally:
+        wm.close()
+def fetch_news(keywords, companies=()):
+    return list(iter_news(keywords, companies))
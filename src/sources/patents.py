@@ -1,11 +1,14 @@
-import requests, time
+from src.http_client import get
 from urllib.parse import urlencode
+from src.runner import expired
+from src import metrics
 
 PV_BASE = "https://api.patentsview.org/patents/query"
 
-def fetch_patents(keywords):
-    out = []
+def iter_patents(keywords):
     for kw in keywords:
+        if expired():
+            break
         # Spørring: finn i tittel
         q = '{"_text_any":{"patent_title":"%s"}}' % kw
         params = {
@@ -16,18 +19,21 @@ def fetch_patents(keywords):
         url = PV_BASE + "?" + urlencode(params)
 
         try:
-            r = requests.get(url, timeout=30)
+            r = get(url, timeout=30, cached=True)
             if r.status_code != 200:
                 continue
-            for p in r.json().get("patents", []):
-                out.append({
-                    "source": "PatentsView",
-                    "title": p.get("patent_title",""),
-                    "number": p.get("patent_number",""),
-                    "date": p.get("patent_date",""),
-                    "keyword": kw,
-                })
+            with metrics.span("parse", "patents"):
+                rows = r.json().get("patents") or []
         except Exception:
-            pass
-        time.sleep(0.5)
-    return out
+            continue
+        for p in rows:
+            yield {
+                "source": "PatentsView",
+                "title": p.get("patent_title",""),
+                "number": p.get("patent_number",""),
+                "date": p.get("patent_date",""),
+                "keyword": kw,
+            }
+
+def fetch_patents(keywords):
+    return list(iter_patents(keywords))
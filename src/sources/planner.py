@@ -0,0 +1,75 @@
+# src/sources/planner.py
+# Spørreplanlegger: slår sammen nøkkelord til så få OR-spørringer som API-et
+# tillater, og fordeler treffene tilbake til nøkkelordene lokalt.
+
+from __future__ import annotations
+import re
+from typing import Callable, Iterable, List
+
+from src.logic.matcher import Matcher
+
+_WORD = re.compile(r"[0-9a-z]+")
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall((text or "").lower())
+
+def merge_keywords(keywords: Iterable[str], keep: Iterable[str] = (), phrases: bool = True) -> List[str]:
+    """Unike nøkkelord (uten hensyn til store/små bokstaver), uten de som dekkes
+    av et kortere nøkkelord i en OR-spørring. Som frase dekker 'quantum computing'
+    'quantum computing error correction'; som AND-søk (phrases=False) dekker et
+    nøkkelord alle som inneholder alle ordene dets, i vilkårlig rekkefølge.
+    Nøkkelord i `keep` slås aldri bort: et selskapsnavn som 'Quantum Computing
+    Inc' må ha egne treff for å kunne knyttes til tickeren."""
+    uniq = {}
+    for kw in keywords:
+        kw = " ".join((kw or "").split())
+        if kw and kw.lower() not in uniq:
+            uniq[kw.lower()] = kw
+    keep = {" ".join(k.split()).lower() for k in keep}
+    words = {k: (k.split() if phrases else _words(k)) for k in uniq}
+    def covers(ow, w):
+        if phrases:
+            return any(w[i:i + len(ow)] == ow for i in range(len(w)))
+        return set(ow) <= set(w)
+    def covered(k):
+        if k in keep:
+            return False
+        w = words[k]
+        return any(other != k and ow and len(ow) < len(w) and covers(ow, w) for other, ow in words.items())
+    return [uniq[k] for k in uniq if not covered(k)]
+
+def pack(terms: List[str], fmt: Callable[[str], str], max_len: int, sep: str = " OR ") -> List[List[str]]:
+    """Pakker termer i grupper der den formaterte OR-spørringen holder seg under max_len."""
+    groups, cur, cur_len = [], [], 0
+    for t in terms:
+        piece = len(fmt(t))
+        extra = piece + (len(sep) if cur else 0)
+        if cur and cur_len + extra > max_len:
+            groups.append(cur); cur, cur_len = [], 0
+            extra = piece
+        cur.append(t); cur_len += extra
+    if cur:
+        groups.append(cur)
+    return groups
+
+def attribute(items: List[dict], keywords: Iterable[str], text: Callable[[dict], str],
+              field: str, fallback: List[str], phrases: bool = True) -> List[dict]:
+    """Setter `field` (mest spesifikke treff) og 'keywords' (alle treff, mest
+    spesifikke først) på hvert item ved å matche de opprinnelige nøkkelordene
+    lokalt, som fraser eller som AND av ord. Items uten lokalt treff (API-et kan
+    matche på felt vi ikke ser) får nøkkelordet bare når gruppen har ett: i en
+    sammenslått OR-gruppe vet vi ikke hvilket som traff."""
+    keywords = list(dict.fromkeys(keywords))
+    m = Matcher({"kw": keywords}) if phrases else None
+    terms = [(kw, set(_words(kw))) for kw in keywords]
+    size = {kw: len(w) for kw, w in terms}
+    for it in items:
+        if phrases:
+            hits = m.scan(text(it))["kw"]
+        else:
+            seen = set(_words(text(it)))
+            hits = [kw for kw, w in terms if w and w <= seen]
+        hits = sorted(hits, key=lambda kw: -size[kw]) or (fallback[:1] if len(fallback) == 1 else [])
+        it[field] = hits[0] if hits else ""
+        it["keywords"] = hits
+    return items
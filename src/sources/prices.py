@@ -1,12 +1,20 @@
 import csv
 import io
 import json
-import urllib.request
+from datetime import datetime, timezone
+import numpy as np
+from src.config import PRICE_STORE_DIR
+from src.http_client import get
+from src.store.prices import DTYPE, PriceStore, iso_date
+from src.runner import expired
+from src import metrics
 
-def _http_get(url, timeout=15):
-    req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-    with urllib.request.urlopen(req, timeout=timeout) as r:
-        return r.read()
+def _http_get(url, timeout=15, cached=False):
+    r = get(url, timeout=timeout, cached=cached)
+    r.raise_for_status()
+    return r.content
+
+STORE = PriceStore(PRICE_STORE_DIR)
 
 def _stooq_symbol(ticker: str) -> str:
     return f"{ticker.lower()}.us"
@@ -25,27 +33,53 @@ def fetch_quote_stooq(ticker: str):
     except Exception:
         return {"price": None, "change_pct": None}
 
-def fetch_history_stooq(ticker: str, days: int = 30):
+def _parse_stooq_csv(text: str) -> np.ndarray:
+    rows = []
+    reader = csv.reader(io.StringIO(text))
+    header = next(reader, None) or []
+    col = {name.strip().lower(): i for i, name in enumerate(header)}
+    if "date" not in col or "close" not in col:
+        return np.zeros(0, dtype=DTYPE)
+    fields = [col.get(k) for k in ("open", "high", "low", "close", "volume")]
+    for row in reader:
+        try:
+            d = int(row[col["date"]].replace("-", ""))
+            vals = [float(row[i]) if i is not None and row[i] else np.nan for i in fields]
+        except (ValueError, IndexError):
+            continue
+        rows.append((d, *vals))
+    return np.array(rows, dtype=DTYPE)
+
+def update_history_stooq(ticker: str) -> int:
+    """Henter kun bars fra og med siste lagrede dato og legger dem i lageret."""
     sym = _stooq_symbol(ticker)
     url = f"https://stooq.com/q/d/l/?s={sym}&i=d"
+    last = STORE.last_date(ticker)
+    if last is not None:
+        url += f"&d1={last}&d2={datetime.now(timezone.utc):%Y%m%d}"
+    raw = _http_get(url, cached=last is None)
+    with metrics.span("parse", "prices"):
+        rows = _parse_stooq_csv(raw.decode("utf-8", errors="ignore"))
+    return STORE.append(ticker, rows)
+
+def history_from_store(ticker: str, days: int = 30):
+    bars = STORE.tail(ticker, days)  # view i memmap
+    return [{"date": iso_date(d), "close": float(c)} for d, c in zip(bars["date"].tolist(), bars["close"].tolist())]
+
+def fetch_history_stooq(ticker: str, days: int = 30):
     try:
-        raw = _http_get(url)
-        text = raw.decode("utf-8", errors="ignore")
-        reader = csv.DictReader(io.StringIO(text))
-        closes = []
-        for row in reader:
-            try:
-                closes.append({"date": row["Date"], "close": float(row["Close"])})
-            except Exception:
-                pass
-        return closes[-days:] if len(closes) > days else closes
-    except Exception:
-        return []
+        update_history_stooq(ticker)
+    except Exception as e:
+        print(f"[WARN] historikk {ticker} feilet: {e}")
+    return history_from_store(ticker, days)
 
-def fetch_prices(tickers):
-    out = []
+def iter_prices(tickers):
     for t in tickers:
+        if expired():
+            break
         q = fetch_quote_stooq(t)
         hist = fetch_history_stooq(t, days=30)
-        out.append({"ticker": t, "price": q["price"], "change_pct": q["change_pct"], "history": hist})
-    return out
+        yield {"source": "Stooq", "ticker": t, "price": q["price"], "change_pct": q["change_pct"], "history": hist}
+
+def fetch_prices(tickers):
+    return list(iter_prices(tickers))
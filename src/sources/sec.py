@@ -1,18 +1,83 @@
-import requests
-from src.config import CIK, SEC_USER_AGENT
+import json, os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from src.config import SEC_USER_AGENT, RADAR_DB, SEC_TICKERS_JSON, SEC_BACKFILL_DAYS, SEC_WORKERS
+from src.http_client import get
+from src.runner import expired, inherit_deadline
+from src import metrics
+from src.store.watermarks import Watermarks
+from src.universe import load_universe
 BASE="https://data.sec.gov/submissions/CIK{cik}.json"
-def fetch_sec_filings():
-    headers={"User-Agent":SEC_USER_AGENT}; items=[]
-    for ticker,cik in CIK.items():
-        cik10=str(cik).zfill(10); url=BASE.format(cik=cik10)
-        try:
-            r=requests.get(url, headers=headers, timeout=30)
-            if r.status_code!=200: continue
-            j=r.json(); rec=j.get("filings",{}).get("recent",{})
-            acc,forms,dates = rec.get("accessionNumber",[]), rec.get("form",[]), rec.get("filingDate",[])
-            docs = rec.get("primaryDocument", [""]*len(acc))
-            for i in range(min(len(acc),len(forms),len(dates))):
-                items.append({"source":"SEC","ticker":ticker,"accession":acc[i],"form":forms[i],"filed":dates[i],"primaryDoc":docs[i]})
-        except Exception: 
-            continue
-    return items
+TICKERS_URL="https://www.sec.gov/files/company_tickers.json"
+
+def load_cik_map(tickers=None):
+    """ticker → CIK. CIK fra universet (config/universfil) først, deretter
+    SECs company_tickers.json (lokal fil hvis den finnes, ellers lastet ned via
+    cachen). Med `tickers` begrenses kartet til disse."""
+    out=dict(load_universe().cik)
+    bulk=None
+    try:
+        if os.path.exists(SEC_TICKERS_JSON):
+            with open(SEC_TICKERS_JSON,"r",encoding="utf-8") as f: bulk=json.load(f)
+        elif tickers and any(t not in out for t in tickers):
+            r=get(TICKERS_URL, headers={"User-Agent":SEC_USER_AGENT}, timeout=30, cached=True)
+            if r.status_code==200: bulk=r.json()
+    except Exception: bulk=None
+    rows=bulk.values() if isinstance(bulk,dict) else (bulk or [])
+    want=set(tickers) if tickers else None
+    for row in rows:
+        t=str(row.get("ticker","")).upper()
+        if t and (want is None or t in want) and t not in out:
+            out[t]=str(row.get("cik_str","")).zfill(10)
+    return {t:c for t,c in out.items() if want is None or t in want}
+
+def _new_rows(ticker, rec, mark):
+    """Rader nyere enn vannmerket ('accession|filed'). recent er sortert nyest først."""
+    acc,forms,dates = rec.get("accessionNumber",[]), rec.get("form",[]), rec.get("filingDate",[])
+    docs = rec.get("primaryDocument", [""]*len(acc))
+    last_acc, _, last_filed = (mark or "").partition("|")
+    if not mark: last_filed=(datetime.utcnow()-timedelta(days=SEC_BACKFILL_DAYS)).strftime("%Y-%m-%d")
+    items=[]
+    for i in range(min(len(acc),len(forms),len(dates))):
+        if acc[i]==last_acc: break
+        if dates[i]<last_filed: break
+        items.append({"source":"SEC","ticker":ticker,"accession":acc[i],"form":forms[i],"filed":dates[i],"primaryDoc":docs[i] if i<len(docs) else ""})
+    newest=f"{acc[0]}|{dates[0]}" if acc and dates else mark
+    return items, newest
+
+def _fetch_one(ticker, cik, mark, headers):
+    if expired(): return [], mark
+    url=BASE.format(cik=str(cik).zfill(10))
+    r=get(url, headers=headers, timeout=30, cached=True)
+    if r.status_code!=200: return [], mark
+    # Også ved 304 leses kroppen mot vannmerket: cachen lagrer kroppen når den
+    # hentes, vannmerket flyttes først når radene er levert, og en kjøring som
+    # stopper imellom ville ellers mistet radene for godt. _new_rows stopper
+    # ved første kjente rad.
+    with metrics.span("parse","sec"):
+        return _new_rows(ticker, r.json().get("filings",{}).get("recent",{}), mark)
+
+def iter_sec_filings(tickers=None):
+    """Filings per selskap etter hvert som kallene blir ferdige; vannmerket
+    settes først når radene er levert videre."""
+    headers={"User-Agent":SEC_USER_AGENT}
+    ciks=load_cik_map(tickers)
+    wm=Watermarks(RADAR_DB)
+    # Parallelle kall; token bucket for data.sec.gov holder oss under 10 req/s
+    pool=ThreadPoolExecutor(max_workers=SEC_WORKERS)
+    try:
+        marks={t:wm.get(f"sec|{str(c).zfill(10)}") for t,c in ciks.items()}
+        fetch=inherit_deadline(_fetch_one)
+        futs={pool.submit(fetch,t,c,marks[t],headers):t for t,c in ciks.items()}
+        for fut in as_completed(futs):
+            t=futs[fut]
+            try: rows,newest=fut.result()
+            except Exception: continue
+            yield from rows
+            if newest and newest!=marks[t]: wm.set(f"sec|{str(ciks[t]).zfill(10)}", newest)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        wm.close()
+
+def fetch_sec_filings(tickers=None):
+    return list(iter_sec_filings(tickers))
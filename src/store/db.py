@@ -0,0 +1,15 @@
+# src/store/db.py
+# Felles oppkobling mot radar.db. Kildene (vannmerker), strømmen (dedup,
+# signaler, varslede ID-er), feeden og shards skriver til samme fil fra flere
+# tråder og prosesser: WAL lar lesere gå uhindret mens én skriver, og alle
+# forbindelser venter like lenge på skrivelåsen.
+
+from __future__ import annotations
+import sqlite3
+
+from src.config import DB_TIMEOUT
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=DB_TIMEOUT)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
@@ -0,0 +1,73 @@
+# src/store/prices.py
+# Append-only kolonnelager for daglige kurser, én binærfil per ticker.
+# Filen er en rå rekke faste records (DTYPE) og leses som np.memmap, så
+# history-utsnitt er views inn i filen – ingen kopiering og ingen parsing.
+
+from __future__ import annotations
+import os
+import numpy as np
+
+DTYPE = np.dtype([
+    ("date", "<i4"),      # YYYYMMDD
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+_EMPTY = np.zeros(0, dtype=DTYPE)
+
+class PriceStore:
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, ticker: str) -> str:
+        return os.path.join(self.root, f"{ticker.upper()}.bin")
+
+    def bars(self, ticker: str) -> np.ndarray:
+        """Hele historikken som read-only memmap (tom array hvis ingen data)."""
+        p = self.path(ticker)
+        try:
+            n = os.path.getsize(p) // DTYPE.itemsize
+        except OSError:
+            return _EMPTY
+        if n == 0:
+            return _EMPTY
+        return np.memmap(p, dtype=DTYPE, mode="r", shape=(n,))
+
+    def tail(self, ticker: str, n: int) -> np.ndarray:
+        """Siste n bars som view (ingen kopi)."""
+        return self.bars(ticker)[-n:] if n > 0 else _EMPTY
+
+    def last_date(self, ticker: str) -> int | None:
+        b = self.bars(ticker)
+        return int(b["date"][-1]) if len(b) else None
+
+    def append(self, ticker: str, rows: np.ndarray) -> int:
+        """Legger til bars nyere enn siste lagrede. En bar med samme dato som
+        siste lagrede erstatter den (dagens bar kan ha vært ufullstendig).
+        Returnerer antall nye/oppdaterte bars.
+
+        Filen krymper aldri: lesere (backtest, daemonen) kan ha den memmappet,
+        og en fil som kortes ned under en aktiv mmap gir SIGBUS. Siste bar
+        overskrives derfor på plass, og nye bars skrives etter den."""
+        if not len(rows):
+            return 0
+        rows = np.sort(np.asarray(rows, dtype=DTYPE), order="date")
+        last = self.last_date(ticker)
+        if last is not None:
+            rows = rows[rows["date"] >= last]
+            if not len(rows):
+                return 0
+        p = self.path(ticker)
+        os.makedirs(self.root, exist_ok=True)
+        with open(p, "r+b" if os.path.exists(p) else "wb") as f:
+            size = f.seek(0, os.SEEK_END)
+            end = size - size % DTYPE.itemsize        # en halvskrevet record overskrives
+            f.seek(end - DTYPE.itemsize if last is not None and rows["date"][0] == last else end)
+            f.write(rows.tobytes())
+        return len(rows)
+
+def iso_date(d: int) -> str:
+    return f"{d // 10000:04d}-{d // 100 % 100:02d}-{d % 100:02d}"
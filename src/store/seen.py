@@ -0,0 +1,102 @@
+# src/store/seen.py
+# Dedup-lager for varslede signaler: SQLite-tabell med hashede ID-er som
+# primærnøkkel (O(1) oppslag), aldersbasert utkasting og inkrementelle
+# skrivinger – bare nye ID-er skrives, ikke hele listen.
+
+from __future__ import annotations
+import hashlib, json, time
+from typing import Iterable, List
+
+from src.store.db import connect
+
+def signal_id(s: dict) -> str:
+    """Stabil ID for et signal, avledet av feltene som også fantes i de gamle
+    signal-dictene (state.json): scorerne og migreringen bruker samme funksjon,
+    så en migrert ID treffer signalet når det kommer igjen. Prissignaler får
+    dato med, så samme ticker kan varsle igjen en annen dag. SEC-signaler får
+    accession med når den finnes, så flere filinger av samme skjema samme dag
+    holdes fra hverandre; de gamle ID-ene manglet den (se _legacy_id)."""
+    if s.get("id"):
+        return str(s["id"])
+    typ = str(s.get("type") or "")
+    f = lambda k: str(s.get(k) or "")
+    if typ == "SEC_FILING":
+        parts = ["SEC", f("ticker"), f("form"), f("filed")] + ([f("accession")] if s.get("accession") else [])
+    elif typ.startswith("PRICE_"):
+        parts = [typ, f("ticker"), f("ts")[:10]]
+    elif typ == "NEWS":
+        parts = ["NEWS", f("url") or f("title")]
+    elif typ == "ARXIV":
+        parts = ["ARXIV", f("link") or f("title")]
+    elif typ == "PATENT":
+        parts = ["PATENT", f("title"), f("date")]
+    else:
+        parts = [typ] + [f(k) for k in ("ticker", "title", "form", "filed", "link", "url")]
+    return "|".join(parts)[:512]
+
+def _legacy_id(s: dict) -> str | None:
+    """ID-en signalet hadde i state.json når den er en annen enn signal_id:
+    SEC uten accession."""
+    if s.get("type") == "SEC_FILING" and s.get("accession"):
+        return signal_id({k: s.get(k) for k in ("type", "ticker", "form", "filed")})
+    return None
+
+def _h(sig_id: str) -> bytes:
+    return hashlib.blake2b(sig_id.encode("utf-8"), digest_size=12).digest()
+
+class SeenStore:
+    def __init__(self, path: str):
+        self.conn = connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen (h BLOB PRIMARY KEY, ts INTEGER NOT NULL) WITHOUT ROWID")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS seen_ts ON seen(ts)")
+
+    def __contains__(self, sig_id: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM seen WHERE h = ?", (_h(sig_id),)).fetchone() is not None
+
+    def add_new(self, ids: Iterable[str], now: int | None = None) -> List[bool]:
+        """Legger til ID-ene og returnerer True for de som ikke var sett før
+        (også duplikater i samme batch telles bare én gang)."""
+        now = int(now or time.time())
+        out = []
+        with self.conn:
+            for sig_id in ids:
+                cur = self.conn.execute("INSERT OR IGNORE INTO seen (h, ts) VALUES (?, ?)", (_h(sig_id), now))
+                out.append(cur.rowcount == 1)
+        return out
+
+    def add_signals(self, signals: Iterable[dict], now: int | None = None) -> List[bool]:
+        """add_new for signal-dicts. Et SEC-signal regnes også som sett når
+        ID-en uten accession er migrert fra state.json: de gamle ID-ene skilte
+        ikke filinger av samme skjema samme dag, så alle slike holdes tilbake
+        til den gamle ID-en kastes ut (SEEN_TTL_DAYS)."""
+        signals = list(signals)
+        out = self.add_new((signal_id(s) for s in signals), now)
+        for i, s in enumerate(signals):
+            old = _legacy_id(s) if out[i] else None
+            if old is not None and old in self:
+                out[i] = False
+        return out
+
+    def evict(self, max_age: float, now: int | None = None) -> int:
+        cutoff = int((now or time.time()) - max_age)
+        with self.conn:
+            return self.conn.execute("DELETE FROM seen WHERE ts < ?", (cutoff,)).rowcount
+
+    def migrate_legacy(self, state: dict) -> int:
+        """Flytter gamle ID-lister fra state.json inn i lageret:
+        'signals_seen' (ID-strenger) og 'notified_ids' (serialiserte signal-dicts).
+        Fjerner nøklene fra `state`. Returnerer antall migrerte."""
+        ids = [str(x) for x in state.pop("signals_seen", None) or []]
+        for raw in state.pop("notified_ids", None) or []:
+            try:
+                ids.append(signal_id(json.loads(raw)))
+            except (TypeError, ValueError):
+                ids.append(str(raw))
+        return sum(self.add_new(ids)) if ids else 0
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
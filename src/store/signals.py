@@ -0,0 +1,131 @@
+# src/store/signals.py
+# Signalhistorikk i SQLite med indekser på ts, ticker, type og score.
+# Kjøringene gjør append-only inserts; dashboardet får kompakte JSON-shards
+# per dag i stedet for én stadig større signals.json.
+
+from __future__ import annotations
+import json, os, time
+from datetime import datetime, timezone
+from typing import Iterable, List
+
+from src.artifacts import write_artifact, to_columnar
+from src.store.db import connect
+from src.store.seen import signal_id
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    id      TEXT PRIMARY KEY,
+    ts      INTEGER NOT NULL,
+    day     TEXT NOT NULL,
+    ticker  TEXT,
+    type    TEXT NOT NULL,
+    score   INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS signals_ts     ON signals(ts);
+CREATE INDEX IF NOT EXISTS signals_ticker ON signals(ticker, ts);
+CREATE INDEX IF NOT EXISTS signals_type   ON signals(type, ts);
+CREATE INDEX IF NOT EXISTS signals_score  ON signals(score, ts);
+CREATE INDEX IF NOT EXISTS signals_day    ON signals(day);
+"""
+
+def to_epoch(ts) -> int:
+    """ISO-tidsstempel (med eller uten Z/offset) → epoch-sekunder, UTC."""
+    if isinstance(ts, (int, float)):
+        return int(ts)
+    s = str(ts or "").strip()
+    if s.endswith("Z"):
+        s = s[:-1]
+    try:
+        dt = datetime.fromisoformat(s)
+    except ValueError:
+        return 0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+def _day(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%d")
+
+class SignalStore:
+    def __init__(self, path: str):
+        self.conn = connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def insert(self, signals: Iterable[dict]) -> List[str]:
+        """Append-only: signaler med kjent ID ignoreres. Returnerer dagene
+        (YYYY-MM-DD) som fikk nye rader, sortert."""
+        days = set()
+        with self.conn:
+            for s in signals:
+                ts = to_epoch(s.get("ts"))
+                day = _day(ts)
+                cur = self.conn.execute(
+                    "INSERT OR IGNORE INTO signals (id, ts, day, ticker, type, score, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (signal_id(s), ts, day, s.get("ticker"), s.get("type", "?"), int(s.get("score", 0)),
+                     json.dumps(s, ensure_ascii=False, separators=(",", ":"))),
+                )
+                if cur.rowcount == 1:
+                    days.add(day)
+        return sorted(days)
+
+    def boost(self, ranges: Iterable[tuple]) -> List[str]:
+        """Kryss-boost i etterkant: +1 (og 'boost') på signaler for tickeren
+        med ts i (fra, til], også når tickeren bare står i 'tickers'. Signaler
+        som alt er boostet røres ikke. Returnerer de berørte dagene, sortert."""
+        days = set()
+        where = ("ts > ? AND ts <= ? AND json_extract(payload, '$.boost') IS NULL AND "
+                 "(ticker = ? OR EXISTS (SELECT 1 FROM json_each(signals.payload, '$.tickers') WHERE value = ?))")
+        with self.conn:
+            for ticker, since, until in ranges:
+                args = (since, until, ticker, ticker)
+                days.update(d for (d,) in self.conn.execute(f"SELECT DISTINCT day FROM signals WHERE {where}", args))
+                self.conn.execute("UPDATE signals SET score = score + 1, "
+                                  f"payload = json_set(payload, '$.score', score + 1, '$.boost', 1) WHERE {where}", args)
+        return sorted(days)
+
+    def query(self, ticker: str | None = None, type: str | None = None,
+              since: int | None = None, until: int | None = None,
+              min_score: int | None = None, day: str | None = None,
+              limit: int | None = 200, offset: int = 0) -> List[dict]:
+        """Signaler nyest først. Alle filtre er valgfrie; since/until er epoch-sekunder."""
+        where, args = [], []
+        for col, op, val in (("ticker", "=", ticker), ("type", "=", type), ("ts", ">=", since),
+                             ("ts", "<", until), ("score", ">=", min_score), ("day", "=", day)):
+            if val is not None:
+                where.append(f"{col} {op} ?"); args.append(val)
+        sql = "SELECT payload FROM signals"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts DESC, score DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"; args += [limit, offset]
+        return [json.loads(p) for (p,) in self.conn.execute(sql, args)]
+
+    def evict(self, max_age: float, now: int | None = None) -> int:
+        cutoff = int((now or time.time()) - max_age)
+        with self.conn:
+            return self.conn.execute("DELETE FROM signals WHERE ts < ?", (cutoff,)).rowcount
+
+    def day_counts(self) -> dict:
+        return dict(self.conn.execute("SELECT day, COUNT(*) FROM signals GROUP BY day ORDER BY day"))
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM signals").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+def export_shards(store: SignalStore, out_dir: str, days: Iterable[str], columnar: bool = False) -> int:
+    """Skriver docs/signals/<dag>.json for dagene som har endret seg, pluss
+    index.json med alle dager og antall. Returnerer antall skrevne shards."""
+    n = 0
+    for day in days:
+        rows = store.query(day=day, limit=None)
+        n += write_artifact(os.path.join(out_dir, f"{day}.json"), to_columnar(rows) if columnar else rows)
+    counts = store.day_counts()
+    write_artifact(os.path.join(out_dir, "index.json"),
+                   {"days": [{"day": d, "count": c} for d, c in sorted(counts.items(), reverse=True)],
+                    "total": sum(counts.values())}, compress=False)
+    return n
@@ -0,0 +1,58 @@
+# src/store/watermarks.py
+# Vannmerker per kilde/nøkkel ("siste sett") i radar.db, slik at kildene kan
+# hente kun det som er nytt siden forrige kjøring. En nyest-først-henting
+# som stopper ved sidetaket før vannmerket husker hvor den kom til
+# (markør), så neste kjøring fortsetter der.
+
+from __future__ import annotations
+import time
+
+from src.store.db import connect
+
+class Watermarks:
+    def __init__(self, path: str):
+        self.conn = connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS watermarks "
+                          "(name TEXT PRIMARY KEY, value TEXT NOT NULL, updated INTEGER NOT NULL)")
+
+    def get(self, name: str, default: str | None = None) -> str | None:
+        row = self.conn.execute("SELECT value FROM watermarks WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def set(self, name: str, value: str):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO watermarks (name, value, updated) VALUES (?, ?, ?)",
+                              (name, str(value), int(time.time())))
+
+    def delete(self, name: str):
+        with self.conn:
+            self.conn.execute("DELETE FROM watermarks WHERE name = ?", (name,))
+
+    def cursor(self, name: str) -> tuple:
+        """(fortsett før, topp) for en nyest-først-gjennomgang ned mot
+        vannmerket som ikke ble ferdig, ellers (None, None)."""
+        raw = self.get(name + "|resume")
+        if not raw:
+            return None, None
+        before, _, top = raw.partition("|")
+        return before, top or None
+
+    def advance(self, name: str, newest: str | None, oldest: str | None, complete: bool):
+        """Etter en nyest-først-henting ned mot vannmerket: er den komplett,
+        blir vannmerket toppen av gjennomgangen (også når den gikk over flere
+        kjøringer) og markøren slettes. Ellers huskes eldste hentede verdi som
+        markør, så neste kjøring blar videre derfra i stedet for å hente de
+        samme sidene igjen; nyere items hentes når gjennomgangen er ferdig."""
+        before, top = self.cursor(name)
+        top = top or newest
+        if complete:
+            if top:
+                self.set(name, top)
+            if before:
+                self.delete(name + "|resume")
+        elif oldest and self.get(name):
+            # uten vannmerke hentes bare første side (første kjøring): ingen markør
+            self.set(name + "|resume", f"{oldest}|{top or oldest}")
+
+    def close(self):
+        self.conn.close()
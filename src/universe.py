@@ -0,0 +1,110 @@
+# src/universe.py
+# Ticker-universet: lastes fra fil (CSV/JSON, tusenvis av symboler) med
+# config-listene som standard, og deles i shards med stabil hash slik at en
+# ticker alltid havner i samme shard uansett rekkefølge i filen.
+#
+# CSV:  ticker,name,cik,aliases        (aliases separert med ;)
+# JSON: [{"ticker": "...", "name": "...", "cik": "...", "aliases": [...]}, ...]
+#       eller {"tickers": [...], "companies": [...]} for bare symboler/navn
+
+from __future__ import annotations
+import csv, json, os, zlib
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List
+
+from src.config import ALIASES, CIK, COMPANIES, TICKERS, UNIVERSE_FILE
+
+@dataclass
+class Universe:
+    tickers: List[str]
+    companies: List[str]                                  # alle selskapsnavn, også unoterte
+    cik: Dict[str, str] = field(default_factory=dict)
+    aliases: Dict[str, List[str]] = field(default_factory=dict)
+
+    def company_tickers(self) -> Dict[str, str]:
+        """selskapsnavn (små bokstaver) → ticker, for navn som hører til en ticker."""
+        return {n.lower(): t for t, names in self.aliases.items() for n in names}
+
+    def shard(self, i: int, n: int) -> "Shard":
+        return Shard(self, i, n)
+
+def shard_of(ticker: str, n: int) -> int:
+    return zlib.crc32(ticker.upper().encode("utf-8")) % n if n > 1 else 0
+
+@dataclass
+class Shard:
+    """Del i av n. Ticker-kildene (priser, SEC) deles på ticker; navn på
+    noterte selskaper følger tickeren sin; generelle nøkkelord, unoterte
+    selskaper og arXiv kjøres i shard 0."""
+    universe: Universe
+    index: int
+    count: int
+
+    @property
+    def tickers(self) -> List[str]:
+        return [t for t in self.universe.tickers if shard_of(t, self.count) == self.index]
+
+    def terms(self, keywords: List[str]) -> List[str]:
+        """Nøkkelord/selskapsnavn som denne shard-en skal søke på."""
+        owner = self.universe.company_tickers()
+        out = []
+        for kw in keywords:
+            t = owner.get(kw.lower())
+            if (shard_of(t, self.count) if t else 0) == self.index:
+                out.append(kw)
+        return out
+
+    @property
+    def global_sources(self) -> bool:
+        return self.index == 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.index}of{self.count}"
+
+def parse_shard(spec: str):
+    """'2/8' → (2, 8)."""
+    i, _, n = spec.partition("/")
+    i, n = int(i), int(n)
+    if n < 1 or not 0 <= i < n:
+        raise ValueError(f"ugyldig shard {spec!r} (forventet i/n med 0 ≤ i < n)")
+    return i, n
+
+def _rows_from_file(path: str):
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            rows = [{"ticker": t} for t in data.get("tickers", [])]
+            return rows, list(data.get("companies", []))
+        return data, []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    for r in rows:
+        r["aliases"] = [a.strip() for a in (r.get("aliases") or "").split(";") if a.strip()]
+    return rows, []
+
+@lru_cache(maxsize=4)
+def load_universe(path: str = UNIVERSE_FILE) -> Universe:
+    """Universet fra fil; config-listene (TICKERS, COMPANIES, CIK, ALIASES)
+    brukes når filen ikke finnes, og flettes alltid inn."""
+    tickers, companies = list(TICKERS), list(COMPANIES)
+    cik = dict(CIK)
+    aliases = {t: list(v) for t, v in ALIASES.items()}
+    if path and os.path.exists(path):
+        rows, extra = _rows_from_file(path)
+        for r in rows:
+            t = str(r.get("ticker") or "").strip().upper()
+            if not t:
+                continue
+            tickers.append(t)
+            names = [x for x in [str(r.get("name") or "").strip(), *(r.get("aliases") or [])] if x]
+            if names:
+                aliases.setdefault(t, [])
+                aliases[t] += [n for n in names if n not in aliases[t]]
+                companies.append(names[0])
+            if r.get("cik"):
+                cik.setdefault(t, str(r["cik"]).strip().zfill(10))
+        companies += extra
+    return Universe(list(dict.fromkeys(tickers)), list(dict.fromkeys(companies)), cik, aliases)
@@ -0,0 +1,15 @@
+import os
+
+import pytest
+
+from src import metrics
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Kjører i en tom katalog: alle stiene i config (data/, docs/) er relative."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    os.makedirs("docs")
+    metrics.reset()
+    yield tmp_path
+    metrics.reset()
@@ -0,0 +1,43 @@
+# Daemonen: bare nye items scores, og kryss-boost virker på tvers av runder.
+import time
+from datetime import date, datetime, timezone
+
+from src import daemon, main as radar
+from src.logic.rules import score_items
+from src.store.seen import signal_id
+from src.store.signals import SignalStore
+
+TODAY = date.today().isoformat()
+A1 = {"source": "SEC", "ticker": "IONQ", "form": "8-K", "filed": TODAY, "accession": "a1"}
+A2 = {"source": "SEC", "ticker": "IONQ", "form": "10-Q", "filed": TODAY, "accession": "a2"}
+SPIKE = {"source": "Stooq", "ticker": "IONQ", "change_pct": 21.5, "price": 12.0, "history": [],
+         "ts": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")}
+
+def test_daemon_scores_fresh_items_and_boosts_across_ticks(workdir, monkeypatch):
+    feed, scored = {}, []
+    monkeypatch.setattr(daemon, "market_open", lambda now=None: True)
+    monkeypatch.setattr(radar, "fetch_sources", lambda names: ({n: list(feed.get(n, [])) for n in names}, {}))
+    monkeypatch.setattr(radar, "build_trend_blocks", lambda prices, states: [])
+    score_results = radar.score_results
+    def spy(results, scorer=None):
+        scored.append(sum(len(v) for v in results.values()))
+        return score_results(results, scorer)
+    monkeypatch.setattr(radar, "score_results", spy)
+
+    d = daemon.Daemon(["sec", "prices"])
+    t0 = time.time()
+    feed["sec"] = [A1]
+    assert d.tick(t0)
+    # spike samme uke: filingen som alt er lagret skal få +1 (INSERT OR IGNORE gjør det ikke)
+    feed["prices"] = [SPIKE]
+    assert d.tick(t0 + 3600)
+    feed["sec"] = [A1, A2]
+    assert d.tick(t0 + 7200)
+    assert scored == [1, 1, 1]          # A1, SPIKE, A2 – ingenting scores på nytt
+
+    store = SignalStore(radar.RADAR_DB)
+    got = {signal_id(s): s["score"] for s in store.query(limit=None)}
+    store.close()
+    want = {signal_id(s): s["score"] for s in score_items([A1, A2, SPIKE])}
+    assert got == want
+    assert all(s.get("boost") == 1 for s in score_items([A1, A2, SPIKE]))
@@ -0,0 +1,89 @@
+# Delta-feeden i src/feed.py: sekvens, snapshots, rydding og feil ved skriving.
+import hashlib, json, os
+
+import pytest
+
+from src import feed as feedmod
+from src.feed import Feed
+
+def _prices(**px):
+    return [{"ticker": t, "price": p} for t, p in px.items()]
+
+def _read(root, name):
+    with open(os.path.join(root, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _files(root):
+    return sorted(n for n in os.listdir(root) if n.endswith(".json"))
+
+@pytest.fixture
+def feed(tmp_path):
+    f = Feed(str(tmp_path / "feed"), str(tmp_path / "radar.db"), snapshot_every=3, keep=2)
+    yield f
+    f.close()
+
+def _publish(feed, prices, signals=(), meta=None):
+    latest = list(signals)
+    return feed.publish(meta or {"tickers": ["IONQ", "QBTS"]}, prices, [{"ticker": p["ticker"]} for p in prices],
+                        signals, lambda: latest)
+
+def test_feed_sequence(feed):
+    root = feed.root
+    s1 = {"id": "s1", "type": "NEWS", "score": 3}
+    assert _publish(feed, _prices(IONQ=10, QBTS=5), [s1]) == 1
+    assert _files(root) == ["manifest.json", "snapshot-1.json"]       # første generasjon: bare snapshot
+    snap = _read(root, "snapshot-1.json")
+    assert snap["prices"] == _prices(IONQ=10, QBTS=5) and snap["signals"] == [s1]
+
+    # uendret: ingen ny generasjon, og et signal som er sendt sendes ikke igjen
+    assert _publish(feed, _prices(IONQ=10, QBTS=5), [s1]) is None
+
+    # bare det som er endret kommer med i deltaen
+    s2 = {"id": "s2", "type": "SEC_FILING", "score": 7}
+    assert _publish(feed, _prices(IONQ=11, QBTS=5), [s1, s2]) == 2
+    delta = _read(root, "delta-2.json")
+    assert delta["prices"] == _prices(IONQ=11) and delta["trend"] == []
+    assert delta["signals"] == [s2] and delta["meta"] == {} and delta["removed"] == {}
+
+    # tickere som forsvinner meldes som fjernet
+    assert _publish(feed, _prices(IONQ=11), meta={"tickers": ["IONQ"]}) == 3
+    delta = _read(root, "delta-3.json")
+    assert delta["removed"] == {"prices": ["QBTS"], "trend": ["QBTS"]}
+    assert delta["meta"] == {"tickers": ["IONQ"]} and delta["prices"] == []
+
+    m = _read(root, "manifest.json")
+    assert m["seq"] == 3 and m["snapshot"]["seq"] == 1 and [d["seq"] for d in m["deltas"]] == [2, 3]
+    for entry in [m["snapshot"]] + m["deltas"]:
+        with open(os.path.join(root, entry["file"]), "rb") as f:
+            assert hashlib.sha256(f.read()).hexdigest() == entry["sha256"]
+
+def test_feed_snapshot_cadence_and_pruning(feed):
+    root = feed.root
+    for seq, px in enumerate((10, 11, 12, 13, 14, 15, 16), 1):
+        assert _publish(feed, _prices(IONQ=px)) == seq
+    # snapshot hver 3. generasjon; forrige snapshot beholdes for klienter som
+    # har lest forrige manifest, og deltaene eldre enn keep ryddes
+    m = _read(root, "manifest.json")
+    assert m["snapshot"]["seq"] == 7 and [d["seq"] for d in m["deltas"]] == [6, 7]
+    assert _files(root) == ["delta-6.json", "delta-7.json", "manifest.json", "snapshot-4.json", "snapshot-7.json"]
+    assert _read(root, "snapshot-7.json")["prices"] == _prices(IONQ=16)
+
+def test_feed_failed_write_is_sent_again(feed, monkeypatch):
+    assert _publish(feed, _prices(IONQ=10)) == 1
+    def broken(*a, **kw):
+        raise OSError("disk full")
+    monkeypatch.setattr(feedmod, "write_artifact", broken)
+    with pytest.raises(OSError):
+        _publish(feed, _prices(IONQ=11), [{"id": "s1", "score": 3}])
+    monkeypatch.undo()
+    # hashene ble ikke committet: endringene kommer med i neste delta
+    assert _publish(feed, _prices(IONQ=11), [{"id": "s1", "score": 3}]) == 2
+    delta = _read(feed.root, "delta-2.json")
+    assert delta["prices"] == _prices(IONQ=11) and delta["signals"] == [{"id": "s1", "score": 3}]
+
+def test_feed_restarts_without_manifest(feed):
+    assert _publish(feed, _prices(IONQ=10)) == 1
+    os.remove(os.path.join(feed.root, "manifest.json"))
+    # uten feed på disk glemmes hashene, og en ny snapshot skrives
+    assert _publish(feed, _prices(IONQ=10)) == 1
+    assert _read(feed.root, "manifest.json")["deltas"] == []
@@ -0,0 +1,121 @@
+# Indikatorene mot de gamle rene Python-løkkene (baseline i trend.py).
+import math
+from statistics import mean
+
+import numpy as np
+import pytest
+
+from src.logic.indicators import align, bearish_divergence, ema, rsi, rsi_trailing
+from src.logic.trend import score_matrix
+
+def _ema(values, n):
+    k = 2 / (n + 1.0)
+    e = values[0]
+    for v in values[1:]:
+        e = v * k + e * (1 - k)
+    return e
+
+def _rsi(closes, period=14):
+    if len(closes) < period + 1:
+        return float("nan")
+    gains = [max(closes[i] - closes[i - 1], 0.0) for i in range(1, period + 1)]
+    losses = [-min(closes[i] - closes[i - 1], 0.0) for i in range(1, period + 1)]
+    avg_gain, avg_loss = mean(gains), mean(losses) or 1e-9
+    for i in range(period + 1, len(closes)):
+        ch = closes[i] - closes[i - 1]
+        avg_gain = (avg_gain * (period - 1) + max(ch, 0.0)) / period
+        avg_loss = (avg_loss * (period - 1) - min(ch, 0.0)) / period
+    return 100 - (100 / (1 + avg_gain / (avg_loss or 1e-9)))
+
+def _divergence(closes, rsis):
+    window, rwin = closes[-20:], rsis[-20:]
+    hi1 = window.index(max(window[:10]))
+    hi2 = 10 + window[10:].index(max(window[10:]))
+    return window[hi2] > window[hi1] * 0.995 and rwin[hi2] < rwin[hi1] - 2
+
+def _walk(seed, n):
+    rng = np.random.default_rng(seed)
+    return list(20 + np.cumsum(rng.normal(0, 1, n)))
+
+@pytest.mark.parametrize("n", [10, 25, 40, 63, 700])
+def test_rsi_trailing_matches_reseeded_loop(n):
+    closes = _walk(n, n)
+    want = [_rsi(closes[:i + 1][-25:]) for i in range(n)]
+    got = rsi_trailing(np.array(closes), 14, 25)
+    assert np.allclose(got, want, equal_nan=True, atol=1e-6)
+
+def test_rsi_trailing_rows_match_single_series():
+    rows = [_walk(s, 30 + 7 * s) for s in range(5)]
+    m = rsi_trailing(align(rows), 14, 25)
+    for i, r in enumerate(rows):
+        assert np.allclose(m[i, -len(r):], rsi_trailing(np.array(r), 14, 25), equal_nan=True)
+
+def test_ema_and_rsi_on_window_match_loop():
+    closes = _walk(7, 25)
+    assert math.isclose(ema(np.array(closes), 5)[-1], _ema(closes, 5))
+    assert math.isclose(ema(np.array(closes), 20)[-1], _ema(closes, 20))
+    assert math.isclose(rsi(np.array(closes), 14)[-1], _rsi(closes), abs_tol=1e-6)
+
+def test_score_matrix_divergence_matches_baseline():
+    hits = 0
+    for seed in range(300):
+        closes = _walk(seed, 63)
+        want = _divergence(closes, [_rsi(closes[:i + 1][-25:]) for i in range(len(closes))])
+        c = np.array(closes).reshape(1, -1)
+        tp = score_matrix(["X"], c, c, np.ones_like(c))[0]
+        assert ("Bearish divergens (pris↑, RSI↓)" in tp.notes) == want, seed
+        got = bearish_divergence(c, rsi_trailing(c, 14, 25))[0, -1]
+        assert bool(got) == want
+        hits += want
+    assert hits > 0
+
+# ---------- online-tilstand mot batch ----------
+
+from src.logic.indicators import OnlineIndicators
+
+def _feed(closes, vols, chunks, revise=False):
+    """Legger inn barene i biter, med lagring/lasting av tilstanden mellom
+    hver bit. Med `revise` er siste bar i hver bit foreløpig (dagens bar) og
+    kommer igjen med endelige verdier først i neste bit."""
+    st, dates = OnlineIndicators(), np.arange(20260101, 20260101 + len(closes))
+    c, v = list(closes), list(vols)
+    edges = np.linspace(0, len(closes), chunks + 1).astype(int)
+    for a, b in zip(edges[:-1], edges[1:]):
+        if revise and a > 0:
+            a -= 1                                   # endelig versjon av forrige bits siste bar
+        if revise and b < len(closes):
+            c[b - 1], v[b - 1] = closes[b - 1] * 1.07, vols[b - 1] * 3
+        st = OnlineIndicators.from_dict(st.to_dict())
+        st.update(dates[a:b], c[a:b], v[a:b])
+        c, v = list(closes), list(vols)
+    return st.values()
+
+@pytest.mark.parametrize("chunks,revise", [(1, False), (5, False), (9, True)])
+def test_online_matches_full_series(chunks, revise):
+    closes = _walk(3, 120)
+    vols = list(np.random.default_rng(3).uniform(1e5, 1e6, 120))
+    v = _feed(closes, vols, chunks, revise)
+    x = np.array(closes)
+    assert v["bars"] == 120 and v["close"] == closes[-1]
+    assert math.isclose(v["ema5"], ema(x, 5)[-1])
+    assert math.isclose(v["ema20"], ema(x, 20)[-1])
+    assert math.isclose(v["rsi"], rsi(x, 14)[-1])
+    assert math.isclose(v["vol_avg20"], mean(vols[-20:]))
+
+def test_online_matches_score_matrix_on_its_window():
+    # score_matrix ser på siste 25 bars; med akkurat 25 lagrede bars skal
+    # online-tilstanden gi samme EMA/RSI/volumsnitt
+    for seed in range(20):
+        closes = _walk(seed, 25)
+        vols = list(np.random.default_rng(seed).uniform(1e5, 1e6, 25))
+        v = _feed(closes, vols, 4, revise=True)
+        c = np.array(closes).reshape(1, -1)
+        tp = score_matrix(["X"], c, c, np.array(vols).reshape(1, -1))[0]
+        assert math.isclose(v["ema5"], tp.ema5) and math.isclose(v["ema20"], tp.ema20)
+        assert math.isclose(v["rsi"], tp.rsi) and math.isclose(v["vol_avg20"], tp.vol_avg20)
+
+def test_online_ignores_old_and_nan_bars():
+    st = OnlineIndicators()
+    st.update([20260102, 20260103], [10.0, 11.0], [1.0, 1.0])
+    assert st.update([20260101, 20260103, 20260104], [9.0, 11.5, float("nan")], [1.0, 1.0, 1.0]) == 1
+    assert st.values()["close"] == 11.5 and st.values()["bars"] == 2
@@ -0,0 +1,13 @@
+# Prometheus-eksporten i src/metrics.py.
+from src import metrics
+
+def test_prometheus_escapes_label_values():
+    metrics.reset()
+    metrics.record("fetch", 0.5, 'odd\\"src\nx')
+    metrics.inc("errors", 'C:\\tmp "a"')
+    text = metrics.to_prometheus(metrics.snapshot())
+    metrics.reset()
+    assert 'radar_stage_seconds{stage="fetch",source="odd\\\\\\"src\\nx"} 0.5' in text
+    assert 'radar_errors{key="C:\\\\tmp \\"a\\""} 1' in text
+    # én linje per sample: linjeskift i en etikett bryter ikke formatet
+    assert all(line.startswith(("# TYPE ", "radar_")) for line in text.splitlines())
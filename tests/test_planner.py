@@ -0,0 +1,46 @@
+# Spørreplanleggeren: sammenslåtte spørringer skal hente og attribuere som baseline.
+from src.config import ARXIV_QUERIES, NEWS_KEYWORDS, COMPANIES
+from src.logic.rules import ENTITIES
+from src.sources import arxiv, news
+from src.sources.planner import attribute, merge_keywords, pack
+
+def test_company_names_survive_the_merge():
+    terms = merge_keywords(NEWS_KEYWORDS + COMPANIES, keep=COMPANIES)
+    assert "Quantum Computing Inc" in terms
+    assert "quantum computing" in terms
+    # Uten keep dekker frasen 'quantum computing' selskapsnavnet
+    assert "Quantum Computing Inc" not in merge_keywords(NEWS_KEYWORDS + COMPANIES)
+
+def test_attribution_prefers_the_company_name():
+    all_kw = NEWS_KEYWORDS + COMPANIES
+    group = merge_keywords(all_kw, keep=COMPANIES)
+    items = [{"title": "Quantum Computing Inc raises $500M"},
+             {"title": "Why quantum computing stocks rallied"},
+             {"title": "Headline the API matched on the body"}]
+    attribute(items, all_kw, lambda a: a["title"], "keyword", group)
+    assert items[0]["keyword"] == "Quantum Computing Inc"
+    assert items[0]["keywords"] == ["Quantum Computing Inc", "quantum computing"]
+    assert ENTITIES.tickers_for(items[0]) == ["QUBT"]
+    assert items[1]["keyword"] == "quantum computing"
+    assert ENTITIES.tickers_for(items[1]) == []
+    # Ukjent treff i en OR-gruppe gjettes ikke; en gruppe med ett nøkkelord er entydig
+    assert items[2]["keyword"] == "" and ENTITIES.tickers_for(items[2]) == []
+    attribute(items[2:], all_kw, lambda a: a["title"], "keyword", ["Quantum Computing Inc"])
+    assert ENTITIES.tickers_for(items[2]) == ["QUBT"]
+
+def test_arxiv_keeps_baseline_and_semantics():
+    assert arxiv._term("IonQ") == "all:IonQ"
+    assert arxiv._term("trapped ion quantum") == "(all:trapped AND all:ion AND all:quantum)"
+    # Som AND-søk dekker 'fault tolerant quantum' bare spørringer med alle tre ordene
+    assert merge_keywords(["fault tolerant quantum", "quantum fault tolerant computing", "fault tolerant"],
+                          phrases=False) == ["fault tolerant"]
+    assert merge_keywords(ARXIV_QUERIES, phrases=False) == ARXIV_QUERIES
+    groups = pack(merge_keywords(ARXIV_QUERIES, phrases=False), arxiv._term, arxiv.MAX_QUERY)
+    assert sum(groups, []) == ARXIV_QUERIES
+    items = [{"title": "Error correction for quantum computing", "summary": ""}]
+    attribute(items, ARXIV_QUERIES, lambda a: a["title"] + " " + a["summary"], "query", groups[0], phrases=False)
+    assert items[0]["query"] == "quantum computing error correction"
+
+def test_news_quotes_phrases_only():
+    assert news._term("IonQ") == "IonQ"
+    assert news._term("Quantum Computing Inc") == '"Quantum Computing Inc"'
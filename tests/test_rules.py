@@ -0,0 +1,25 @@
+# Scoring i src/logic/rules.py.
+from src.logic import rules
+
+def test_one_scan_per_text_for_tags_and_tickers(monkeypatch):
+    calls = []
+    scan = rules.ENTITIES.matcher.scan
+    monkeypatch.setattr(rules.ENTITIES.matcher, "scan", lambda text: calls.append(text) or scan(text))
+    title = "Rigetti wins record contract for superconducting qubits, unscanned variant 7f3a"
+    sig = rules.score_items([{"source": "GDELT", "title": title, "url": "https://x/1", "seendate": "20261015T080000Z"}])
+    assert calls == [title]
+    hits = rules.tag(title)
+    assert hits["ticker"] == ("RGTI",) and hits["pos"]
+    assert sig[0]["ticker"] == "RGTI" and sig[0]["score"] == 3 + min(len(hits["pos"]) - len(hits["neg"]), 2)
+
+def test_stream_scorer_caches_boost_keys():
+    sc = rules.StreamScorer()
+    filing = sc.score({"source": "SEC", "ticker": "IONQ", "form": "8-K", "filed": rules._iso(sc.now)[:10], "accession": "a1"})
+    assert not sc.boosted(filing)
+    keys = sc._boost_set()
+    assert sc._boost_set() is keys                # ikke bygget på nytt mellom treff
+    spike = sc.score({"source": "Stooq", "ticker": "IONQ", "change_pct": 20.0, "ts": rules._iso(sc.now)})
+    assert sc.boosted(filing) and sc.boosted(spike)
+    assert sc.boost_keys() == [("IONQ", 0)]
+    sc.advance(sc.now + 30 * 86400, 8 * 86400)     # uken er glemt
+    assert not sc.boosted(filing) and sc.boost_keys() == []
@@ -0,0 +1,93 @@
+# Kildene mot et falskt HTTP-lag: vannmerker og cache.
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlparse
+
+from src import main as radar
+from src.sources import arxiv, news, sec
+from src.store.watermarks import Watermarks
+
+RECENT = {"accessionNumber": ["a3", "a2", "a1"], "form": ["4", "8-K", "10-Q"],
+          "filingDate": ["2026-10-15", "2026-10-14", "2026-10-01"], "primaryDocument": ["", "", ""]}
+
+class _Resp:
+    status_code = 200
+    from_cache = True                      # 304: kroppen kommer fra cachen
+    def json(self):
+        return {"filings": {"recent": RECENT}}
+
+def test_sec_cache_hit_still_yields_rows_newer_than_mark(monkeypatch):
+    monkeypatch.setattr(sec, "get", lambda *a, **kw: _Resp())
+    # forrige kjøring fikk kroppen inn i cachen, men stoppet før vannmerket ble flyttet
+    rows, newest = sec._fetch_one("IONQ", "1824920", "a1|2026-10-01", {})
+    assert [r["accession"] for r in rows] == ["a3", "a2"]
+    assert newest == "a3|2026-10-15"
+    rows, newest = sec._fetch_one("IONQ", "1824920", newest, {})
+    assert rows == [] and newest == "a3|2026-10-15"
+
+class _Gdelt:
+    """Falsk GDELT: artikler nyest først mellom startdatetime og enddatetime."""
+    def __init__(self, n):
+        t0 = datetime(2026, 10, 15, 8, 0)
+        self.arts = [{"title": f"IonQ story {i}", "url": f"https://x/{i}",
+                      "seendate": (t0 + timedelta(minutes=i)).strftime("%Y%m%dT%H%M%SZ")} for i in range(n)]
+        self.calls = 0
+
+    def __call__(self, url, **kw):
+        self.calls += 1
+        q = {k: v[0] for k, v in parse_qs(urlparse(url).query).items()}
+        hits = [a for a in self.arts if q.get("startdatetime", "0") <= news._stamp(a["seendate"]) <= q.get("enddatetime", "9")]
+        arts = sorted(hits, key=lambda a: a["seendate"], reverse=True)[:int(q["maxrecords"])]
+        resp = type("R", (), {"status_code": 200, "json": lambda self: {"articles": arts}})
+        return resp()
+
+def test_news_resumes_where_the_page_cap_stopped(workdir, monkeypatch):
+    gdelt = _Gdelt(30)
+    monkeypatch.setattr(news, "get", gdelt)
+    monkeypatch.setattr(news, "NEWS_MAX_RECORDS", 5)
+    monkeypatch.setattr(news, "NEWS_MAX_PAGES", 2)
+    wm = Watermarks(radar.RADAR_DB)
+    wm.set("news|ionq", gdelt.arts[0]["seendate"])
+    runs = []
+    for _ in range(4):
+        runs.append([a["title"] for a in news.iter_news(["IonQ"])])
+    # hver kjøring blar videre fra markøren i stedet for å hente de nyeste sidene igjen
+    assert runs[0] == [f"IonQ story {i}" for i in range(29, 19, -1)]
+    assert runs[1] == [f"IonQ story {i}" for i in range(19, 9, -1)]
+    assert runs[2] == [f"IonQ story {i}" for i in range(9, -1, -1)]
+    assert runs[3] == []
+    assert wm.get("news|ionq") == gdelt.arts[29]["seendate"] and wm.cursor("news|ionq") == (None, None)
+    # ferdig med gjennomgangen: bare det nye hentes
+    gdelt.arts += _Gdelt(32).arts[30:]
+    assert [a["title"] for a in news.iter_news(["IonQ"])] == ["IonQ story 31", "IonQ story 30", "IonQ story 29"]
+    wm.close()
+
+def _atom(entries):
+    body = "".join(f"<entry><title>{t}</title><id>{t}</id><link href='http://arxiv.org/abs/{t}'/>"
+                   f"<published>{p}</published><summary>trapped ion quantum</summary></entry>" for t, p in entries)
+    return f"<?xml version='1.0'?><feed xmlns='http://www.w3.org/2005/Atom'>{body}</feed>".encode()
+
+def test_arxiv_resumes_with_submitted_date(workdir, monkeypatch):
+    pubs = [(f"p{i}", f"2026-10-15T08:{i:02d}:00Z") for i in range(30)]
+    urls = []
+    def get(url, **kw):
+        urls.append(url)
+        q = parse_qs(urlparse(url).query)
+        start, n = int(q["start"][0]), int(q["max_results"][0])
+        hits = sorted(pubs, key=lambda e: e[1], reverse=True)
+        if "submittedDate" in q["search_query"][0]:
+            hi = q["search_query"][0].split(" TO ")[1].rstrip("]")
+            hits = [e for e in hits if arxiv._minute(e[1]) <= hi]
+        return type("R", (), {"status_code": 200, "content": _atom(hits[start:start + n])})()
+    monkeypatch.setattr(arxiv, "get", get)
+    monkeypatch.setattr(arxiv, "ARXIV_PAGE_SIZE", 5)
+    monkeypatch.setattr(arxiv, "ARXIV_MAX_PAGES", 2)
+    wm = Watermarks(radar.RADAR_DB)
+    key = "arxiv|trapped ion quantum"
+    wm.set(key, pubs[0][1])
+    first = [a["title"] for a in arxiv.iter_arxiv(["trapped ion quantum"])]
+    assert first == [f"p{i}" for i in range(29, 19, -1)] and wm.cursor(key) == (pubs[20][1], pubs[29][1])
+    urls.clear()
+    second = [a["title"] for a in arxiv.iter_arxiv(["trapped ion quantum"])]
+    assert "submittedDate:[202610150800 TO 202610150820]" in parse_qs(urlparse(urls[0]).query)["search_query"][0]
+    assert second[0] == "p20" and second[1:] == [f"p{i}" for i in range(19, 10, -1)]
+    wm.close()
@@ -0,0 +1,148 @@
+# Lagrene: SQLite-tabellene i radar.db og de binære prisfilene.
+import json, os
+
+import numpy as np
+import pytest
+
+from src.logic.rules import score_items
+from src.store.seen import SeenStore, signal_id
+from src.store.prices import DTYPE, PriceStore
+from src.store.signals import SignalStore, to_epoch
+
+# Slik data/state.json så ut før SQLite-lageret: serialiserte signal-dicts
+LEGACY = {
+    "notified_ids": [
+        json.dumps({"filed": "2025-10-14", "form": "8-K", "score": 7, "ticker": "IONQ",
+                    "ts": "2025-10-14T00:00:00Z", "type": "SEC_FILING"}),
+        json.dumps({"change_pct": 21.62, "score": 8, "ticker": "QBTS",
+                    "ts": "2025-10-14T05:55:40.329168+00:00Z", "type": "PRICE_SPIKE"}),
+        json.dumps({"link": "http://arxiv.org/abs/2510.11718v1", "published": "2025-10-13T17:59:55Z",
+                    "score": 3, "title": "CodePlot-CoT: Mathematical Visual Reasoning",
+                    "ts": "2025-10-13T17:59:55+00:00Z", "type": "ARXIV"}),
+        json.dumps({"title": "IonQ wins contract", "url": "https://example.com/a", "score": 4,
+                    "seen": "20251014T101500Z", "ts": "2025-10-14T10:15:00Z", "type": "NEWS"}),
+        "not json",
+    ],
+    "trend_status": {},
+}
+
+# De samme sakene slik kildene leverer dem i dag
+ITEMS = [
+    {"source": "SEC", "ticker": "IONQ", "form": "8-K", "filed": "2025-10-14", "accession": "0001-25-000123"},
+    {"source": "Stooq", "ticker": "QBTS", "change_pct": 21.62, "ts": "2025-10-14T13:30:00Z"},
+    {"source": "arXiv", "title": "CodePlot-CoT: Mathematical Visual Reasoning",
+     "published": "2025-10-13T17:59:55Z", "link": "http://arxiv.org/abs/2510.11718v1"},
+    {"source": "GDELT", "title": "IonQ wins contract", "url": "https://example.com/a", "seendate": "20251014T101500Z"},
+]
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "radar.db")
+
+def test_migrated_legacy_ids_match_new_signals(db):
+    seen = SeenStore(db)
+    state = json.loads(json.dumps(LEGACY))
+    assert seen.migrate_legacy(state) == 5
+    assert "notified_ids" not in state and state["trend_status"] == {}
+    scored = score_items(ITEMS)
+    assert len(scored) == 4
+    for s in scored:
+        # SEC-ID-en har fått accession; den gamle formen sjekkes i add_signals
+        assert (signal_id(s) in seen) == (s["type"] != "SEC_FILING"), s["type"]
+    assert seen.add_signals(scored) == [False] * 4
+    # ny dag for samme ticker er et nytt prissignal
+    later = score_items([{**ITEMS[1], "ts": "2025-10-15T13:30:00Z"}])
+    assert seen.add_signals(later) == [True]
+    seen.close()
+
+def test_same_day_filings_are_distinct(db):
+    filings = [{**ITEMS[0], "form": "4", "accession": f"0001-26-00000{i}"} for i in range(3)]
+    scored = score_items(filings)
+    assert len({signal_id(s) for s in scored}) == 3
+    store = SignalStore(db)
+    store.insert(scored)
+    assert len(store.query(limit=None)) == 3
+    store.close()
+    seen = SeenStore(db)
+    assert seen.add_signals(scored) == [True] * 3
+    assert seen.add_signals(scored) == [False] * 3
+    # varslet under den gamle ID-en (uten accession): ikke varsle igjen
+    seen.add_new(["SEC|QBTS|4|2025-10-14"])
+    again = score_items([{**f, "ticker": "QBTS"} for f in filings])
+    assert seen.add_signals(again) == [False] * 3
+    seen.close()
+
+def test_migration_is_one_shot(db):
+    seen = SeenStore(db)
+    state = {"signals_seen": ["NEWS|x", "NEWS|x"], **json.loads(json.dumps(LEGACY))}
+    assert seen.migrate_legacy(state) == 6
+    assert seen.migrate_legacy(state) == 0
+    assert len(seen) == 6
+    seen.close()
+
+def test_seen_evict_by_age(db):
+    seen = SeenStore(db)
+    seen.add_new(["a"], now=1_000)
+    seen.add_new(["b"], now=5_000)
+    assert seen.evict(2_000, now=6_000) == 1
+    assert "a" not in seen and "b" in seen
+    seen.close()
+
+def test_neardup_stream_releases_write_lock_per_batch(db):
+    import sqlite3
+    from src.logic.neardup import NearDupIndex
+    from src.store.watermarks import Watermarks
+
+    Watermarks(db).close()
+    titles = [f"Story number {i} about {'abcdefghij'[i] * 4} quantum networking" for i in range(6)]
+    for commit_every, writable in ((3, True), (1000, False)):
+        idx = NearDupIndex(db, 86400, commit_every=commit_every)
+        for t in titles[:3] if writable else titles[3:]:
+            assert idx.keep({"title": t}) is not None
+        other = sqlite3.connect(db, timeout=0)       # ingen venting: låst gir feil med én gang
+        try:
+            with other:
+                other.execute("INSERT OR REPLACE INTO watermarks (name, value, updated) VALUES ('x', '1', 0)")
+            assert writable
+        except sqlite3.OperationalError as e:
+            assert not writable and "locked" in str(e)
+        assert other.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        other.close()
+        idx.close()
+
+def test_signal_boost_is_idempotent(db):
+    store = SignalStore(db)
+    scored = score_items(ITEMS[:2])                  # IONQ-filing og QBTS-spike
+    filing = next(s for s in scored if s["type"] == "SEC_FILING")
+    ts = to_epoch(filing["ts"])
+    assert store.insert(scored) == sorted({s["ts"][:10] for s in scored})
+    assert store.insert(scored) == []
+    # 'IONQ' som ticker eller i 'tickers'; utenfor intervallet røres ingenting
+    ranges = [("IONQ", ts - 1, ts), ("RGTI", ts - 1, ts), ("QBTS", ts, ts + 1)]
+    assert store.boost(ranges) == [filing["ts"][:10]]
+    assert store.boost(ranges) == []
+    got = {s["type"]: s for s in store.query(limit=None)}
+    store.close()
+    assert got["SEC_FILING"]["score"] == filing["score"] + 1 and got["SEC_FILING"]["boost"] == 1
+    assert "boost" not in got["PRICE_SPIKE"]
+
+def _bars(dates, close):
+    rows = np.zeros(len(dates), dtype=DTYPE)
+    rows["date"], rows["close"] = dates, close
+    return rows
+
+def test_price_append_overwrites_last_bar_in_place(tmp_path):
+    store = PriceStore(str(tmp_path))
+    assert store.append("IONQ", _bars([20261013, 20261014, 20261015], [10.0, 11.0, 12.0])) == 3
+    size = os.path.getsize(store.path("IONQ"))
+    reader = store.bars("IONQ")                     # memmap som en leser holder åpen
+    # dagens bar var ufullstendig: samme dato med ny close erstatter den
+    assert store.append("IONQ", _bars([20261014, 20261015], [99.0, 12.5])) == 1
+    assert os.path.getsize(store.path("IONQ")) == size
+    assert len(store.bars("IONQ")) == 3
+    assert store.tail("IONQ", 1)["close"].tolist() == [12.5]
+    assert store.bars("IONQ")["close"].tolist() == [10.0, 11.0, 12.5]   # eldre bars røres ikke
+    assert reader["close"][-1] == 12.5
+    # ny dag etter overskrivingen legges til
+    assert store.append("IONQ", _bars([20261015, 20261016], [12.6, 13.0])) == 2
+    assert store.bars("IONQ")["close"].tolist() == [10.0, 11.0, 12.6, 13.0]